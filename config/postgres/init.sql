@@ -32,7 +32,7 @@ CREATE TABLE IF NOT EXISTS devices (
 CREATE TABLE IF NOT EXISTS refresh_tokens (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-    token_hash VARCHAR(255) UNIQUE NOT NULL,
+    token_hash VARCHAR(255) UNIQUE NOT NULL,  -- SHA-256 hex digest of the raw token
     expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     revoked BOOLEAN DEFAULT FALSE
@@ -62,6 +62,7 @@ CREATE INDEX idx_alerts_severity ON alerts(severity);
 CREATE INDEX idx_alerts_created_at ON alerts(created_at);
 CREATE INDEX idx_refresh_tokens_user_id ON refresh_tokens(user_id);
 CREATE INDEX idx_refresh_tokens_expires_at ON refresh_tokens(expires_at);
+CREATE INDEX IF NOT EXISTS ix_refresh_tokens_revoked_expires_at ON refresh_tokens(revoked, expires_at);
 
 -- Admin user is created via scripts/create_admin.py
 -- Example:
@@ -171,6 +171,11 @@ docker-compose up -d
 echo "⏳ Waiting for services to start..."
 sleep 10
 
+echo "🗄️  Applying database migrations..."
+cd $INSTALL_DIR/server
+venv/bin/alembic upgrade head
+cd $INSTALL_DIR
+
 echo "🔧 Setting up systemd services..."
 cp deployment/systemd/health-monitor-api.service /etc/systemd/system/
 cp deployment/systemd/health-monitor-agent.service /etc/systemd/system/
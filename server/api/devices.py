@@ -9,7 +9,7 @@ import secrets
 
 from db.models import get_db, Device, User
 from api.auth import get_current_user, get_current_user_optional
-from services.auth_service import get_password_hash, verify_password
+from services.auth_service import hash_device_token, is_legacy_token_hash, verify_device_token
 from config import settings
 
 
@@ -124,7 +124,7 @@ def register_device(
 
     # Generate device token
     token = f"dev_{secrets.token_urlsafe(32)}"
-    token_hash = get_password_hash(token)
+    token_hash = hash_device_token(token)
     
     # Create device
     device = Device(
@@ -217,9 +217,12 @@ def update_heartbeat(
 
     if settings.DEVICE_HEARTBEAT_REQUIRE_TOKEN:
         provided = (x_device_token or "").strip()
-        token_valid = bool(provided) and verify_password(provided, device.token_hash)
+        token_valid = bool(provided) and verify_device_token(provided, device.token_hash)
         if not token_valid:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid device token")
+        if is_legacy_token_hash(device.token_hash):
+            # Upgrade bcrypt-hashed tokens so later heartbeats skip bcrypt
+            device.token_hash = hash_device_token(provided)
     
     device.last_seen = datetime.utcnow()
     device.status = "online"
@@ -1,12 +1,13 @@
 """API endpoints for Host Group management."""
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from datetime import datetime
 from uuid import UUID
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from db.models import get_db, HostGroup, Device, User
+from db.models import get_db, HostGroup, Device, User, device_hostgroup, template_hostgroup
 from api.auth import get_current_user
 
 
@@ -42,19 +43,37 @@ class HostGroupListResponse(BaseModel):
     total: int
 
 
-def to_hostgroup_response(hg: HostGroup) -> HostGroupResponse:
+def to_hostgroup_response(
+    hg: HostGroup,
+    device_count: Optional[int] = None,
+    template_count: Optional[int] = None,
+) -> HostGroupResponse:
     """Convert HostGroup model to response with computed fields."""
+    if device_count is None:
+        device_count = len(hg.devices) if hg.devices else 0
+    if template_count is None:
+        template_count = len(hg.templates) if hg.templates else 0
     return HostGroupResponse(
         id=hg.id,
         name=hg.name,
         description=hg.description,
-        device_count=len(hg.devices) if hg.devices else 0,
-        template_count=len(hg.templates) if hg.templates else 0,
+        device_count=device_count,
+        template_count=template_count,
         created_at=hg.created_at,
         updated_at=hg.updated_at
     )
 
 
+def _count_members(db: Session, table, hostgroup_ids: List[UUID]) -> Dict[UUID, int]:
+    """Count association rows per host group without loading the member objects."""
+    if not hostgroup_ids:
+        return {}
+    rows = db.query(table.c.hostgroup_id, func.count()).filter(
+        table.c.hostgroup_id.in_(hostgroup_ids)
+    ).group_by(table.c.hostgroup_id).all()
+    return dict(rows)
+
+
 # Endpoints
 @router.post("", response_model=HostGroupResponse, status_code=status.HTTP_201_CREATED)
 def create_hostgroup(
@@ -96,8 +115,15 @@ def list_hostgroups(
     total = query.count()
     hostgroups = query.order_by(HostGroup.name).offset(skip).limit(limit).all()
 
+    ids = [hg.id for hg in hostgroups]
+    device_counts = _count_members(db, device_hostgroup, ids)
+    template_counts = _count_members(db, template_hostgroup, ids)
+
     return HostGroupListResponse(
-        host_groups=[to_hostgroup_response(hg) for hg in hostgroups],
+        host_groups=[
+            to_hostgroup_response(hg, device_counts.get(hg.id, 0), template_counts.get(hg.id, 0))
+            for hg in hostgroups
+        ],
         total=total
     )
 
@@ -175,6 +175,7 @@ def update_maintenance_window(
     
     db.commit()
     db.refresh(window)
+    maintenance_service.invalidate_cache()
     
     return _enrich_window_response(window, db)
 
@@ -192,6 +193,7 @@ def delete_maintenance_window(
     
     db.delete(window)
     db.commit()
+    maintenance_service.invalidate_cache()
     
     return None
 
@@ -210,6 +212,7 @@ def deactivate_maintenance_window(
     window.active = False
     db.commit()
     db.refresh(window)
+    maintenance_service.invalidate_cache()
     
     return _enrich_window_response(window, db)
 
@@ -1,6 +1,6 @@
 """API endpoints for Monitoring Template management."""
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from pydantic import BaseModel
 from datetime import datetime
 from uuid import UUID
@@ -8,6 +8,7 @@ from typing import List, Optional
 
 from db.models import get_db, Template, TemplateItem, User
 from api.auth import get_current_user
+from services.alerting import invalidate_trigger_cache
 
 
 router = APIRouter(prefix="/templates", tags=["Templates"])
@@ -147,7 +148,14 @@ def list_templates(
         query = query.filter(Template.template_type == template_type)
 
     total = query.count()
-    templates = query.order_by(Template.name).offset(skip).limit(limit).all()
+    # Item/trigger counts are needed per row; load them in two IN queries instead of 2N
+    templates = (
+        query.options(selectinload(Template.items), selectinload(Template.triggers))
+        .order_by(Template.name)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
 
     return TemplateListResponse(
         templates=[to_template_response(t) for t in templates],
@@ -218,6 +226,8 @@ def delete_template(
 
     db.delete(template)
     db.commit()
+    # Deleting a template cascades to its triggers
+    invalidate_trigger_cache()
 
 
 # Template Item Endpoints
@@ -533,7 +543,7 @@ def propagate_config(
     
     This triggers agents to refresh their configuration.
     """
-    from db.models import Device, device_template
+    from db.models import device_template, device_hostgroup, template_hostgroup
     
     template = db.query(Template).filter(Template.id == template_id).first()
     if not template:
@@ -548,10 +558,12 @@ def propagate_config(
     ).fetchall()
     affected_devices.update(str(a.device_id) for a in direct)
     
-    # Via host groups
-    for hostgroup in template.host_groups:
-        for device in hostgroup.devices:
-            affected_devices.add(str(device.id))
+    # Via host groups: join the association tables directly, no Device/HostGroup loads
+    via_hostgroups = db.query(device_hostgroup.c.device_id).join(
+        template_hostgroup,
+        template_hostgroup.c.hostgroup_id == device_hostgroup.c.hostgroup_id,
+    ).filter(template_hostgroup.c.template_id == template_id).all()
+    affected_devices.update(str(row.device_id) for row in via_hostgroups)
     
     # Touch template updated_at to signal config change
     template.updated_at = datetime.utcnow()
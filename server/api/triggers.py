@@ -1,6 +1,6 @@
 """API endpoints for Trigger/Alert Rule management."""
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from pydantic import BaseModel
 from datetime import datetime
 from uuid import UUID
@@ -8,6 +8,7 @@ from typing import List, Optional
 
 from db.models import get_db, Trigger, Template, User
 from api.auth import get_current_user
+from services.alerting import invalidate_trigger_cache
 
 
 router = APIRouter(prefix="/triggers", tags=["Triggers"])
@@ -153,6 +154,7 @@ def create_trigger(
     db.add(trigger)
     db.commit()
     db.refresh(trigger)
+    invalidate_trigger_cache()
 
     return to_trigger_response(trigger)
 
@@ -181,7 +183,8 @@ def list_triggers(
         query = query.filter(Trigger.template_id == template_id)
 
     total = query.count()
-    triggers = query.order_by(Trigger.name).offset(skip).limit(limit).all()
+    # template_name is rendered per row; join the template rather than lazy-loading N times
+    triggers = query.options(joinedload(Trigger.template)).order_by(Trigger.name).offset(skip).limit(limit).all()
 
     return TriggerListResponse(
         triggers=[to_trigger_response(t) for t in triggers],
@@ -237,6 +240,7 @@ def update_trigger(
 
     db.commit()
     db.refresh(trigger)
+    invalidate_trigger_cache()
 
     return to_trigger_response(trigger)
 
@@ -255,6 +259,7 @@ def delete_trigger(
 
     db.delete(trigger)
     db.commit()
+    invalidate_trigger_cache()
 
 
 @router.post("/{trigger_id}/toggle", response_model=TriggerResponse)
@@ -272,5 +277,6 @@ def toggle_trigger(
     trigger.enabled = not trigger.enabled
     db.commit()
     db.refresh(trigger)
+    invalidate_trigger_cache()
 
     return to_trigger_response(trigger)
@@ -1,15 +1,78 @@
-from sqlalchemy import create_engine, Column, String, Boolean, DateTime, DECIMAL, text, ForeignKey, Integer, Text, Table
+from sqlalchemy import create_engine, event, Column, String, Boolean, DateTime, DECIMAL, text, ForeignKey, Integer, Text, Table, Index
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
-from sqlalchemy.types import TypeDecorator, CHAR
+from sqlalchemy.types import TypeDecorator, BINARY
 from datetime import datetime
+import logging
 import uuid
 
 from config import settings
 
+logger = logging.getLogger(__name__)
+sql_logger = logging.getLogger("db.sql")
+
+
+def _engine_options(database_url: str) -> dict:
+    """Engine keyword arguments tuned for the configured backend."""
+    options = {
+        # Statement logging goes through the event hook below instead of `echo`.
+        "echo": False,
+        # Default (500) is too small for ~25 models and their loader-option permutations
+        "query_cache_size": 2000,
+        "pool_pre_ping": True,
+    }
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    # In-memory SQLite uses SingletonThreadPool, which has no LIFO option
+    if not (backend == "sqlite" and url.database in (None, "", ":memory:")):
+        options["pool_use_lifo"] = True
+    if backend == "sqlite":
+        # Sessions are used from FastAPI's threadpool and the alerting worker's threads
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    if backend == "postgresql":
+        options["isolation_level"] = "READ COMMITTED"
+        # Short OLTP queries never amortize LLVM JIT warmup
+        options["connect_args"] = {"options": "-c jit=off"}
+    return options
+
+
 # Database engine
-engine = create_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL)).execution_options(
+    logging_token="health-monitor"
+)
+
+if not engine.dialect.supports_statement_cache:
+    logger.warning(
+        "Dialect %s does not support the compiled statement cache; every query will be recompiled",
+        engine.dialect.name,
+    )
+
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+        # SQLite ignores foreign keys, ON DELETE CASCADE included, unless enabled per connection
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _log_statement(conn, cursor, statement, parameters, context, executemany):
+    if sql_logger.isEnabledFor(logging.DEBUG):
+        sql_logger.debug("%s %r", statement, parameters)
+
+
+if settings.DEBUG:
+    sql_logger.setLevel(logging.DEBUG)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -17,31 +80,33 @@ Base = declarative_base()
 class GUID(TypeDecorator):
     """Platform-independent GUID type.
 
-    Uses PostgreSQL's UUID type, otherwise stores UUIDs as 36-char strings.
+    Uses PostgreSQL's native UUID type, otherwise stores UUIDs as 16 raw bytes.
     """
 
-    impl = CHAR
+    impl = BINARY
     cache_ok = True
 
     def load_dialect_impl(self, dialect):
         if dialect.name == "postgresql":
             return dialect.type_descriptor(PG_UUID(as_uuid=True))
-        return dialect.type_descriptor(CHAR(36))
+        return dialect.type_descriptor(BINARY(16))
 
     def process_bind_param(self, value, dialect):
         if value is None:
             return None
-        if isinstance(value, uuid.UUID):
-            return str(value) if dialect.name != "postgresql" else value
-        parsed = uuid.UUID(str(value))
-        return str(parsed) if dialect.name != "postgresql" else parsed
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return value if dialect.name == "postgresql" else value.bytes
 
     def process_result_value(self, value, dialect):
         if value is None:
             return None
         if isinstance(value, uuid.UUID):
             return value
-        return uuid.UUID(str(value))
+        if isinstance(value, str):
+            # 36-char text from before GUIDs were stored as bytes
+            return uuid.UUID(value)
+        return uuid.UUID(bytes=bytes(value))
 
 
 # Database models
@@ -82,6 +147,11 @@ class RefreshToken(Base):
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     revoked = Column(Boolean, default=False)
 
+    __table_args__ = (
+        # Active/expired token scans (token lookups use the unique token_hash index)
+        Index("ix_refresh_tokens_revoked_expires_at", "revoked", "expires_at"),
+    )
+
 
 class Alert(Base):
     __tablename__ = "alerts"
@@ -157,8 +227,8 @@ class Template(Base):
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
-    items = relationship("TemplateItem", back_populates="template", cascade="all, delete-orphan")
-    triggers = relationship("Trigger", back_populates="template", cascade="all, delete-orphan")
+    items = relationship("TemplateItem", back_populates="template", cascade="all, delete-orphan", passive_deletes=True)
+    triggers = relationship("Trigger", back_populates="template", cascade="all, delete-orphan", passive_deletes=True)
     host_groups = relationship("HostGroup", secondary=template_hostgroup, back_populates="templates")
     
     # Self-referential for inheritance
@@ -173,7 +243,7 @@ class TemplateItem(Base):
     __tablename__ = "template_items"
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
-    template_id = Column(GUID(), ForeignKey('templates.id'), nullable=False)
+    template_id = Column(GUID(), ForeignKey('templates.id', ondelete='CASCADE'), nullable=False)
     name = Column(String(255), nullable=False)
     key = Column(String(255), nullable=False)  # e.g., "system.cpu.load[avg1]"
     value_type = Column(String(50), default="numeric")  # numeric, text, log
@@ -191,7 +261,7 @@ class Trigger(Base):
     __tablename__ = "triggers"
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
-    template_id = Column(GUID(), ForeignKey('templates.id'), nullable=True)  # Can be standalone
+    template_id = Column(GUID(), ForeignKey('templates.id', ondelete='CASCADE'), nullable=True)  # Can be standalone
     name = Column(String(255), nullable=False)
     expression = Column(Text, nullable=False)  # e.g., "{host:cpu.load.avg(5m)}>80"
     severity = Column(String(50), nullable=False, default="average")  # disaster, high, average, warning, info
@@ -225,7 +295,7 @@ class Trigger(Base):
 
     # Relationships
     template = relationship("Template", back_populates="triggers")
-    alert_events = relationship("AlertEvent", back_populates="trigger", cascade="all, delete-orphan")
+    alert_events = relationship("AlertEvent", back_populates="trigger", cascade="all, delete-orphan", passive_deletes=True)
     parent_trigger = relationship("Trigger", remote_side=[id], backref="dependent_triggers")
 
 
@@ -234,7 +304,7 @@ class AlertEvent(Base):
     __tablename__ = "alert_events"
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
-    trigger_id = Column(GUID(), ForeignKey('triggers.id'), nullable=False)
+    trigger_id = Column(GUID(), ForeignKey('triggers.id', ondelete='CASCADE'), nullable=False)
     device_id = Column(GUID(), ForeignKey('devices.id'), nullable=True)
     status = Column(String(20), nullable=False)  # PROBLEM, OK
     value = Column(DECIMAL(10, 2))  # The metric value that triggered this
@@ -267,7 +337,7 @@ class ActionOperation(Base):
     __tablename__ = "action_operations"
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
-    action_id = Column(GUID(), ForeignKey('actions.id'), nullable=False)
+    action_id = Column(GUID(), ForeignKey('actions.id', ondelete='CASCADE'), nullable=False)
     step_number = Column(Integer, nullable=False, default=1)
     operation_type = Column(String(50), nullable=False)  # send_email, send_telegram, run_script
     parameters = Column(Text)  # JSON encoded parameters
@@ -349,7 +419,7 @@ class DiscoveryJob(Base):
     # Relationships
     creator = relationship("User", foreign_keys=[created_by])
     auto_add_hostgroup = relationship("HostGroup", foreign_keys=[auto_add_hostgroup_id])
-    results = relationship("DiscoveryResult", back_populates="job", cascade="all, delete-orphan")
+    results = relationship("DiscoveryResult", back_populates="job", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class DiscoveryResult(Base):
@@ -357,7 +427,7 @@ class DiscoveryResult(Base):
     __tablename__ = "discovery_results"
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
-    job_id = Column(GUID(), ForeignKey('discovery_jobs.id'), nullable=False)
+    job_id = Column(GUID(), ForeignKey('discovery_jobs.id', ondelete='CASCADE'), nullable=False)
     
     # Discovered host info
     ip_address = Column(String(45), nullable=False)  # IPv4 or IPv6
@@ -416,7 +486,7 @@ class CommandTemplate(Base):
     
     # Relationships
     creator = relationship("User", foreign_keys=[created_by])
-    executions = relationship("CommandExecution", back_populates="template", cascade="all, delete-orphan")
+    executions = relationship("CommandExecution", back_populates="template", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class CommandExecution(Base):
@@ -424,7 +494,7 @@ class CommandExecution(Base):
     __tablename__ = "command_executions"
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
-    template_id = Column(GUID(), ForeignKey('command_templates.id'), nullable=True)
+    template_id = Column(GUID(), ForeignKey('command_templates.id', ondelete='CASCADE'), nullable=True)
     device_id = Column(GUID(), ForeignKey('devices.id'), nullable=False)
     
     # Execution details
@@ -517,8 +587,8 @@ class NetworkMap(Base):
     
     # Relationships
     creator = relationship("User", foreign_keys=[created_by])
-    elements = relationship("MapElement", back_populates="map", cascade="all, delete-orphan")
-    links = relationship("MapLink", back_populates="map", cascade="all, delete-orphan")
+    elements = relationship("MapElement", back_populates="map", cascade="all, delete-orphan", passive_deletes=True)
+    links = relationship("MapLink", back_populates="map", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class MapElement(Base):
@@ -526,7 +596,7 @@ class MapElement(Base):
     __tablename__ = "map_elements"
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
-    map_id = Column(GUID(), ForeignKey('network_maps.id'), nullable=False)
+    map_id = Column(GUID(), ForeignKey('network_maps.id', ondelete='CASCADE'), nullable=False)
     
     # Content
     element_type = Column(String(50))  # device, hostgroup, label, shape
@@ -557,7 +627,7 @@ class MapLink(Base):
     __tablename__ = "map_links"
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
-    map_id = Column(GUID(), ForeignKey('network_maps.id'), nullable=False)
+    map_id = Column(GUID(), ForeignKey('network_maps.id', ondelete='CASCADE'), nullable=False)
     
     # Connection
     source_element_id = Column(GUID(), ForeignKey('map_elements.id'), nullable=False)
@@ -4,11 +4,12 @@ import logging
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from config import settings
-from db.models import Base, engine
 from api import auth, devices, hostgroups, templates, triggers, actions, users, alerts, maintenance, discovery, commands, maps
 import os
 
+from services.alerting import TriggerEvaluator
 from workers.alerting_worker import alerting_loop
 
 logger = logging.getLogger(__name__)
@@ -24,17 +25,32 @@ if settings.DEVICE_REGISTRATION_MODE == "token" and settings.DEVICE_REGISTRATION
         "(or set DEVICE_REGISTRATION_REQUIRE_TOKEN=false for local dev)."
     )
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+
+def run_migrations() -> None:
+    """Upgrade the database schema to the latest Alembic revision."""
+    from alembic import command
+    from alembic.config import Config
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    cfg = Config(os.path.join(base_dir, "alembic.ini"))
+    cfg.set_main_option("script_location", os.path.join(base_dir, "migrations"))
+    # Keep the application's logging configuration intact
+    cfg.attributes["configure_logger"] = False
+    command.upgrade(cfg, "head")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan with background workers."""
+    if settings.DB_AUTO_MIGRATE:
+        logger.info("Applying database migrations...")
+        await asyncio.to_thread(run_migrations)
+
     logger.info("Starting background alerting worker...")
     
     # Start alerting worker as background task
-    task = asyncio.create_task(alerting_loop())
+    evaluator = TriggerEvaluator()
+    task = asyncio.create_task(alerting_loop(evaluator))
     
     yield  # Application runs here
     
@@ -45,6 +61,7 @@ async def lifespan(app: FastAPI):
         await task
     except asyncio.CancelledError:
         pass
+    await evaluator.aclose()
 
 
 # FastAPI app
@@ -52,7 +69,8 @@ app = FastAPI(
     title=settings.APP_NAME,
     debug=settings.DEBUG,
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
@@ -80,12 +98,12 @@ app.include_router(maps.router, prefix=settings.API_V1_PREFIX)
 
 
 @app.get("/")
-def root():
+async def root():
     return {"message": "Health Monitor API", "version": "1.0.0"}
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     return {"status": "healthy"}
 
 
@@ -0,0 +1,443 @@
+"""initial schema
+
+Baseline for databases previously bootstrapped with ``Base.metadata.create_all``
+and/or ``config/postgres/init.sql``: each table is only created when missing.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-14 04:03:57.276937
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from db.models import GUID
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'actions' not in existing:
+        op.create_table('actions',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('action_type', sa.String(length=50), nullable=False),
+        sa.Column('conditions', sa.Text(), nullable=True),
+        sa.Column('enabled', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_actions_name'), 'actions', ['name'], unique=False)
+
+    if 'alerts' not in existing:
+        op.create_table('alerts',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('device_id', GUID(), nullable=True),
+        sa.Column('metric', sa.String(length=100), nullable=False),
+        sa.Column('value', sa.DECIMAL(precision=10, scale=2), nullable=True),
+        sa.Column('threshold', sa.DECIMAL(precision=10, scale=2), nullable=True),
+        sa.Column('severity', sa.String(length=20), nullable=False),
+        sa.Column('message', sa.String(), nullable=True),
+        sa.Column('acknowledged', sa.Boolean(), nullable=True),
+        sa.Column('acknowledged_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('acknowledged_by', GUID(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'devices' not in existing:
+        op.create_table('devices',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('hostname', sa.String(length=255), nullable=False),
+        sa.Column('ip', sa.String(length=45), nullable=False),
+        sa.Column('os', sa.String(length=255), nullable=True),
+        sa.Column('token_hash', sa.String(length=255), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('last_seen', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('token_hash')
+        )
+
+    if 'host_groups' not in existing:
+        op.create_table('host_groups',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_host_groups_name'), 'host_groups', ['name'], unique=True)
+
+    if 'refresh_tokens' not in existing:
+        op.create_table('refresh_tokens',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('user_id', GUID(), nullable=False),
+        sa.Column('token_hash', sa.String(length=255), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('revoked', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('token_hash')
+        )
+
+    if 'templates' not in existing:
+        op.create_table('templates',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('template_type', sa.String(length=50), nullable=True),
+        sa.Column('parent_template_id', GUID(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['parent_template_id'], ['templates.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_templates_name'), 'templates', ['name'], unique=True)
+
+    if 'users' not in existing:
+        op.create_table('users',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('username', sa.String(length=255), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('role', sa.String(length=50), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+
+    if 'action_operations' not in existing:
+        op.create_table('action_operations',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('action_id', GUID(), nullable=False),
+        sa.Column('step_number', sa.Integer(), nullable=False),
+        sa.Column('operation_type', sa.String(length=50), nullable=False),
+        sa.Column('parameters', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['action_id'], ['actions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'command_templates' not in existing:
+        op.create_table('command_templates',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('command', sa.Text(), nullable=False),
+        sa.Column('command_type', sa.String(length=50), nullable=True),
+        sa.Column('requires_approval', sa.Boolean(), nullable=True),
+        sa.Column('allowed_roles', sa.String(length=255), nullable=True),
+        sa.Column('max_execution_time', sa.Integer(), nullable=True),
+        sa.Column('parameters', sa.Text(), nullable=True),
+        sa.Column('allowed_hostgroups', sa.Text(), nullable=True),
+        sa.Column('created_by', GUID(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+        )
+
+    if 'device_hostgroup' not in existing:
+        op.create_table('device_hostgroup',
+        sa.Column('device_id', GUID(), nullable=False),
+        sa.Column('hostgroup_id', GUID(), nullable=False),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id'], ),
+        sa.ForeignKeyConstraint(['hostgroup_id'], ['host_groups.id'], ),
+        sa.PrimaryKeyConstraint('device_id', 'hostgroup_id')
+        )
+
+    if 'device_template' not in existing:
+        op.create_table('device_template',
+        sa.Column('device_id', GUID(), nullable=False),
+        sa.Column('template_id', GUID(), nullable=False),
+        sa.Column('priority', sa.Integer(), nullable=True),
+        sa.Column('assigned_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id'], ),
+        sa.ForeignKeyConstraint(['template_id'], ['templates.id'], ),
+        sa.PrimaryKeyConstraint('device_id', 'template_id')
+        )
+
+    if 'discovery_jobs' not in existing:
+        op.create_table('discovery_jobs',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('ip_ranges', sa.Text(), nullable=False),
+        sa.Column('scan_icmp', sa.Boolean(), nullable=True),
+        sa.Column('scan_snmp', sa.Boolean(), nullable=True),
+        sa.Column('snmp_community', sa.String(length=255), nullable=True),
+        sa.Column('snmp_version', sa.String(length=10), nullable=True),
+        sa.Column('scan_ports', sa.String(length=255), nullable=True),
+        sa.Column('schedule_type', sa.String(length=20), nullable=True),
+        sa.Column('schedule_cron', sa.String(length=100), nullable=True),
+        sa.Column('next_run_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('progress_percent', sa.Integer(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('auto_add_devices', sa.Boolean(), nullable=True),
+        sa.Column('auto_add_hostgroup_id', GUID(), nullable=True),
+        sa.Column('created_by', GUID(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['auto_add_hostgroup_id'], ['host_groups.id'], ),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'maintenance_windows' not in existing:
+        op.create_table('maintenance_windows',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('start_time', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('end_time', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('recurrence', sa.String(length=100), nullable=True),
+        sa.Column('scope_type', sa.String(length=50), nullable=False),
+        sa.Column('device_id', GUID(), nullable=True),
+        sa.Column('hostgroup_id', GUID(), nullable=True),
+        sa.Column('collect_data', sa.Boolean(), nullable=True),
+        sa.Column('active', sa.Boolean(), nullable=True),
+        sa.Column('created_by', GUID(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id'], ),
+        sa.ForeignKeyConstraint(['hostgroup_id'], ['host_groups.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_maintenance_windows_name'), 'maintenance_windows', ['name'], unique=False)
+
+    if 'network_maps' not in existing:
+        op.create_table('network_maps',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('background_image', sa.Text(), nullable=True),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('created_by', GUID(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'template_hostgroup' not in existing:
+        op.create_table('template_hostgroup',
+        sa.Column('template_id', GUID(), nullable=False),
+        sa.Column('hostgroup_id', GUID(), nullable=False),
+        sa.ForeignKeyConstraint(['hostgroup_id'], ['host_groups.id'], ),
+        sa.ForeignKeyConstraint(['template_id'], ['templates.id'], ),
+        sa.PrimaryKeyConstraint('template_id', 'hostgroup_id')
+        )
+
+    if 'template_items' not in existing:
+        op.create_table('template_items',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('template_id', GUID(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('value_type', sa.String(length=50), nullable=True),
+        sa.Column('units', sa.String(length=50), nullable=True),
+        sa.Column('update_interval', sa.Integer(), nullable=True),
+        sa.Column('enabled', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['template_id'], ['templates.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'triggers' not in existing:
+        op.create_table('triggers',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('template_id', GUID(), nullable=True),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('expression', sa.Text(), nullable=False),
+        sa.Column('severity', sa.String(length=50), nullable=False),
+        sa.Column('enabled', sa.Boolean(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('expression_type', sa.String(length=20), nullable=True),
+        sa.Column('compound_expression', sa.Text(), nullable=True),
+        sa.Column('time_window', sa.Integer(), nullable=True),
+        sa.Column('time_function', sa.String(length=50), nullable=True),
+        sa.Column('duration', sa.Integer(), nullable=True),
+        sa.Column('recovery_expression', sa.Text(), nullable=True),
+        sa.Column('parent_trigger_id', GUID(), nullable=True),
+        sa.Column('last_evaluated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_state', sa.String(length=20), nullable=True),
+        sa.Column('state_since', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['parent_trigger_id'], ['triggers.id'], ),
+        sa.ForeignKeyConstraint(['template_id'], ['templates.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'alert_events' not in existing:
+        op.create_table('alert_events',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('trigger_id', GUID(), nullable=False),
+        sa.Column('device_id', GUID(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('value', sa.DECIMAL(precision=10, scale=2), nullable=True),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('acknowledged', sa.Boolean(), nullable=True),
+        sa.Column('acknowledged_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('acknowledged_by', GUID(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id'], ),
+        sa.ForeignKeyConstraint(['trigger_id'], ['triggers.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'discovery_results' not in existing:
+        op.create_table('discovery_results',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('job_id', GUID(), nullable=False),
+        sa.Column('ip_address', sa.String(length=45), nullable=False),
+        sa.Column('hostname', sa.String(length=255), nullable=True),
+        sa.Column('mac_address', sa.String(length=17), nullable=True),
+        sa.Column('icmp_reachable', sa.Boolean(), nullable=True),
+        sa.Column('icmp_latency_ms', sa.Integer(), nullable=True),
+        sa.Column('snmp_reachable', sa.Boolean(), nullable=True),
+        sa.Column('snmp_sysname', sa.String(length=255), nullable=True),
+        sa.Column('snmp_sysdescr', sa.Text(), nullable=True),
+        sa.Column('snmp_sysobjectid', sa.String(length=255), nullable=True),
+        sa.Column('open_ports', sa.String(length=500), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('device_id', GUID(), nullable=True),
+        sa.Column('discovered_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id'], ),
+        sa.ForeignKeyConstraint(['job_id'], ['discovery_jobs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'map_elements' not in existing:
+        op.create_table('map_elements',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('map_id', GUID(), nullable=False),
+        sa.Column('element_type', sa.String(length=50), nullable=True),
+        sa.Column('device_id', GUID(), nullable=True),
+        sa.Column('hostgroup_id', GUID(), nullable=True),
+        sa.Column('label', sa.String(length=255), nullable=True),
+        sa.Column('icon', sa.String(length=100), nullable=True),
+        sa.Column('x', sa.Integer(), nullable=False),
+        sa.Column('y', sa.Integer(), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('data', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id'], ),
+        sa.ForeignKeyConstraint(['hostgroup_id'], ['host_groups.id'], ),
+        sa.ForeignKeyConstraint(['map_id'], ['network_maps.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'remediation_rules' not in existing:
+        op.create_table('remediation_rules',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('trigger_id', GUID(), nullable=False),
+        sa.Column('command_template_id', GUID(), nullable=False),
+        sa.Column('enabled', sa.Boolean(), nullable=True),
+        sa.Column('auto_approve', sa.Boolean(), nullable=True),
+        sa.Column('max_executions_per_hour', sa.Integer(), nullable=True),
+        sa.Column('cooldown_minutes', sa.Integer(), nullable=True),
+        sa.Column('last_executed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('execution_count_hour', sa.Integer(), nullable=True),
+        sa.Column('created_by', GUID(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['command_template_id'], ['command_templates.id'], ),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['trigger_id'], ['triggers.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'command_executions' not in existing:
+        op.create_table('command_executions',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('template_id', GUID(), nullable=True),
+        sa.Column('device_id', GUID(), nullable=False),
+        sa.Column('command', sa.Text(), nullable=False),
+        sa.Column('parameters', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('queued_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('exit_code', sa.Integer(), nullable=True),
+        sa.Column('stdout', sa.Text(), nullable=True),
+        sa.Column('stderr', sa.Text(), nullable=True),
+        sa.Column('approved_by', GUID(), nullable=True),
+        sa.Column('approved_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('rejection_reason', sa.Text(), nullable=True),
+        sa.Column('source', sa.String(length=50), nullable=True),
+        sa.Column('remediation_rule_id', GUID(), nullable=True),
+        sa.Column('requested_by', GUID(), nullable=True),
+        sa.ForeignKeyConstraint(['approved_by'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id'], ),
+        sa.ForeignKeyConstraint(['remediation_rule_id'], ['remediation_rules.id'], ),
+        sa.ForeignKeyConstraint(['requested_by'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['template_id'], ['command_templates.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'map_links' not in existing:
+        op.create_table('map_links',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('map_id', GUID(), nullable=False),
+        sa.Column('source_element_id', GUID(), nullable=False),
+        sa.Column('target_element_id', GUID(), nullable=False),
+        sa.Column('link_type', sa.String(length=50), nullable=True),
+        sa.Column('color', sa.String(length=20), nullable=True),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('label', sa.String(length=255), nullable=True),
+        sa.ForeignKeyConstraint(['map_id'], ['network_maps.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['source_element_id'], ['map_elements.id'], ),
+        sa.ForeignKeyConstraint(['target_element_id'], ['map_elements.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('map_links')
+    op.drop_table('command_executions')
+    op.drop_table('remediation_rules')
+    op.drop_table('map_elements')
+    op.drop_table('discovery_results')
+    op.drop_table('alert_events')
+    op.drop_table('triggers')
+    op.drop_table('template_items')
+    op.drop_table('template_hostgroup')
+    op.drop_table('network_maps')
+    op.drop_index(op.f('ix_maintenance_windows_name'), table_name='maintenance_windows')
+    op.drop_table('maintenance_windows')
+    op.drop_table('discovery_jobs')
+    op.drop_table('device_template')
+    op.drop_table('device_hostgroup')
+    op.drop_table('command_templates')
+    op.drop_table('action_operations')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_templates_name'), table_name='templates')
+    op.drop_table('templates')
+    op.drop_table('refresh_tokens')
+    op.drop_index(op.f('ix_host_groups_name'), table_name='host_groups')
+    op.drop_table('host_groups')
+    op.drop_table('devices')
+    op.drop_table('alerts')
+    op.drop_index(op.f('ix_actions_name'), table_name='actions')
+    op.drop_table('actions')
@@ -0,0 +1,29 @@
+"""refresh token active index
+
+Composite index on refresh_tokens(revoked, expires_at). ``if_not_exists``
+keeps this safe on databases bootstrapped from ``config/postgres/init.sql``,
+which creates the same index.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-14 04:14:26.058201
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_refresh_tokens_revoked_expires_at', 'refresh_tokens', ['revoked', 'expires_at'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_refresh_tokens_revoked_expires_at', table_name='refresh_tokens')
@@ -0,0 +1,69 @@
+"""cascade child foreign keys
+
+Recreates the foreign keys behind the models' ``passive_deletes``
+relationships with ON DELETE CASCADE. Databases bootstrapped with
+``create_all`` before those keys declared ``ondelete`` still have plain
+foreign keys (0001 leaves existing tables alone), so deleting a parent
+would fail on PostgreSQL or orphan its children on SQLite. Keys that
+already cascade are left untouched.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-14 09:12:41.530117
+
+"""
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (child table, foreign key column, parent table)
+CASCADE_KEYS = [
+    ('template_items', 'template_id', 'templates'),
+    ('triggers', 'template_id', 'templates'),
+    ('alert_events', 'trigger_id', 'triggers'),
+    ('action_operations', 'action_id', 'actions'),
+    ('discovery_results', 'job_id', 'discovery_jobs'),
+    ('command_executions', 'template_id', 'command_templates'),
+    ('map_elements', 'map_id', 'network_maps'),
+    ('map_links', 'map_id', 'network_maps'),
+]
+
+# SQLite reflects create_all's foreign keys without names; batch mode needs one to drop them
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def _set_ondelete(ondelete: Optional[str]) -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table, column, parent in CASCADE_KEYS:
+        fk = next(
+            (
+                fk for fk in inspector.get_foreign_keys(table)
+                if fk['constrained_columns'] == [column] and fk['referred_table'] == parent
+            ),
+            None,
+        )
+        if fk is None or (fk['options'].get('ondelete') or '').upper() == (ondelete or ''):
+            continue
+
+        name = fk['name'] or NAMING_CONVENTION['fk'] % {
+            'table_name': table, 'column_0_name': column, 'referred_table_name': parent,
+        }
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(name, parent, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    _set_ondelete('CASCADE')
+
+
+def downgrade() -> None:
+    _set_ondelete(None)
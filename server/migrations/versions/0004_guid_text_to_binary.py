@@ -0,0 +1,63 @@
+"""guid text to binary
+
+GUID columns outside PostgreSQL used to hold 36-character UUID strings
+in CHAR(36); they now hold the UUID's 16 raw bytes. Databases created
+before the switch still have the text values, which no longer match the
+bytes the models bind, so lookups by id miss. This rewrites every value
+in the old CHAR(36) columns as bytes. SQLite keeps whatever storage
+class is written, so the declared column type can stay. PostgreSQL's
+native UUID columns are untouched.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-14 11:02:17.904385
+
+"""
+import uuid
+from typing import Callable, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _convert(stored_type: type, to_stored: Callable) -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        return
+    if bind.dialect.name == 'sqlite':
+        # Parents and children are rewritten one column at a time
+        op.execute('PRAGMA defer_foreign_keys = ON')
+
+    inspector = sa.inspect(bind)
+    for table in inspector.get_table_names():
+        for column in inspector.get_columns(table):
+            if not (isinstance(column['type'], sa.CHAR) and column['type'].length == 36):
+                continue
+            # Untyped, so values pass through as stored
+            col = sa.column(column['name'])
+            tbl = sa.table(table, col)
+            values = bind.execute(sa.select(col).where(col.is_not(None)).distinct()).scalars()
+            params = [
+                {'old': value, 'new': to_stored(value)}
+                for value in values if isinstance(value, stored_type)
+            ]
+            if params:
+                bind.execute(
+                    tbl.update().where(col == sa.bindparam('old')).values({col.name: sa.bindparam('new')}),
+                    params,
+                )
+
+
+def upgrade() -> None:
+    _convert(str, lambda value: uuid.UUID(value).bytes)
+
+
+def downgrade() -> None:
+    _convert(bytes, lambda value: str(uuid.UUID(bytes=value)))
@@ -1,10 +1,15 @@
 """Alerting service - Trigger evaluation and alert event creation."""
 import os
 import re
+import asyncio
+import time
 import logging
+import operator
 from decimal import Decimal
-from typing import Optional, Dict
+from functools import lru_cache
+from typing import Callable, Optional, Dict, Iterable, List, Set, Tuple
 import httpx
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from db.models import Trigger, AlertEvent, Device
@@ -13,6 +18,47 @@ from services.maintenance import maintenance_service
 logger = logging.getLogger(__name__)
 
 VM_URL = os.getenv("VM_URL", "http://localhost:9090")
+TRIGGER_CACHE_TTL = float(os.getenv("TRIGGER_CACHE_TTL", "30"))
+
+METRIC_RE = re.compile(r'^([a-zA-Z_][a-zA-Z0-9_]*)')
+THRESHOLD_RE = re.compile(r'([><=]+)\s*([\d.]+)\s*$')
+
+THRESHOLD_OPS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+}
+
+# Built once so every reload reuses the same cached compiled statement
+_ENABLED_TRIGGERS = select(Trigger).where(Trigger.enabled == True)
+
+# Bumped whenever triggers are modified so evaluators drop their cached list
+_trigger_generation = 0
+
+
+def invalidate_trigger_cache() -> None:
+    """Force evaluators to reload triggers on their next cycle."""
+    global _trigger_generation
+    _trigger_generation += 1
+
+
+# Bounded so edited or deleted expressions don't accumulate in the long-lived worker
+@lru_cache(maxsize=4096)
+def compile_threshold(expression: str) -> Callable[[float], str]:
+    """Build a value -> state function for a threshold expression."""
+    match = THRESHOLD_RE.search(expression)
+    if not match:
+        # Fallback: any non-zero value is PROBLEM
+        logger.warning(f"Could not parse threshold from expression: {expression}")
+        return lambda v: "PROBLEM" if v > 0 else "OK"
+
+    cmp = THRESHOLD_OPS.get(match.group(1))
+    if cmp is None:
+        return lambda v: "OK"
+    threshold = float(match.group(2))
+    return lambda v: "PROBLEM" if cmp(v, threshold) else "OK"
 
 
 class TriggerEvaluator:
@@ -21,78 +67,128 @@ class TriggerEvaluator:
     def __init__(self, vm_url: str = VM_URL):
         self.vm_url = vm_url
         self.trigger_states: Dict[str, str] = {}  # trigger_id -> "OK" | "PROBLEM"
+        # (loaded_at, generation, triggers) for the enabled-trigger list
+        self._triggers_cache: Optional[Tuple[float, int, List[Trigger]]] = None
+        # Shared client so keep-alive connections are reused across evaluations
+        self._client = httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        )
 
-    async def query_vm(self, expression: str) -> Optional[float]:
-        """Query VictoriaMetrics for a metric value."""
-        # Extract just the metric name (before comparison operator)
-        metric_match = re.match(r'^([a-zA-Z_][a-zA-Z0-9_]*)', expression)
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client."""
+        await self._client.aclose()
+
+    @staticmethod
+    def extract_metric(expression: str) -> Optional[str]:
+        """Extract the metric name (before comparison operator) from an expression."""
+        metric_match = METRIC_RE.match(expression)
         if not metric_match:
             logger.warning(f"Could not extract metric from expression: {expression}")
             return None
+        return metric_match.group(1)
 
-        metric_name = metric_match.group(1)
+    async def query_vm(self, expression: str) -> Optional[float]:
+        """Query VictoriaMetrics for a metric value."""
+        metric_name = self.extract_metric(expression)
+        if metric_name is None:
+            return None
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{self.vm_url}/api/v1/query",
-                    params={"query": metric_name}
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                if data.get("status") == "success":
-                    results = data.get("data", {}).get("result", [])
-                    if results:
-                        # Return the first result's value
-                        value_pair = results[0].get("value", [])
-                        if len(value_pair) >= 2:
-                            return float(value_pair[1])
-                return None
+            response = await self._client.get(
+                f"{self.vm_url}/api/v1/query",
+                params={"query": metric_name}
+            )
+            response.raise_for_status()
+            data = response.json()
+
+            if data.get("status") == "success":
+                results = data.get("data", {}).get("result", [])
+                if results:
+                    # Return the first result's value
+                    value_pair = results[0].get("value", [])
+                    if len(value_pair) >= 2:
+                        return float(value_pair[1])
+            return None
         except Exception as e:
             logger.error(f"Failed to query VictoriaMetrics: {e}")
             return None
 
+    async def query_vm_batch(self, metric_names: Iterable[str]) -> Dict[str, float]:
+        """Fetch the current value of several metrics with a single query.
+
+        Returns a mapping of metric name -> first series value; metrics with
+        no data are absent from the result.
+        """
+        names = sorted(set(metric_names))
+        if not names:
+            return {}
+
+        selector = '{__name__=~"%s"}' % "|".join(names)
+        try:
+            response = await self._client.post(
+                f"{self.vm_url}/api/v1/query",
+                data={"query": selector}
+            )
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            logger.error(f"Failed to query VictoriaMetrics: {e}")
+            return {}
+
+        values: Dict[str, float] = {}
+        if data.get("status") == "success":
+            for result in data.get("data", {}).get("result", []):
+                name = result.get("metric", {}).get("__name__")
+                value_pair = result.get("value", [])
+                # Keep the first series per metric, matching query_vm
+                if name and name not in values and len(value_pair) >= 2:
+                    values[name] = float(value_pair[1])
+        return values
+
+    compile_threshold = staticmethod(compile_threshold)
+
     def parse_threshold(self, expression: str, value: float) -> str:
         """Parse threshold from expression and determine state.
         
         Supports: >, <, >=, <=, ==
         Examples: "cpu_percent > 90", "memory_usage >= 80", "disk_free < 10"
         """
-        match = re.search(r'([><=]+)\s*([\d.]+)\s*$', expression)
-        if match:
-            op, threshold = match.group(1), float(match.group(2))
-            if op == '>' and value > threshold:
-                return "PROBLEM"
-            elif op == '>=' and value >= threshold:
-                return "PROBLEM"
-            elif op == '<' and value < threshold:
-                return "PROBLEM"
-            elif op == '<=' and value <= threshold:
-                return "PROBLEM"
-            elif op == '==' and value == threshold:
-                return "PROBLEM"
-        else:
-            # Fallback: any non-zero value is PROBLEM
-            logger.warning(f"Could not parse threshold from expression: {expression}")
-            return "PROBLEM" if value > 0 else "OK"
-        return "OK"
-
-    async def evaluate_trigger(self, db: Session, trigger: Trigger, device_id: Optional[str] = None) -> Optional[AlertEvent]:
+        return compile_threshold(expression)(value)
+
+    async def evaluate_trigger(
+        self,
+        db: Session,
+        trigger: Trigger,
+        device_id: Optional[str] = None,
+        value: Optional[float] = None,
+        commit: bool = True,
+        suppressed: Optional[Set[str]] = None,
+    ) -> Optional[AlertEvent]:
         """Evaluate a single trigger against VictoriaMetrics.
         
         Args:
             db: Database session
             trigger: Trigger to evaluate
             device_id: Optional device ID for device-specific triggers
+            value: Pre-fetched metric value; queried from VictoriaMetrics if omitted
+            commit: Persist the event immediately; when False the caller adds
+                and commits the returned event
+            suppressed: Device IDs in maintenance, from
+                maintenance_service.get_suppressed_devices(); callers evaluating
+                many devices fetch it once instead of checking each device
         """
         # Check if device is in maintenance (suppress alerts if so)
-        if device_id and maintenance_service.is_device_in_maintenance(device_id, db):
+        if device_id and (
+            str(device_id) in suppressed if suppressed is not None
+            else maintenance_service.is_device_in_maintenance(device_id, db)
+        ):
             logger.debug(f"Suppressing trigger '{trigger.name}' evaluation - device {device_id} in maintenance")
             return None
         
         # Query VictoriaMetrics
-        value = await self.query_vm(trigger.expression)
+        if value is None:
+            value = await self.query_vm(trigger.expression)
 
         if value is None:
             return None
@@ -113,26 +209,73 @@ class TriggerEvaluator:
                 value=Decimal(str(value)),
                 message=f"Trigger '{trigger.name}' changed to {new_state}. Value: {value}"
             )
-            db.add(event)
-            db.commit()
-            db.refresh(event)
+            if commit:
+                db.add(event)
+                db.commit()
+                db.refresh(event)
             
             logger.info(f"Trigger {trigger.name} state changed: {old_state} -> {new_state}")
             return event
 
         return None
 
+    def get_enabled_triggers(self, db: Session) -> List[Trigger]:
+        """Return enabled triggers, reloading at most every TRIGGER_CACHE_TTL seconds."""
+        now = time.monotonic()
+        cached = self._triggers_cache
+        if cached and cached[1] == _trigger_generation and now - cached[0] < TRIGGER_CACHE_TTL:
+            return cached[2]
+
+        generation = _trigger_generation
+        triggers = db.execute(_ENABLED_TRIGGERS).scalars().all()
+        # Detach so later commits in this session don't expire the cached rows
+        for trigger in triggers:
+            db.expunge(trigger)
+        self._triggers_cache = (now, generation, triggers)
+        return triggers
+
+    @staticmethod
+    def _store_events(db: Session, events: List[AlertEvent]) -> None:
+        """Persist a cycle's events in one transaction."""
+        try:
+            db.add_all(events)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
     async def evaluate_all_triggers(self, db: Session) -> list[AlertEvent]:
-        """Evaluate all enabled triggers."""
-        triggers = db.query(Trigger).filter(Trigger.enabled == True).all()
+        """Evaluate all enabled triggers.
+
+        Blocking session work runs in a worker thread so the event loop
+        keeps serving requests while the database responds.
+        """
+        triggers = await asyncio.to_thread(self.get_enabled_triggers, db)
         events = []
 
+        # One VictoriaMetrics round-trip for every metric referenced by the triggers
+        metrics = {t.id: self.extract_metric(t.expression) for t in triggers}
+        values = await self.query_vm_batch(m for m in metrics.values() if m)
+        previous_states = dict(self.trigger_states)
+
         for trigger in triggers:
+            value = values.get(metrics[trigger.id])
+            if value is None:
+                continue
             try:
-                event = await self.evaluate_trigger(db, trigger)
+                event = await self.evaluate_trigger(db, trigger, value=value, commit=False)
                 if event:
                     events.append(event)
             except Exception as e:
                 logger.error(f"Error evaluating trigger {trigger.id}: {e}")
 
+        if events:
+            try:
+                await asyncio.to_thread(self._store_events, db, events)
+            except Exception as e:
+                # Re-detect these transitions on the next cycle
+                self.trigger_states = previous_states
+                logger.error(f"Failed to store {len(events)} alert events: {e}")
+                return []
+
         return events
@@ -1,15 +1,27 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
 import bcrypt
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 from uuid import UUID
+import hashlib
 import secrets
+import time
 
 from config import settings
 from db.models import User, RefreshToken
 
+# Hot-path lookups built once so each call reuses the cached compiled statement
+_USER_BY_NAME = select(User).where(User.username == bindparam("username")).limit(1)
+_ACTIVE_REFRESH_TOKEN = select(RefreshToken).where(
+    RefreshToken.token_hash == bindparam("token_hash"),
+    RefreshToken.revoked == False,
+).limit(1)
+_VALID_REFRESH_TOKEN = _ACTIVE_REFRESH_TOKEN.where(RefreshToken.expires_at > bindparam("now"))
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -26,33 +38,72 @@ def get_password_hash(password: str) -> str:
     return hashed.decode("utf-8")
 
 
+@lru_cache(maxsize=4)
+def _jwt_key(secret: str, algorithm: str) -> jwk.Key:
+    """Build the JWT signing key once instead of on every encode/decode."""
+    return jwk.construct(secret, algorithm)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
 
+    # Epoch seconds straight from the clock; no datetime round-trips
+    now = int(time.time())
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + int(expires_delta.total_seconds())
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = now + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
 
     # Include iat/jti so tokens minted in the same second are still unique
     to_encode.update(
         {
             "exp": expire,
-            "iat": int(datetime.utcnow().timestamp()),
+            "iat": now,
             "jti": secrets.token_urlsafe(16),
             "type": "access",
         }
     )
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _jwt_key(settings.SECRET_KEY, settings.ALGORITHM), algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
+def _sha256_token(token: str) -> str:
+    """Digest a random token for storage.
+
+    Issued tokens carry 256 bits of entropy, so a fast digest is as strong as
+    bcrypt here and allows an indexed equality lookup.
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def hash_refresh_token(token: str) -> str:
+    """Digest a refresh token for storage."""
+    return _sha256_token(token)
+
+
+def hash_device_token(token: str) -> str:
+    """Digest a device token for storage."""
+    return _sha256_token(token)
+
+
+def is_legacy_token_hash(token_hash: str) -> bool:
+    """Return True for token hashes stored with bcrypt before the digest scheme."""
+    return token_hash.startswith("$2")
+
+
+def verify_device_token(token: str, token_hash: str) -> bool:
+    """Check a device token against its stored digest (or legacy bcrypt hash)."""
+    if is_legacy_token_hash(token_hash):
+        return verify_password(token, token_hash)
+    return secrets.compare_digest(hash_device_token(token), token_hash)
+
+
 def create_refresh_token(user_id: UUID, db: Session) -> str:
     """Create and store refresh token"""
     # Generate random token
     token = secrets.token_urlsafe(32)
-    token_hash = get_password_hash(token)
+    token_hash = hash_refresh_token(token)
 
     # Calculate expiration
     expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
@@ -72,7 +123,7 @@ def create_refresh_token(user_id: UUID, db: Session) -> str:
 def verify_token(token: str, token_type: str = "access") -> Optional[dict]:
     """Verify and decode JWT token"""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = jwt.decode(token, _jwt_key(settings.SECRET_KEY, settings.ALGORITHM), algorithms=[settings.ALGORITHM])
 
         if payload.get("type") != token_type:
             return None
@@ -84,7 +135,7 @@ def verify_token(token: str, token_type: str = "access") -> Optional[dict]:
 
 def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     """Authenticate user with username and password"""
-    user = db.query(User).filter(User.username == username).first()
+    user = db.execute(_USER_BY_NAME, {"username": username}).scalar_one_or_none()
 
     if not user:
         return None
@@ -97,28 +148,22 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
 
 def revoke_refresh_token(db: Session, token: str) -> bool:
     """Revoke a refresh token"""
-    # Find all refresh tokens and check hash
-    tokens = db.query(RefreshToken).filter(RefreshToken.revoked == False).all()
+    db_token = db.execute(
+        _ACTIVE_REFRESH_TOKEN, {"token_hash": hash_refresh_token(token)}
+    ).scalar_one_or_none()
 
-    for db_token in tokens:
-        if verify_password(token, db_token.token_hash):
-            db_token.revoked = True
-            db.commit()
-            return True
+    if not db_token:
+        return False
 
-    return False
+    db_token.revoked = True
+    db.commit()
+    return True
 
 
 def verify_refresh_token(db: Session, token: str) -> Optional[UUID]:
     """Verify refresh token and return user_id"""
-    # Find all non-revoked, non-expired tokens
-    tokens = db.query(RefreshToken).filter(
-        RefreshToken.revoked == False,
-        RefreshToken.expires_at > datetime.utcnow(),
-    ).all()
-
-    for db_token in tokens:
-        if verify_password(token, db_token.token_hash):
-            return db_token.user_id
+    db_token = db.execute(
+        _VALID_REFRESH_TOKEN, {"token_hash": hash_refresh_token(token), "now": datetime.utcnow()}
+    ).scalar_one_or_none()
 
-    return None
+    return db_token.user_id if db_token else None
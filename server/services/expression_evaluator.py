@@ -1,17 +1,156 @@
 """Advanced expression evaluator for compound triggers."""
+import os
 import logging
-import json
 import re
 import operator
-from typing import Optional, Dict, Any, List, Tuple
+from functools import lru_cache
+from typing import Callable, Optional, Dict, Any, List, Sequence, Tuple
 from datetime import datetime, timedelta
-from decimal import Decimal
+import orjson
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
 from db.models import Trigger, Device
 
 logger = logging.getLogger(__name__)
 
+# Trigger columns written back after every evaluation
+_STATE_COLUMNS = ('last_state', 'state_since', 'last_evaluated_at')
+
+# Evaluations of an expression before it gets a generated evaluator
+TRIGGER_CODEGEN_WARMUP = int(os.getenv("TRIGGER_CODEGEN_WARMUP", "64"))
+# Expressions whose warmup is tracked at once, matching the compile caches
+EVAL_HITS_MAXSIZE = 4096
+
+# All simple expression forms in one pattern; alternatives are tried in order:
+#   Zabbix-style: {host:cpu.load.avg(5m)}>80
+#   PromQL-style: avg_over_time(cpu_load[5m]) > 80
+#   Simple:       cpu_load > 80
+_SIMPLE_EXPRESSION_RE = re.compile(
+    r'(?:\{(?P<zhost>[^:]+):(?P<zmetric>[^}]+)\}'
+    r'|(?P<pmfn>\w+_over_time)\((?P<pmarg>[^)]+)\)'
+    r'|(?P<metric>[a-zA-Z_][a-zA-Z0-9_]*))'
+    r'\s*(?P<op>[><=!]+)\s*(?P<thr>[\d.]+)'
+)
+
+
+@lru_cache(maxsize=4096)
+def _parse_simple(expression: str) -> Optional[Tuple[Optional[str], str, str, float]]:
+    """Parse an expression into (host, metric, operator, threshold); memoized per string."""
+    match = _SIMPLE_EXPRESSION_RE.match(expression.strip())
+    if not match:
+        logger.warning(f"Failed to parse expression: {expression}")
+        return None
+
+    operator_str, threshold = match.group('op'), float(match.group('thr'))
+    if match.group('metric') is not None:
+        return None, match.group('metric'), operator_str, threshold
+    if match.group('zhost') is not None:
+        host, metric = match.group('zhost', 'zmetric')
+    else:
+        host, metric = match.group('pmfn', 'pmarg')
+    return host, metric, operator_str, threshold
+
+
+# Comparison operators
+OPERATORS = {
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+    '=': operator.eq,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<>': operator.ne,
+}
+
+# (metric, operator string, resolved op function or None, threshold)
+CompoundCondition = Tuple[Any, str, Optional[Callable[[float, float], bool]], float]
+
+
+@lru_cache(maxsize=4096)
+def _parse_compound(compound_expression: str) -> Optional[Tuple[str, Tuple[CompoundCondition, ...]]]:
+    """Parse compound JSON once into (logical_op, conditions) with operators resolved."""
+    try:
+        expr = orjson.loads(compound_expression)
+    except orjson.JSONDecodeError as e:
+        logger.error(f"Invalid compound expression JSON: {e}")
+        return None
+
+    logical_op = expr.get('operator', 'and').lower()
+    conditions = []
+    for cond in expr.get('conditions', []):
+        op_str = cond.get('operator', '>')
+        conditions.append((cond.get('metric'), op_str, OPERATORS.get(op_str), float(cond.get('value', 0))))
+    return logical_op, tuple(conditions)
+
+
+# Operator symbols emitted by the trigger code generator
+_CODEGEN_OPERATORS = {
+    '>': '>', '<': '<', '>=': '>=', '<=': '<=',
+    '=': '==', '==': '==', '!=': '!=', '<>': '!=',
+}
+
+CompiledEvaluator = Callable[[Dict[str, float]], bool]
+
+
+def _codegen(name: str, terms: List[str], joiner: str, constants: Dict[str, Any]) -> CompiledEvaluator:
+    """Compile `return <term> <joiner> <term> ...` into a function of `values`.
+
+    Metric names and thresholds are bound as constants in the function's
+    namespace, never interpolated into the source, so user-supplied
+    expressions cannot inject code.
+    """
+    body = f" {joiner} ".join(terms) if terms else "False"
+    source = f"def _ev(values):\n    return {body}\n"
+    namespace = dict(constants)
+    exec(compile(source, name, "exec"), namespace)
+    return namespace["_ev"]
+
+
+@lru_cache(maxsize=4096)
+def _compile_simple_evaluator(expression: str) -> Optional[CompiledEvaluator]:
+    """Specialize a simple expression to `values['value'] <op> threshold`."""
+    parsed = _parse_simple(expression)
+    if parsed is None:
+        return None
+    _, _, operator_str, threshold = parsed
+    symbol = _CODEGEN_OPERATORS.get(operator_str)
+    if symbol is None:
+        return None
+    term = f"values['value'] {symbol} _t0"
+    return _codegen(f"<trigger {expression!r}>", [term], "and", {"_t0": threshold})
+
+
+@lru_cache(maxsize=4096)
+def _compile_compound_evaluator(compound_expression: str) -> Optional[CompiledEvaluator]:
+    """Specialize a compound (JSON) expression to a chain of inline comparisons."""
+    try:
+        parsed = _parse_compound(compound_expression)
+    except (ValueError, TypeError, AttributeError):
+        parsed = None
+    if parsed is None:
+        # Leave malformed expressions to the generic path and its error handling
+        return None
+    logical_op, conditions = parsed
+
+    if logical_op not in ('and', 'or'):
+        # Generic semantics: only the first condition counts
+        conditions = conditions[:1]
+
+    constants: Dict[str, Any] = {}
+    terms = []
+    for i, (metric, operator_str, _, threshold) in enumerate(conditions):
+        symbol = _CODEGEN_OPERATORS.get(operator_str)
+        if symbol is None:
+            terms.append("False")
+            continue
+        constants[f"_m{i}"], constants[f"_t{i}"] = metric, threshold
+        terms.append(f"((_v := values.get(_m{i})) is not None and float(_v) {symbol} _t{i})")
+
+    return _codegen("<compound trigger>", terms, "or" if logical_op == 'or' else "and", constants)
+
 
 class ExpressionEvaluator:
     """
@@ -24,16 +163,7 @@ class ExpressionEvaluator:
     """
     
     # Comparison operators
-    OPERATORS = {
-        '>': operator.gt,
-        '<': operator.lt,
-        '>=': operator.ge,
-        '<=': operator.le,
-        '=': operator.eq,
-        '==': operator.eq,
-        '!=': operator.ne,
-        '<>': operator.ne,
-    }
+    OPERATORS = OPERATORS
     
     # Time function mappings
     TIME_FUNCTIONS = {
@@ -55,6 +185,8 @@ class ExpressionEvaluator:
         """
         self.metrics_client = metrics_client
         self._state_cache = {}  # trigger_id -> (state, since_timestamp)
+        self._eval_hits: Dict[str, int] = {}  # expression -> evaluations seen
+        self._parent_states: Dict[Any, Optional[str]] = {}  # parent trigger_id -> last_state
     
     def parse_simple_expression(self, expression: str) -> Optional[Dict[str, Any]]:
         """
@@ -63,37 +195,28 @@ class ExpressionEvaluator:
         Returns:
             Dict with 'metric', 'operator', 'threshold', 'function' keys
         """
-        # Pattern: {host:metric.function(time)} operator value
-        # or: metric operator value
-        patterns = [
-            # Zabbix-style: {host:cpu.load.avg(5m)}>80
-            r'\{([^:]+):([^}]+)\}\s*([><=!]+)\s*([\d.]+)',
-            # PromQL-style: avg_over_time(cpu_load[5m]) > 80
-            r'(\w+_over_time)\(([^)]+)\)\s*([><=!]+)\s*([\d.]+)',
-            # Simple: cpu_load > 80
-            r'([a-zA-Z_][a-zA-Z0-9_]*)\s*([><=!]+)\s*([\d.]+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.match(pattern, expression.strip())
-            if match:
-                groups = match.groups()
-                if len(groups) == 4:
-                    return {
-                        'host': groups[0],
-                        'metric': groups[1],
-                        'operator': groups[2],
-                        'threshold': float(groups[3])
-                    }
-                elif len(groups) == 3:
-                    return {
-                        'metric': groups[0],
-                        'operator': groups[1],
-                        'threshold': float(groups[2])
-                    }
-        
-        logger.warning(f"Failed to parse expression: {expression}")
-        return None
+        parsed = _parse_simple(expression)
+        if parsed is None:
+            return None
+
+        host, metric, operator_str, threshold = parsed
+        result = {'metric': metric, 'operator': operator_str, 'threshold': threshold}
+        if host is not None:
+            result = {'host': host, **result}
+        return result
+
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def _compile_simple(cls, expression: str) -> Optional[Tuple[Any, float]]:
+        """Resolve an expression to (op_func, threshold) once; op_func is None if unknown."""
+        parsed = _parse_simple(expression)
+        if parsed is None:
+            return None
+        _, _, operator_str, threshold = parsed
+        op_func = cls.OPERATORS.get(operator_str)
+        if not op_func:
+            logger.error(f"Unknown operator: {operator_str}")
+        return op_func, threshold
     
     def evaluate_simple(
         self, 
@@ -106,16 +229,11 @@ class ExpressionEvaluator:
         Returns:
             Tuple of (is_problem: bool, state: str)
         """
-        parsed = self.parse_simple_expression(expression)
-        if not parsed:
-            return False, "UNKNOWN"
-        
-        op_func = self.OPERATORS.get(parsed['operator'])
-        if not op_func:
-            logger.error(f"Unknown operator: {parsed['operator']}")
+        compiled = self._compile_simple(expression)
+        if compiled is None or compiled[0] is None:
             return False, "UNKNOWN"
         
-        threshold = parsed['threshold']
+        op_func, threshold = compiled
         is_problem = op_func(current_value, threshold)
         
         return is_problem, "PROBLEM" if is_problem else "OK"
@@ -144,45 +262,99 @@ class ExpressionEvaluator:
         Returns:
             Tuple of (is_problem: bool, state: str)
         """
-        try:
-            expr = json.loads(compound_expression)
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid compound expression JSON: {e}")
+        parsed = _parse_compound(compound_expression)
+        if parsed is None:
             return False, "UNKNOWN"
+        return self.evaluate_compound_parsed(parsed, values)
+    
+    @staticmethod
+    def _condition_matches(condition: CompoundCondition, values: Dict[str, float]) -> bool:
+        """Evaluate one parsed compound condition; missing metrics never match."""
+        metric, _, op_func, threshold = condition
+        current_value = values.get(metric)
+        if current_value is None:
+            logger.warning(f"No value for metric {metric}")
+            return False
+        return bool(op_func) and op_func(float(current_value), threshold)
+    
+    def evaluate_compound_parsed(
+        self,
+        parsed: Tuple[str, Tuple[CompoundCondition, ...]],
+        values: Dict[str, float]
+    ) -> Tuple[bool, str]:
+        """
+        Evaluate an already-parsed compound expression (see evaluate_compound).
         
-        logical_op = expr.get('operator', 'and').lower()
-        conditions = expr.get('conditions', [])
+        Args:
+            parsed: (logical_op, conditions) as produced by the cached parser
+            values: Dict mapping metric names to current values
+        """
+        logical_op, conditions = parsed
         
         if not conditions:
             return False, "OK"
         
-        results = []
-        for cond in conditions:
-            metric = cond.get('metric')
-            op_str = cond.get('operator', '>')
-            threshold = float(cond.get('value', 0))
-            
-            current_value = values.get(metric)
-            if current_value is None:
-                logger.warning(f"No value for metric {metric}")
-                results.append(False)
-                continue
-            
-            op_func = self.OPERATORS.get(op_str)
-            if op_func:
-                results.append(op_func(float(current_value), threshold))
-            else:
-                results.append(False)
-        
+        # Generators let all()/any() stop at the first decisive condition
         if logical_op == 'and':
-            is_problem = all(results)
+            is_problem = all(self._condition_matches(cond, values) for cond in conditions)
         elif logical_op == 'or':
-            is_problem = any(results)
+            is_problem = any(self._condition_matches(cond, values) for cond in conditions)
         else:
-            is_problem = results[0] if results else False
+            is_problem = self._condition_matches(conditions[0], values)
         
         return is_problem, "PROBLEM" if is_problem else "OK"
     
+    def evaluate_compound_batch(
+        self,
+        compound_expressions: Sequence[str],
+        values: Dict[str, float]
+    ) -> List[Tuple[bool, str]]:
+        """
+        Evaluate many compound expressions against one snapshot of metric values.
+        
+        Triggers created from the same template share identical expressions,
+        so each distinct expression is evaluated only once per batch.
+        
+        Returns:
+            List of (is_problem, state) tuples, in input order
+        """
+        evaluated: Dict[str, Tuple[bool, str]] = {}
+        results = []
+        for compound_expression in compound_expressions:
+            result = evaluated.get(compound_expression)
+            if result is None:
+                result = evaluated[compound_expression] = self.evaluate_compound(compound_expression, values)
+            results.append(result)
+        return results
+    
+    def compile_trigger(self, trigger: Trigger) -> Optional[CompiledEvaluator]:
+        """
+        Return a specialized `values -> is_problem` function for a trigger.
+        
+        The function is generated once per distinct expression and reused for
+        every trigger sharing it. Returns None when the expression cannot be
+        specialized; callers then use the generic evaluate_* path.
+        """
+        if trigger.expression_type == 'compound' and trigger.compound_expression:
+            return _compile_compound_evaluator(trigger.compound_expression)
+        return _compile_simple_evaluator(trigger.expression)
+    
+    def _hot_compiled(self, trigger: Trigger) -> Optional[CompiledEvaluator]:
+        """Return the generated evaluator once the expression has warmed up."""
+        if trigger.expression_type == 'compound' and trigger.compound_expression:
+            key = trigger.compound_expression
+        else:
+            key = trigger.expression
+        hits = self._eval_hits.get(key, 0)
+        if hits < TRIGGER_CODEGEN_WARMUP:
+            # Rarely evaluated expressions stay on the generic path
+            if not hits and len(self._eval_hits) >= EVAL_HITS_MAXSIZE:
+                # Forget the oldest expression; it warms up again if still in use
+                del self._eval_hits[next(iter(self._eval_hits))]
+            self._eval_hits[key] = hits + 1
+            return None
+        return self.compile_trigger(trigger)
+    
     def check_duration(
         self, 
         trigger: Trigger, 
@@ -192,6 +364,9 @@ class ExpressionEvaluator:
         """
         Check if trigger has been in PROBLEM state long enough to fire.
         
+        State changes are only applied to the trigger object; the caller
+        commits them once at the end of its evaluation loop.
+        
         Args:
             trigger: The trigger being evaluated
             current_state: Current evaluated state
@@ -207,22 +382,32 @@ class ExpressionEvaluator:
         
         # Check state transition
         if trigger.last_state != current_state:
-            # State changed - update state_since
-            trigger.state_since = now
-            trigger.last_state = current_state
-            db.flush()
+            # State changed - the clock restarts, and a positive duration
+            # can't be met at zero elapsed time
+            trigger.state_since, trigger.last_state = now, current_state
+            return False
         
-        if current_state != "PROBLEM":
+        if current_state != "PROBLEM" or not trigger.state_since:
             return False
         
         # Check if we've been in PROBLEM state long enough
-        if trigger.state_since:
-            duration_met = (now - trigger.state_since).total_seconds() >= trigger.duration
-            if duration_met:
-                logger.debug(f"Trigger {trigger.name} duration requirement met ({trigger.duration}s)")
-            return duration_met
+        duration_met = (now - trigger.state_since).total_seconds() >= trigger.duration
+        if duration_met:
+            logger.debug(f"Trigger {trigger.name} duration requirement met ({trigger.duration}s)")
+        return duration_met
+    
+    def prime_parent_states(self, db: Session, triggers: Sequence[Trigger]) -> None:
+        """Load the last_state of every parent of ``triggers`` in one query.
         
-        return False
+        Call once before evaluating a batch so check_dependencies doesn't
+        lazy-load each parent trigger.
+        """
+        parent_ids = {t.parent_trigger_id for t in triggers if t.parent_trigger_id}
+        if not parent_ids:
+            self._parent_states = {}
+            return
+        rows = db.query(Trigger.id, Trigger.last_state).filter(Trigger.id.in_(parent_ids)).all()
+        self._parent_states = {trigger_id: last_state for trigger_id, last_state in rows}
     
     def check_dependencies(
         self, 
@@ -240,14 +425,19 @@ class ExpressionEvaluator:
         if not trigger.parent_trigger_id:
             return True
         
-        parent = trigger.parent_trigger
-        if not parent:
-            return True
+        if trigger.parent_trigger_id in self._parent_states:
+            parent_state = self._parent_states[trigger.parent_trigger_id]
+            parent_name = trigger.parent_trigger_id
+        else:
+            parent = trigger.parent_trigger
+            if not parent:
+                return True
+            parent_state, parent_name = parent.last_state, parent.name
         
         # If parent is in PROBLEM state, suppress child triggers
-        if parent.last_state == "PROBLEM":
+        if parent_state == "PROBLEM":
             logger.debug(
-                f"Trigger {trigger.name} suppressed - parent {parent.name} in PROBLEM state"
+                f"Trigger {trigger.name} suppressed - parent {parent_name} in PROBLEM state"
             )
             return False
         
@@ -290,7 +480,64 @@ class ExpressionEvaluator:
                 - value: current metric value
                 - message: description
         """
+        return self._evaluate(trigger, db, current_values, datetime.utcnow())
+    
+    async def evaluate_triggers(
+        self,
+        triggers: Sequence[Trigger],
+        db: Session,
+        values_by_trigger: Dict[Any, Dict[str, float]],
+    ) -> List[Dict[str, Any]]:
+        """
+        Evaluate a batch of triggers and write their state back in one statement.
+        
+        Parent states are primed once, every trigger is evaluated without
+        yielding to the event loop, and last_state/state_since/last_evaluated_at
+        are persisted with a single bulk UPDATE. The caller commits.
+        
+        Args:
+            triggers: Triggers to evaluate
+            db: Database session
+            values_by_trigger: trigger_id -> current metric values
+            
+        Returns:
+            One result dict per trigger, in order (see evaluate_trigger)
+        """
         now = datetime.utcnow()
+        self.prime_parent_states(db, triggers)
+        
+        results = []
+        updates = []
+        for trigger in triggers:
+            results.append(self._evaluate(trigger, db, values_by_trigger.get(trigger.id), now))
+            # Triggers that returned early (suppressed, no data) were not touched
+            if trigger.last_evaluated_at is now:
+                updates.append({
+                    'id': trigger.id,
+                    'last_state': trigger.last_state,
+                    'state_since': trigger.state_since,
+                    'last_evaluated_at': now,
+                })
+        
+        if updates:
+            db.bulk_update_mappings(Trigger, updates)
+            # Session-attached triggers already hold these values; mark them
+            # clean so the next flush doesn't repeat the UPDATE row by row
+            for trigger in triggers:
+                if trigger.last_evaluated_at is now and inspect(trigger).persistent:
+                    for attr in _STATE_COLUMNS:
+                        set_committed_value(trigger, attr, getattr(trigger, attr))
+        
+        return results
+    
+    def _evaluate(
+        self,
+        trigger: Trigger,
+        db: Session,
+        current_values: Optional[Dict[str, float]],
+        now: datetime,
+    ) -> Dict[str, Any]:
+        """Synchronous core of evaluate_trigger."""
         result = {
             'should_alert': False,
             'state': 'UNKNOWN',
@@ -305,12 +552,17 @@ class ExpressionEvaluator:
             return result
         
         # Evaluate based on expression type
+        compiled = self._hot_compiled(trigger)
         if trigger.expression_type == 'compound' and trigger.compound_expression:
             if current_values:
-                is_problem, state = self.evaluate_compound(
-                    trigger.compound_expression, 
-                    current_values
-                )
+                if compiled:
+                    is_problem = compiled(current_values)
+                    state = "PROBLEM" if is_problem else "OK"
+                else:
+                    is_problem, state = self.evaluate_compound(
+                        trigger.compound_expression, 
+                        current_values
+                    )
             else:
                 result['message'] = "No values provided for compound expression"
                 return result
@@ -322,7 +574,11 @@ class ExpressionEvaluator:
                 return result
             
             result['value'] = value
-            is_problem, state = self.evaluate_simple(trigger.expression, value)
+            if compiled:
+                is_problem = compiled(current_values)
+                state = "PROBLEM" if is_problem else "OK"
+            else:
+                is_problem, state = self.evaluate_simple(trigger.expression, value)
         
         result['state'] = state
         
@@ -347,6 +603,9 @@ class ExpressionEvaluator:
         if trigger.last_state != state:
             trigger.state_since = now
         trigger.last_state = state
+        if trigger.id in self._parent_states:
+            # Children evaluated later in this batch see the new state
+            self._parent_states[trigger.id] = state
         
         # Determine if we should create an alert
         result['should_alert'] = should_alert and state == "PROBLEM"
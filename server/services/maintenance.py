@@ -1,18 +1,117 @@
 """Maintenance service - Manages maintenance windows and alert suppression."""
 import logging
-from datetime import datetime
-from typing import Optional, Set, List
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional, Set, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
 
-from db.models import MaintenanceWindow, Device, HostGroup
+from db.models import MaintenanceWindow, Device, device_hostgroup
 
 logger = logging.getLogger(__name__)
 
+# Windows change at human timescales; a few seconds of staleness is acceptable
+MAINTENANCE_CACHE_TTL = float(os.getenv("MAINTENANCE_CACHE_TTL", "5"))
+
+
+class CachedWindow(NamedTuple):
+    """Detached snapshot of the MaintenanceWindow columns used for suppression checks."""
+    name: str
+    scope_type: str
+    device_id: Optional[uuid.UUID]
+    hostgroup_id: Optional[uuid.UUID]
+    collect_data: bool
+    start_time: datetime
+    end_time: datetime
+
+
+def _as_naive_utc(value: datetime) -> datetime:
+    """Normalize timezone-aware values so they compare with datetime.utcnow()."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
 
 class MaintenanceService:
     """Manages maintenance windows and alert suppression."""
     
+    def __init__(self):
+        # (loaded_at, windows) snapshot of active windows that have not ended yet
+        self._windows_cache: Optional[Tuple[float, List[CachedWindow]]] = None
+        self._cache_lock = threading.Lock()
+    
+    def invalidate_cache(self) -> None:
+        """Force the next check to reload maintenance windows."""
+        self._windows_cache = None
+    
+    def _cached_windows(self, db: Session) -> List[CachedWindow]:
+        """Active, not yet ended windows, reloaded at most every MAINTENANCE_CACHE_TTL seconds."""
+        cached = self._windows_cache
+        if cached and time.monotonic() - cached[0] < MAINTENANCE_CACHE_TTL:
+            return cached[1]
+        
+        with self._cache_lock:
+            cached = self._windows_cache
+            if cached and time.monotonic() - cached[0] < MAINTENANCE_CACHE_TTL:
+                return cached[1]
+            
+            rows = db.query(
+                MaintenanceWindow.name,
+                MaintenanceWindow.scope_type,
+                MaintenanceWindow.device_id,
+                MaintenanceWindow.hostgroup_id,
+                MaintenanceWindow.collect_data,
+                MaintenanceWindow.start_time,
+                MaintenanceWindow.end_time,
+            ).filter(
+                MaintenanceWindow.active == True,
+                MaintenanceWindow.end_time >= datetime.utcnow()
+            ).all()
+            windows = [
+                CachedWindow(
+                    r.name, r.scope_type, r.device_id, r.hostgroup_id, r.collect_data,
+                    _as_naive_utc(r.start_time), _as_naive_utc(r.end_time),
+                )
+                for r in rows
+            ]
+            self._windows_cache = (time.monotonic(), windows)
+            return windows
+    
+    def _live_windows(self, db: Session) -> List[CachedWindow]:
+        """Cached windows in effect right now."""
+        now = datetime.utcnow()
+        return [w for w in self._cached_windows(db) if w.start_time <= now <= w.end_time]
+    
+    def _covering_windows(self, db: Session, device_id: str) -> List[CachedWindow]:
+        """Windows in effect right now that cover the given device.
+        
+        Matching runs against the cached window list; the database is only
+        consulted for host group membership when an 'all' or 'hostgroup'
+        window is currently in effect.
+        """
+        live = self._live_windows(db)
+        if not live:
+            return []
+        
+        device_uuid = device_id if isinstance(device_id, uuid.UUID) else uuid.UUID(str(device_id))
+        covering = [w for w in live if w.scope_type == 'device' and w.device_id == device_uuid]
+        if any(w.scope_type in ('all', 'hostgroup') for w in live):
+            # One row per membership (or a single NULL row for ungrouped devices);
+            # no rows means the device is unknown and never in maintenance.
+            memberships = db.query(device_hostgroup.c.hostgroup_id).select_from(Device).outerjoin(
+                device_hostgroup, device_hostgroup.c.device_id == Device.id
+            ).filter(Device.id == device_uuid).all()
+            if memberships:
+                hostgroup_ids = {m.hostgroup_id for m in memberships}
+                covering.extend(
+                    w for w in live
+                    if w.scope_type == 'all'
+                    or (w.scope_type == 'hostgroup' and w.hostgroup_id in hostgroup_ids)
+                )
+        return covering
+    
     def is_device_in_maintenance(self, device_id: str, db: Session) -> bool:
         """
         Check if a device is currently in an active maintenance window.
@@ -24,41 +123,10 @@ class MaintenanceService:
         Returns:
             True if device is in maintenance, False otherwise
         """
-        now = datetime.utcnow()
+        covering = self._covering_windows(db, device_id)
         
-        # Get the device to find its host groups
-        device = db.query(Device).filter(Device.id == device_id).first()
-        if not device:
-            return False
-        
-        # Get device's host group IDs
-        hostgroup_ids = [hg.id for hg in device.host_groups]
-        
-        # Query for active maintenance windows that cover this device
-        query = db.query(MaintenanceWindow).filter(
-            MaintenanceWindow.active == True,
-            MaintenanceWindow.start_time <= now,
-            MaintenanceWindow.end_time >= now,
-            or_(
-                # Scope: all devices
-                MaintenanceWindow.scope_type == 'all',
-                # Scope: this specific device
-                and_(
-                    MaintenanceWindow.scope_type == 'device',
-                    MaintenanceWindow.device_id == device_id
-                ),
-                # Scope: a host group this device belongs to
-                and_(
-                    MaintenanceWindow.scope_type == 'hostgroup',
-                    MaintenanceWindow.hostgroup_id.in_(hostgroup_ids)
-                ) if hostgroup_ids else False
-            )
-        )
-        
-        window = query.first()
-        
-        if window:
-            logger.debug(f"Device {device_id} is in maintenance window '{window.name}'")
+        if covering:
+            logger.debug(f"Device {device_id} is in maintenance window '{covering[0].name}'")
             return True
         
         return False
@@ -85,30 +153,26 @@ class MaintenanceService:
         Returns:
             Set of device UUIDs that should have alerts suppressed
         """
-        now = datetime.utcnow()
-        suppressed = set()
-        
-        # Get all active windows
-        active_windows = db.query(MaintenanceWindow).filter(
-            MaintenanceWindow.active == True,
-            MaintenanceWindow.start_time <= now,
-            MaintenanceWindow.end_time >= now
-        ).all()
-        
-        for window in active_windows:
-            if window.scope_type == 'all':
-                # All devices are suppressed - get all device IDs
-                all_devices = db.query(Device.id).all()
-                suppressed.update(str(d.id) for d in all_devices)
-            elif window.scope_type == 'device' and window.device_id:
-                suppressed.add(str(window.device_id))
-            elif window.scope_type == 'hostgroup' and window.hostgroup_id:
-                # Get all devices in this host group
-                hostgroup = db.query(HostGroup).filter(
-                    HostGroup.id == window.hostgroup_id
-                ).first()
-                if hostgroup:
-                    suppressed.update(str(d.id) for d in hostgroup.devices)
+        live = self._live_windows(db)
+        
+        if any(w.scope_type == 'all' for w in live):
+            # All devices are suppressed - nothing else can add to the set
+            return {str(device_id) for (device_id,) in db.query(Device.id).all()}
+        
+        suppressed = {
+            str(w.device_id) for w in live
+            if w.scope_type == 'device' and w.device_id
+        }
+        hostgroup_ids = {
+            w.hostgroup_id for w in live
+            if w.scope_type == 'hostgroup' and w.hostgroup_id
+        }
+        if hostgroup_ids:
+            # Resolve every host group's members in one round-trip
+            members = db.query(device_hostgroup.c.device_id).filter(
+                device_hostgroup.c.hostgroup_id.in_(hostgroup_ids)
+            ).all()
+            suppressed.update(str(device_id) for (device_id,) in members)
         
         return suppressed
     
@@ -121,35 +185,9 @@ class MaintenanceService:
         Returns:
             False if device is in a 'no data collection' maintenance window
         """
-        now = datetime.utcnow()
-        
-        # Get the device to find its host groups
-        device = db.query(Device).filter(Device.id == device_id).first()
-        if not device:
-            return True  # Default to collecting data
-        
-        hostgroup_ids = [hg.id for hg in device.host_groups]
-        
-        # Look for any maintenance window with collect_data=False
-        query = db.query(MaintenanceWindow).filter(
-            MaintenanceWindow.active == True,
-            MaintenanceWindow.start_time <= now,
-            MaintenanceWindow.end_time >= now,
-            MaintenanceWindow.collect_data == False,
-            or_(
-                MaintenanceWindow.scope_type == 'all',
-                and_(
-                    MaintenanceWindow.scope_type == 'device',
-                    MaintenanceWindow.device_id == device_id
-                ),
-                and_(
-                    MaintenanceWindow.scope_type == 'hostgroup',
-                    MaintenanceWindow.hostgroup_id.in_(hostgroup_ids)
-                ) if hostgroup_ids else False
-            )
-        )
-        
-        if query.first():
+        # Look for any maintenance window with collect_data=False;
+        # unknown devices default to collecting data
+        if any(not w.collect_data for w in self._covering_windows(db, device_id)):
             return False  # Don't collect data
         
         return True  # Collect data normally
@@ -203,6 +241,7 @@ class MaintenanceService:
         db.add(window)
         db.commit()
         db.refresh(window)
+        self.invalidate_cache()
         
         logger.info(f"Created maintenance window '{name}' ({scope_type}) from {start_time} to {end_time}")
         return window
@@ -2,12 +2,18 @@
 import asyncio
 import ipaddress
 import logging
+import os
 import socket
+import struct
+import time
 import json
 import subprocess
 import platform
-from typing import Optional, List, Dict, Any
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Tuple, Union
 from datetime import datetime
+from sqlalchemy import insert, select, text, update
 from sqlalchemy.orm import Session
 
 from db.models import DiscoveryJob, DiscoveryResult, Device
@@ -17,19 +23,417 @@ logger = logging.getLogger(__name__)
 # Default ports to scan
 DEFAULT_PORTS = [22, 23, 80, 443, 161, 8080, 3389]
 
+# Common service names reported for open ports
+SERVICE_NAMES = {
+    22: 'ssh',
+    23: 'telnet',
+    80: 'http',
+    443: 'https',
+    161: 'snmp',
+    3389: 'rdp',
+    8080: 'http-alt',
+    8443: 'https-alt',
+    5432: 'postgresql',
+    3306: 'mysql',
+}
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+ICMP_PAYLOAD = b'health-monitor'
+# Room for a whole sweep's worth of replies arriving in one burst
+ICMP_RECV_BUFFER = 1 << 20
+# Echo requests sent per event loop iteration during a sweep
+ICMP_SEND_BURST = 128
+
+# Reverse-DNS cache lifetimes (seconds); failures expire sooner so new PTR records show up
+DNS_CACHE_TTL = 900
+DNS_NEGATIVE_TTL = 60
+DNS_CACHE_MAX_ENTRIES = 65536
+# PTR lookups block a thread each; wide sweeps need more than the default
+# executor's min(32, cpu + 4) workers
+DNS_RESOLVER_THREADS = 64
+
+# SO_LINGER on with zero timeout: close() sends RST instead of FIN
+_LINGER_RESET = struct.pack('ii', 1, 0)
+
+# Discovery results written per INSERT statement, and the longest a
+# partial batch waits for more rows before being written anyway
+RESULT_INSERT_BATCH = 500
+RESULT_FLUSH_INTERVAL = 0.5
+# Scanned hosts buffered for the writer before scans wait on it
+RESULT_QUEUE_SIZE = 1000
+
+# Progress is written when it advances this many percent, or after this many seconds
+PROGRESS_MIN_STEP = 5
+PROGRESS_MIN_INTERVAL = 2.0
+
+# Concurrent ping processes when ICMP sockets are unavailable
+SUBPROCESS_PING_CONCURRENCY = 50
+# fping probe interval (ms) and retries when it stands in for the ICMP socket
+FPING_INTERVAL_MS = 1
+FPING_RETRIES = 1
+
+SNMP_PORT = 161
+SNMP_TIMEOUT = 2.0
+SNMP_SYSDESCR_OID = '1.3.6.1.2.1.1.1.0'
+SNMP_SYSNAME_OID = '1.3.6.1.2.1.1.5.0'
+# BER tags used by SNMPv2c GET
+_BER_INTEGER = 0x02
+_BER_OCTET_STRING = 0x04
+_BER_NULL = b'\x05\x00'
+_BER_OID = 0x06
+_BER_SEQUENCE = 0x30
+_SNMP_GET_REQUEST = 0xA0
+_SNMP_RESPONSE = 0xA2
+
+
+def icmp_checksum(data: bytes) -> int:
+    """RFC 1071 ones' complement checksum over 16-bit words."""
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _ber_encode(tag: int, payload: bytes) -> bytes:
+    length = len(payload)
+    if length < 0x80:
+        return bytes((tag, length)) + payload
+    size = (length.bit_length() + 7) // 8
+    return bytes((tag, 0x80 | size)) + length.to_bytes(size, 'big') + payload
+
+
+def _ber_int(value: int) -> bytes:
+    return _ber_encode(_BER_INTEGER, value.to_bytes(value.bit_length() // 8 + 1, 'big', signed=True))
+
+
+def _ber_oid(oid: str) -> bytes:
+    parts = [int(part) for part in oid.split('.')]
+    body = bytearray([parts[0] * 40 + parts[1]])
+    for part in parts[2:]:
+        # Base-128, most significant group first, continuation bit on all but the last
+        groups = [part & 0x7F]
+        part >>= 7
+        while part:
+            groups.append(0x80 | (part & 0x7F))
+            part >>= 7
+        body.extend(reversed(groups))
+    return _ber_encode(_BER_OID, bytes(body))
+
+
+def _ber_items(data: bytes) -> List[Tuple[int, bytes]]:
+    """Split concatenated BER TLVs into (tag, value) pairs."""
+    items = []
+    pos = 0
+    while pos < len(data):
+        tag, length = data[pos], data[pos + 1]
+        pos += 2
+        if length & 0x80:
+            size = length & 0x7F
+            length = int.from_bytes(data[pos:pos + size], 'big')
+            pos += size
+        if pos + length > len(data):
+            raise ValueError("Truncated BER value")
+        items.append((tag, data[pos:pos + length]))
+        pos += length
+    return items
+
+
+def snmp_get_request(community: str, request_id: int, oids: List[str]) -> bytes:
+    """Encode an SNMPv2c GetRequest asking for every OID in one PDU."""
+    varbinds = b''.join(_ber_encode(_BER_SEQUENCE, _ber_oid(oid) + _BER_NULL) for oid in oids)
+    pdu = _ber_encode(
+        _SNMP_GET_REQUEST,
+        _ber_int(request_id) + _ber_int(0) + _ber_int(0) + _ber_encode(_BER_SEQUENCE, varbinds)
+    )
+    return _ber_encode(_BER_SEQUENCE, _ber_int(1) + _ber_encode(_BER_OCTET_STRING, community.encode()) + pdu)
+
+
+def parse_snmp_response(data: bytes) -> Tuple[int, List[Optional[str]]]:
+    """
+    Decode an SNMPv2c Response into its request-id and varbind values.
+    
+    String values are decoded as text; other types, noSuchObject and
+    friends come back as None. Raises ValueError on malformed packets.
+    """
+    try:
+        (_, message), = _ber_items(data)
+        _, _, (pdu_type, pdu) = _ber_items(message)
+        if pdu_type != _SNMP_RESPONSE:
+            raise ValueError(f"Unexpected SNMP PDU type 0x{pdu_type:02x}")
+        (_, request_id), (_, error_status), _, (_, varbinds) = _ber_items(pdu)
+        values = []
+        for _, varbind in _ber_items(varbinds):
+            _, (value_type, value) = _ber_items(varbind)
+            values.append(value.decode('utf-8', 'replace') if value_type == _BER_OCTET_STRING else None)
+    except (IndexError, TypeError) as e:
+        raise ValueError(f"Malformed SNMP response: {e}") from e
+    if int.from_bytes(error_status, 'big'):
+        values = [None] * len(values)
+    return int.from_bytes(request_id, 'big', signed=True), values
+
+
+def _host_range(network: Union[ipaddress.IPv4Network, ipaddress.IPv6Network]) -> range:
+    """Integer addresses yielded by ``network.hosts()``, without building address objects."""
+    first, last = int(network.network_address), int(network.broadcast_address)
+    if network.prefixlen >= network.max_prefixlen - 1:
+        # /31 and /32 (or /127 and /128) have no network/broadcast to exclude
+        return range(first, last + 1)
+    if network.version == 4:
+        return range(first + 1, last)
+    # IPv6 only excludes the Subnet-Router anycast (network) address
+    return range(first + 1, last + 1)
+
+
+def _ip_version(ip: str) -> Optional[int]:
+    """4 or 6 for a valid address literal, else None.
+    
+    Called several times per host and per port probe during a sweep;
+    inet_pton is an order of magnitude cheaper than ipaddress.ip_address.
+    """
+    try:
+        socket.inet_pton(socket.AF_INET, ip)
+        return 4
+    except (OSError, ValueError):
+        pass
+    try:
+        socket.inet_pton(socket.AF_INET6, ip)
+        return 6
+    except (OSError, ValueError):
+        return None
+
+
+def _format_ipv4(address: int) -> str:
+    return socket.inet_ntoa(address.to_bytes(4, 'big'))
+
+
+def _format_ipv6(address: int) -> str:
+    return str(ipaddress.IPv6Address(address))
+
+
+def default_scan_concurrency() -> int:
+    """Concurrent host scans / TCP probes: DISCOVERY_SCAN_CONCURRENCY, else sized to the FD limit."""
+    configured = os.getenv("DISCOVERY_SCAN_CONCURRENCY")
+    if configured:
+        return max(1, int(configured))
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 100
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return 1024
+    # Leave most descriptors for the API, database pool and HTTP clients
+    return max(100, min(soft // 4, 1024))
+
+
+class IcmpPinger:
+    """Multiplexes ICMP echo requests to many hosts over a single socket.
+    
+    Replies are matched to waiting pings by (source address, sequence).
+    Unprivileged datagram ICMP sockets are preferred; raw sockets (root or
+    CAP_NET_RAW) are used otherwise.
+    """
+    
+    def __init__(self, sock: socket.socket, loop: asyncio.AbstractEventLoop):
+        self._sock = sock
+        self._loop = loop
+        self._ident = os.getpid() & 0xFFFF
+        # The kernel rewrites the identifier on datagram sockets, and only
+        # raw sockets see other processes' echo replies
+        self._check_ident = sock.type == socket.SOCK_RAW
+        self._seq = 0
+        self._pending: Dict[Tuple[str, int], asyncio.Future] = {}
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, ICMP_RECV_BUFFER)
+        sock.setblocking(False)
+        loop.add_reader(sock.fileno(), self._on_reply)
+    
+    @classmethod
+    def open(cls, loop: asyncio.AbstractEventLoop) -> Optional['IcmpPinger']:
+        """Open an ICMP socket, or return None if the process isn't allowed to."""
+        for sock_type in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+            try:
+                sock = socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP)
+            except OSError:
+                continue
+            return cls(sock, loop)
+        return None
+    
+    def _echo_request(self, seq: int) -> bytes:
+        header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, self._ident, seq)
+        checksum = icmp_checksum(header + ICMP_PAYLOAD)
+        return struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, checksum, self._ident, seq) + ICMP_PAYLOAD
+    
+    async def ping(self, ip: str, timeout: float) -> Optional[float]:
+        """Send one echo request; return the round-trip time in seconds, or None."""
+        self._seq = seq = (self._seq + 1) & 0xFFFF
+        key = (ip, seq)
+        future = self._loop.create_future()
+        self._pending[key] = future
+        try:
+            sent_at = self._loop.time()
+            await self._loop.sock_sendto(self._sock, self._echo_request(seq), (ip, 0))
+            received_at = await asyncio.wait_for(future, timeout)
+            return received_at - sent_at
+        except (asyncio.TimeoutError, OSError) as e:
+            logger.debug(f"Ping failed for {ip}: {e!r}")
+            return None
+        finally:
+            self._pending.pop(key, None)
+    
+    def _on_reply(self) -> None:
+        """Drain the socket and resolve the pings that were answered."""
+        while True:
+            try:
+                data, (ip, _) = self._sock.recvfrom(1024)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.debug(f"ICMP receive failed: {e}")
+                return
+            received_at = self._loop.time()
+            
+            if data and data[0] >> 4 == 4:
+                # Raw sockets deliver the IPv4 header as well
+                data = data[(data[0] & 0x0F) * 4:]
+            if len(data) < 8:
+                continue
+            icmp_type, _, _, ident, seq = struct.unpack_from('!BBHHH', data)
+            if icmp_type != ICMP_ECHO_REPLY or (self._check_ident and ident != self._ident):
+                continue
+            
+            future = self._pending.get((ip, seq))
+            if future is not None and not future.done():
+                future.set_result(received_at)
+    
+    def close(self) -> None:
+        try:
+            self._loop.remove_reader(self._sock.fileno())
+        except (RuntimeError, ValueError):
+            pass  # loop already closed
+        self._sock.close()
+
+
+class SnmpClient:
+    """Multiplexes SNMPv2c GET requests to many agents over one UDP socket per address family.
+    
+    Replies are matched to waiting requests by (source address, request-id).
+    """
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._socks: Dict[int, socket.socket] = {}
+        self._request_id = (os.getpid() << 16) & 0x7FFFFFFF
+        # request-id -> (agent address, OID count, future)
+        self._pending: Dict[int, Tuple[str, int, asyncio.Future]] = {}
+    
+    def _socket(self, family: int) -> socket.socket:
+        sock = self._socks.get(family)
+        if sock is None:
+            sock = socket.socket(family, socket.SOCK_DGRAM)
+            sock.setblocking(False)
+            self._loop.add_reader(sock.fileno(), self._on_reply, sock)
+            self._socks[family] = sock
+        return sock
+    
+    async def get(
+        self, ip: str, community: str, oids: List[str], timeout: float = SNMP_TIMEOUT
+    ) -> Optional[List[Optional[str]]]:
+        """GET the OIDs in one request; return their values in order, or None if the agent didn't answer."""
+        self._request_id = request_id = (self._request_id + 1) & 0x7FFFFFFF
+        future = self._loop.create_future()
+        self._pending[request_id] = (ip, len(oids), future)
+        family = socket.AF_INET6 if ':' in ip else socket.AF_INET
+        try:
+            await self._loop.sock_sendto(
+                self._socket(family), snmp_get_request(community, request_id, oids), (ip, SNMP_PORT)
+            )
+            return await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, OSError) as e:
+            logger.debug(f"SNMP failed for {ip}: {e!r}")
+            return None
+        finally:
+            self._pending.pop(request_id, None)
+    
+    def _on_reply(self, sock: socket.socket) -> None:
+        """Drain the socket and resolve the requests that were answered."""
+        while True:
+            try:
+                data, address = sock.recvfrom(65535)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.debug(f"SNMP receive failed: {e}")
+                return
+            try:
+                request_id, values = parse_snmp_response(data)
+            except ValueError as e:
+                logger.debug(f"Ignoring SNMP packet from {address[0]}: {e}")
+                continue
+            pending = self._pending.get(request_id)
+            if pending is None or pending[0] != address[0]:
+                continue
+            _, count, future = pending
+            if len(values) == count and not future.done():
+                future.set_result(values)
+    
+    def close(self) -> None:
+        for sock in self._socks.values():
+            try:
+                self._loop.remove_reader(sock.fileno())
+            except (RuntimeError, ValueError):
+                pass  # loop already closed
+            sock.close()
+        self._socks.clear()
+
 
 class NetworkScanner:
     """Network discovery scanner with ICMP ping sweep, port scanning, and SNMP detection."""
     
     def __init__(self):
         self.is_windows = platform.system().lower() == 'windows'
+        self.scan_concurrency = default_scan_concurrency()
+        # One fping process can sweep the hosts the ICMP socket can't reach
+        self._fping_path = None if self.is_windows else shutil.which('fping')
+        # Bound lazily to the running loop; see _get_pinger()
+        self._pinger: Optional[IcmpPinger] = None
+        self._pinger_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._snmp: Optional[SnmpClient] = None
+        # ip -> (expires_at, hostname or None)
+        self._dns_cache: Dict[str, Tuple[float, Optional[str]]] = {}
+        self._dns_executor: Optional[ThreadPoolExecutor] = None
+    
+    def _get_pinger(self) -> Optional[IcmpPinger]:
+        """Shared ICMP pinger for the running loop, or None to use the ping command."""
+        if self.is_windows:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._pinger_loop is not loop:
+            if self._pinger is not None:
+                self._pinger.close()
+            self._pinger = IcmpPinger.open(loop)
+            self._pinger_loop = loop
+            if self._pinger is None:
+                logger.info("ICMP sockets unavailable; falling back to the ping command")
+        return self._pinger
+    
+    def _get_snmp_client(self) -> SnmpClient:
+        """Shared SNMP client for the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._snmp is None or self._snmp._loop is not loop:
+            if self._snmp is not None:
+                self._snmp.close()
+            self._snmp = SnmpClient(loop)
+        return self._snmp
 
     def _is_valid_ip(self, ip: str) -> bool:
-        try:
-            ipaddress.ip_address(ip)
-            return True
-        except ValueError:
-            return False
+        return _ip_version(ip) is not None
+    
+    @staticmethod
+    def _is_ipv4(ip: str) -> bool:
+        return _ip_version(ip) == 4
     
     async def ping_host(self, ip: str, timeout: int = 1) -> Dict[str, Any]:
         """
@@ -40,10 +444,19 @@ class NetworkScanner:
         """
         result = {'reachable': False, 'latency_ms': None}
         
-        if not self._is_valid_ip(ip):
+        version = _ip_version(ip)
+        if version is None:
             logger.debug(f"Skipping ping for invalid IP: {ip}")
             return result
 
+        pinger = self._get_pinger()
+        if pinger is not None and version == 4:
+            latency = await pinger.ping(ip, timeout)
+            if latency is not None:
+                result['reachable'] = True
+                result['latency_ms'] = int(latency * 1000)
+            return result
+
         try:
             # Platform-specific ping command
             if self.is_windows:
@@ -53,12 +466,13 @@ class NetworkScanner:
             
             start_time = asyncio.get_event_loop().time()
             
+            # Only the exit status matters, so don't pipe the output back
             proc = await asyncio.create_subprocess_exec(
                 *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL
             )
-            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=timeout + 2)
+            await asyncio.wait_for(proc.wait(), timeout=timeout + 2)
             
             end_time = asyncio.get_event_loop().time()
             
@@ -71,33 +485,143 @@ class NetworkScanner:
         
         return result
     
+    async def _fping(self, hosts: List[str], timeout: int) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Ping hosts with a single fping process.
+        
+        Returns:
+            Dict mapping IP to the ping_host() result, or None if fping failed
+        """
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                self._fping_path, '-a', '-e',
+                '-i', str(FPING_INTERVAL_MS), '-r', str(FPING_RETRIES), '-t', str(timeout * 1000),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            # Targets go over stdin so large sweeps don't hit the argument length limit
+            stdout, _ = await proc.communicate('\n'.join(hosts).encode())
+        except OSError as e:
+            logger.warning(f"fping failed to start: {e}")
+            return None
+        # 0: all alive, 1: some unreachable; anything else is a usage or system error
+        if proc.returncode not in (0, 1):
+            logger.warning(f"fping exited with status {proc.returncode}; falling back to ping")
+            return None
+        
+        results = {ip: {'reachable': False, 'latency_ms': None} for ip in hosts}
+        # Alive hosts are printed as "10.0.0.1 (0.12 ms)"
+        for line in stdout.decode().splitlines():
+            ip, _, elapsed = line.partition(' ')
+            if ip not in results:
+                continue
+            try:
+                latency_ms = int(float(elapsed.strip().lstrip('(').split()[0]))
+            except (IndexError, ValueError):
+                latency_ms = None
+            results[ip] = {'reachable': True, 'latency_ms': latency_ms}
+        return results
+    
+    async def ping_many(self, hosts: List[str], timeout: int = 1) -> Dict[str, Dict[str, Any]]:
+        """
+        Ping many hosts at once.
+        
+        With an ICMP socket echo requests go out in bursts of ICMP_SEND_BURST,
+        yielding between bursts so replies are drained before the socket
+        buffer overflows, and all replies are awaited together. Hosts the
+        socket can't handle go to a single fping process when it is
+        installed, or else the ping command, bounded to
+        SUBPROCESS_PING_CONCURRENCY processes.
+        
+        Returns:
+            Dict mapping IP to the ping_host() result
+        """
+        pinger = self._get_pinger()
+        results: Dict[str, Dict[str, Any]] = {}
+        if self._fping_path:
+            versions = {ip: _ip_version(ip) for ip in hosts}
+            swept = [ip for ip, version in versions.items() if version and (pinger is None or version != 4)]
+            if swept:
+                results.update(await self._fping(swept, timeout) or {})
+        
+        sem = asyncio.Semaphore(SUBPROCESS_PING_CONCURRENCY)
+        
+        async def ping_one(ip: str) -> Dict[str, Any]:
+            if pinger is not None and self._is_ipv4(ip):
+                return await self.ping_host(ip, timeout)
+            async with sem:
+                return await self.ping_host(ip, timeout)
+        
+        remaining = [ip for ip in hosts if ip not in results]
+        tasks = []
+        for start in range(0, len(remaining), ICMP_SEND_BURST):
+            tasks.extend(asyncio.ensure_future(ping_one(ip)) for ip in remaining[start:start + ICMP_SEND_BURST])
+            await asyncio.sleep(0)
+        results.update(zip(remaining, await asyncio.gather(*tasks)))
+        return results
+    
     async def resolve_hostname(self, ip: str) -> Optional[str]:
-        """Attempt to resolve hostname from IP via reverse DNS."""
+        """Attempt to resolve hostname from IP via reverse DNS (cached per IP)."""
+        cached = self._dns_cache.get(ip)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        
+        if self._dns_executor is None:
+            self._dns_executor = ThreadPoolExecutor(
+                max_workers=DNS_RESOLVER_THREADS, thread_name_prefix="dns-resolver"
+            )
         try:
             hostname, _, _ = await asyncio.get_event_loop().run_in_executor(
-                None, socket.gethostbyaddr, ip
+                self._dns_executor, socket.gethostbyaddr, ip
             )
-            return hostname
         except (socket.herror, socket.gaierror):
-            return None
+            hostname = None
+        
+        if len(self._dns_cache) >= DNS_CACHE_MAX_ENTRIES:
+            # Drop the oldest entry (dicts keep insertion order)
+            self._dns_cache.pop(next(iter(self._dns_cache)))
+        ttl = DNS_CACHE_TTL if hostname else DNS_NEGATIVE_TTL
+        self._dns_cache.pop(ip, None)
+        self._dns_cache[ip] = (time.monotonic() + ttl, hostname)
+        return hostname
     
     async def check_port(self, ip: str, port: int, timeout: float = 1.0) -> bool:
-        """Check if a TCP port is open."""
+        """Check if a TCP port is open.
+        
+        Uses a bare non-blocking connect instead of a stream pair; the socket
+        is reset on close so probes don't leave TIME_WAIT entries behind.
+        """
+        family = socket.AF_INET if self._is_ipv4(ip) else socket.AF_INET6
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RESET)
         try:
-            _, writer = await asyncio.wait_for(
-                asyncio.open_connection(ip, port),
+            await asyncio.wait_for(
+                asyncio.get_running_loop().sock_connect(sock, (ip, port)),
                 timeout=timeout
             )
-            writer.close()
-            await writer.wait_closed()
             return True
         except (asyncio.TimeoutError, ConnectionRefusedError, OSError):
             return False
+        finally:
+            sock.close()
     
-    async def scan_ports(self, ip: str, ports: List[int] = None) -> Dict[str, str]:
+    async def scan_ports(
+        self,
+        ip: str,
+        ports: List[int] = None,
+        connect_sem: Optional[asyncio.Semaphore] = None
+    ) -> Dict[str, str]:
         """
         Scan multiple ports on a host.
         
+        Args:
+            connect_sem: Connection budget shared with other hosts' probes;
+                a per-call budget of scan_concurrency is used when omitted
+        
         Returns:
             Dict mapping port number (str) to service name
         """
@@ -107,7 +631,7 @@ class NetworkScanner:
         open_ports = {}
         
         # Scan ports concurrently (limit concurrency)
-        sem = asyncio.Semaphore(10)
+        sem = connect_sem or asyncio.Semaphore(self.scan_concurrency)
         
         async def check_with_sem(port):
             async with sem:
@@ -124,43 +648,26 @@ class NetworkScanner:
         
         return open_ports
     
-    def _get_service_name(self, port: int) -> str:
+    @staticmethod
+    def _get_service_name(port: int) -> str:
         """Get common service name for a port."""
-        services = {
-            22: 'ssh',
-            23: 'telnet',
-            80: 'http',
-            443: 'https',
-            161: 'snmp',
-            3389: 'rdp',
-            8080: 'http-alt',
-            8443: 'https-alt',
-            5432: 'postgresql',
-            3306: 'mysql',
-        }
-        return services.get(port, 'unknown')
+        return SERVICE_NAMES.get(port, 'unknown')
+    
+    async def snmp_get(self, ip: str, community: str = 'public', oid: str = SNMP_SYSDESCR_OID) -> Optional[str]:
+        """SNMPv2c GET of a single OID; None if unanswered or not a string."""
+        values = await self.snmp_get_many(ip, [oid], community)
+        return values[0] if values else None
     
-    async def snmp_get(self, ip: str, community: str = 'public', oid: str = '1.3.6.1.2.1.1.1.0') -> Optional[str]:
+    async def snmp_get_many(
+        self, ip: str, oids: List[str], community: str = 'public'
+    ) -> Optional[List[Optional[str]]]:
         """
-        Simple SNMP GET using snmpget command (if available).
-        For production, use pysnmp library.
+        SNMPv2c GET of several OIDs in a single request PDU.
+        
+        Returns:
+            Values in the order requested, or None if the agent didn't answer
         """
-        try:
-            cmd = ['snmpget', '-v', '2c', '-c', community, '-t', '2', ip, oid]
-            
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=5)
-            
-            if proc.returncode == 0:
-                return stdout.decode().strip()
-            return None
-        except Exception as e:
-            logger.debug(f"SNMP failed for {ip}: {e}")
-            return None
+        return await self._get_snmp_client().get(ip, community, oids)
     
     def parse_cidr_ranges(self, ip_ranges: str) -> List[ipaddress.IPv4Network]:
         """
@@ -197,12 +704,16 @@ class NetworkScanner:
         hosts = []
         networks = self.parse_cidr_ranges(ip_ranges)
         
-        for network in networks:
-            for host in network.hosts():
-                if len(hosts) >= max_hosts:
+        # Overlapping ranges are scanned once; collapse_addresses needs a single IP version
+        for version, format_address in ((4, _format_ipv4), (6, _format_ipv6)):
+            for network in ipaddress.collapse_addresses(n for n in networks if n.version == version):
+                span = _host_range(network)
+                remaining = max_hosts - len(hosts)
+                if len(span) > remaining:
+                    hosts.extend(map(format_address, span[:remaining]))
                     logger.warning(f"Host limit reached ({max_hosts}), truncating scan")
                     return hosts
-                hosts.append(str(host))
+                hosts.extend(map(format_address, span))
         
         return hosts
     
@@ -212,11 +723,18 @@ class NetworkScanner:
         scan_icmp: bool = True,
         scan_snmp: bool = False,
         snmp_community: str = 'public',
-        scan_ports_list: List[int] = None
+        scan_ports_list: List[int] = None,
+        ping_result: Optional[Dict[str, Any]] = None,
+        connect_sem: Optional[asyncio.Semaphore] = None
     ) -> Dict[str, Any]:
         """
         Comprehensive scan of a single host.
         
+        Args:
+            ping_result: Result from an earlier ping_many() sweep; the host
+                is pinged again only when omitted
+            connect_sem: Shared TCP connection budget for port probes
+        
         Returns:
             Dict with all scan results
         """
@@ -237,7 +755,8 @@ class NetworkScanner:
         
         # ICMP ping
         if scan_icmp:
-            ping_result = await self.ping_host(ip)
+            if ping_result is None:
+                ping_result = await self.ping_host(ip)
             result['icmp_reachable'] = ping_result['reachable']
             result['icmp_latency_ms'] = ping_result['latency_ms']
         
@@ -248,22 +767,17 @@ class NetworkScanner:
             
             # Port scan
             if scan_ports_list:
-                open_ports = await self.scan_ports(ip, scan_ports_list)
+                open_ports = await self.scan_ports(ip, scan_ports_list, connect_sem)
                 if open_ports:
                     result['open_ports'] = json.dumps(open_ports)
             
             # SNMP scan
             if scan_snmp:
-                # sysDescr
-                sysdescr = await self.snmp_get(ip, snmp_community, '1.3.6.1.2.1.1.1.0')
-                if sysdescr:
+                # sysDescr and sysName in one round trip
+                values = await self.snmp_get_many(ip, [SNMP_SYSDESCR_OID, SNMP_SYSNAME_OID], snmp_community)
+                if values and values[0]:
                     result['snmp_reachable'] = True
-                    result['snmp_sysdescr'] = sysdescr
-                    
-                    # sysName
-                    sysname = await self.snmp_get(ip, snmp_community, '1.3.6.1.2.1.1.5.0')
-                    if sysname:
-                        result['snmp_sysname'] = sysname.split('=')[-1].strip() if '=' in sysname else sysname
+                    result['snmp_sysdescr'], result['snmp_sysname'] = values
                 else:
                     result['snmp_reachable'] = False
         
@@ -308,65 +822,139 @@ class NetworkScanner:
         db.commit()
         
         results = []
-        scanned = 0
+        # The writer thread owns the session while hosts are scanned, and
+        # commits expire `job`, so read what the scans need up front
+        job_id, scan_icmp, scan_snmp = job.id, job.scan_icmp, job.scan_snmp
+        snmp_community = job.snmp_community or 'public'
+        
+        # One ICMP sweep up front instead of a ping per host scan
+        ping_results = await self.ping_many(hosts) if scan_icmp else {}
         
         # Scan hosts with concurrency limit
-        sem = asyncio.Semaphore(50)  # Max 50 concurrent scans
+        # Host scans and TCP probes get separate budgets; ICMP went out above
+        sem = asyncio.Semaphore(self.scan_concurrency)
+        connect_sem = asyncio.Semaphore(self.scan_concurrency)
+        async_progress_commit = db.get_bind().dialect.name == "postgresql"
+        # Every scanned host is queued (None if it didn't respond), then `finished`
+        queue: asyncio.Queue = asyncio.Queue(maxsize=RESULT_QUEUE_SIZE)
+        finished = object()
+        
+        def write_batch(rows: List[Dict[str, Any]], pct: Optional[int]) -> List[DiscoveryResult]:
+            """Runs in a worker thread, the only user of the session until scanning ends."""
+            inserted = []
+            if rows:
+                # Match responding hosts to known devices with one query per batch
+                existing = dict(db.execute(
+                    select(Device.ip, Device.id).where(Device.ip.in_([r['ip_address'] for r in rows]))
+                ).all())
+                for row in rows:
+                    row['device_id'] = existing.get(row['ip_address'])
+                    row['status'] = 'existing' if row['device_id'] else 'new'
+                inserted = db.scalars(insert(DiscoveryResult).returning(DiscoveryResult), rows).all()
+                db.commit()
+            if pct is not None:
+                # Own transaction, so relaxing durability never covers the results above
+                if async_progress_commit:
+                    # Progress is advisory: don't wait for the WAL flush on each update
+                    db.execute(text("SET LOCAL synchronous_commit = off"))
+                db.execute(
+                    update(DiscoveryJob).where(DiscoveryJob.id == job_id).values(progress_percent=pct)
+                )
+                db.commit()
+            return inserted
         
-        async def scan_with_progress(ip: str) -> Optional[DiscoveryResult]:
-            nonlocal scanned
+        async def write_results() -> None:
+            """Drain the queue, writing rows in batches of up to RESULT_INSERT_BATCH."""
+            loop = asyncio.get_running_loop()
+            scanned = 0
+            last_report = (0, time.monotonic())  # (percent, when) of the last progress write
+            while True:
+                rows = []
+                item = await queue.get()
+                deadline = loop.time() + RESULT_FLUSH_INTERVAL
+                while item is not finished:
+                    scanned += 1
+                    if item is not None:
+                        rows.append(item)
+                    if len(rows) >= RESULT_INSERT_BATCH:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), deadline - loop.time())
+                    except asyncio.TimeoutError:
+                        break
+                
+                pct = int((scanned / total_hosts) * 100)
+                reported_pct, reported_at = last_report
+                now = time.monotonic()
+                if pct == reported_pct or (
+                    pct - reported_pct < PROGRESS_MIN_STEP and now - reported_at < PROGRESS_MIN_INTERVAL
+                ):
+                    pct = None
+                else:
+                    last_report = (pct, now)
+                
+                if rows or pct is not None:
+                    write = asyncio.ensure_future(asyncio.to_thread(write_batch, rows, pct))
+                    try:
+                        results.extend(await asyncio.shield(write))
+                    except asyncio.CancelledError:
+                        # The thread can't be interrupted; let it release the session first
+                        await asyncio.wait({write})
+                        raise
+                if pct is not None and progress_callback:
+                    progress_callback(pct, f"Scanned {scanned}/{total_hosts}")
+                if item is finished:
+                    return
+        
+        async def scan_with_progress(ip: str) -> None:
             async with sem:
+                row = None
                 try:
                     scan_result = await self.scan_host(
                         ip,
-                        scan_icmp=job.scan_icmp,
-                        scan_snmp=job.scan_snmp,
-                        snmp_community=job.snmp_community or 'public',
-                        scan_ports_list=scan_ports
+                        scan_icmp=scan_icmp,
+                        scan_snmp=scan_snmp,
+                        snmp_community=snmp_community,
+                        scan_ports_list=scan_ports,
+                        ping_result=ping_results.get(ip),
+                        connect_sem=connect_sem
                     )
                     
                     # Only save if host responded
                     if scan_result.get('icmp_reachable') or scan_result.get('snmp_reachable'):
-                        # Check if device already exists
-                        existing_device = db.query(Device).filter(
-                            Device.ip_address == ip
-                        ).first()
-                        
-                        discovery_result = DiscoveryResult(
-                            job_id=job.id,
-                            ip_address=ip,
-                            hostname=scan_result.get('hostname'),
-                            icmp_reachable=scan_result.get('icmp_reachable'),
-                            icmp_latency_ms=scan_result.get('icmp_latency_ms'),
-                            snmp_reachable=scan_result.get('snmp_reachable'),
-                            snmp_sysname=scan_result.get('snmp_sysname'),
-                            snmp_sysdescr=scan_result.get('snmp_sysdescr'),
-                            open_ports=scan_result.get('open_ports'),
-                            status='existing' if existing_device else 'new',
-                            device_id=existing_device.id if existing_device else None
-                        )
-                        db.add(discovery_result)
-                        return discovery_result
-                    return None
-                    
+                        row = {
+                            'job_id': job_id,
+                            'ip_address': ip,
+                            'hostname': scan_result.get('hostname'),
+                            'icmp_reachable': scan_result.get('icmp_reachable'),
+                            'icmp_latency_ms': scan_result.get('icmp_latency_ms'),
+                            'snmp_reachable': scan_result.get('snmp_reachable'),
+                            'snmp_sysname': scan_result.get('snmp_sysname'),
+                            'snmp_sysdescr': scan_result.get('snmp_sysdescr'),
+                            'open_ports': scan_result.get('open_ports'),
+                        }
                 except Exception as e:
                     logger.error(f"Error scanning {ip}: {e}")
-                    return None
-                finally:
-                    scanned += 1
-                    pct = int((scanned / total_hosts) * 100)
-                    if pct != job.progress_percent:
-                        job.progress_percent = pct
-                        db.commit()
-                        if progress_callback:
-                            progress_callback(pct, f"Scanned {scanned}/{total_hosts}")
+            await queue.put(row)
+        
+        async def scan_all() -> None:
+            await asyncio.gather(*(scan_with_progress(ip) for ip in hosts))
+            await queue.put(finished)
         
         # Run all scans
+        writer = asyncio.create_task(write_results())
+        scanning = asyncio.create_task(scan_all())
         try:
-            scan_tasks = [scan_with_progress(ip) for ip in hosts]
-            scan_results = await asyncio.gather(*scan_tasks)
-            
-            results = [r for r in scan_results if r is not None]
+            try:
+                await asyncio.wait({writer, scanning}, return_when=asyncio.FIRST_EXCEPTION)
+            finally:
+                # Whichever failed, or our caller cancelling us, stops the other
+                for task in (writer, scanning):
+                    task.cancel()
+                await asyncio.gather(writer, scanning, return_exceptions=True)
+            for task in (writer, scanning):
+                if not task.cancelled():
+                    task.result()
             
             # Update job status
             job.status = 'completed'
@@ -377,6 +965,14 @@ class NetworkScanner:
             logger.info(f"Discovery job '{job.name}' completed: {len(results)} hosts found")
             
             return results
+        except asyncio.CancelledError:
+            db.rollback()
+            job.status = 'failed'
+            job.error_message = 'Discovery cancelled'
+            job.completed_at = datetime.utcnow()
+            db.commit()
+            logger.warning(f"Discovery job '{job.name}' cancelled")
+            raise
         except Exception as e:
             db.rollback()
             job.status = 'failed'
@@ -1,22 +1,85 @@
 """Template resolver service - Resolves inheritance and merges configurations."""
+import itertools
 import logging
-from typing import Optional, List, Dict, Any
+import os
+import time
+from typing import Optional, List, Dict, Any, Tuple
 from uuid import UUID
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, event, inspect, select
 
-from db.models import Template, TemplateItem, Device, HostGroup, device_template
+from db.models import (
+    Template, TemplateItem, Trigger, Device, HostGroup, device_template, device_hostgroup, template_hostgroup
+)
 
 logger = logging.getLogger(__name__)
 
 # Maximum inheritance depth to prevent infinite loops
 MAX_INHERITANCE_DEPTH = 10
 
+# Collections read while building a device's effective config
+_CONFIG_LOAD_OPTIONS = (selectinload(Template.items), selectinload(Template.triggers))
+
+# Resolved chains are shared by every device using a template. Commits in this
+# process invalidate immediately; the TTL bounds staleness from other workers.
+TEMPLATE_CHAIN_CACHE_TTL = float(os.getenv("TEMPLATE_CHAIN_CACHE_TTL", "60"))
+
+# (template names root→leaf, item key -> (enabled, item dict), trigger dicts)
+ChainSummary = Tuple[List[str], Dict[str, Tuple[bool, Dict[str, Any]]], List[Dict[str, Any]]]
+
+_template_generation = 0
+
+
+def invalidate_template_cache() -> None:
+    """Drop resolved template chains cached by every TemplateResolver."""
+    global _template_generation
+    _template_generation += 1
+
+
+# Trigger evaluation writes state columns constantly; only config columns matter here
+_TRIGGER_CONFIG_COLUMNS = ('name', 'expression', 'severity', 'enabled', 'template_id')
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_template_change(session, flush_context):
+    # Flushed rows aren't visible to other sessions yet; invalidate on commit
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (Template, TemplateItem)):
+            session.info['template_dirty'] = True
+            return
+        if isinstance(obj, Trigger):
+            state = inspect(obj)
+            if obj in session.new or obj in session.deleted or any(
+                state.attrs[column].history.has_changes() for column in _TRIGGER_CONFIG_COLUMNS
+            ):
+                session.info['template_dirty'] = True
+                return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_template_commit(session):
+    if session.info.pop('template_dirty', False):
+        invalidate_template_cache()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_template_change(session):
+    session.info.pop('template_dirty', None)
+
 
 class TemplateResolver:
     """Resolves template inheritance chains and merges configurations."""
     
-    def resolve_template_chain(self, template: Template, db: Session) -> List[Template]:
+    def __init__(self):
+        # template_id -> (generation, updated_at, expires_at, summary)
+        self._chain_cache: Dict[UUID, Tuple[int, Any, float, ChainSummary]] = {}
+    
+    def resolve_template_chain(
+        self,
+        template: Template,
+        db: Session,
+        templates_by_id: Optional[Dict[UUID, Template]] = None
+    ) -> List[Template]:
         """
         Walk the parent chain and return ordered list of templates.
         
@@ -26,6 +89,8 @@ class TemplateResolver:
         Args:
             template: Starting template
             db: Database session
+            templates_by_id: Preloaded templates (see load_template_chains);
+                parents missing from it are lazy-loaded
             
         Returns:
             List of templates from root parent to child
@@ -47,12 +112,41 @@ class TemplateResolver:
             
             visited.add(current.id)
             chain.append(current)
-            current = current.parent_template
+            if templates_by_id is not None and current.parent_template_id in templates_by_id:
+                current = templates_by_id[current.parent_template_id]
+            else:
+                current = current.parent_template
             depth += 1
         
         # Reverse so parent comes first (parent configs get overridden by child)
         return list(reversed(chain))
     
+    def load_template_chains(self, template_ids: List[UUID], db: Session) -> Dict[UUID, Template]:
+        """
+        Load templates and all of their ancestors, with items and triggers.
+        
+        The ancestor ids come from one recursive query (UNION, so circular
+        references terminate), and the templates from one more plus one
+        per eager-loaded collection, regardless of chain depth.
+        
+        Returns:
+            Dict mapping template id to Template
+        """
+        if not template_ids:
+            return {}
+        chain = select(Template.id, Template.parent_template_id).where(
+            Template.id.in_(template_ids)
+        ).cte("template_chain", recursive=True)
+        chain = chain.union(
+            select(Template.id, Template.parent_template_id).join(
+                chain, Template.id == chain.c.parent_template_id
+            )
+        )
+        templates = db.execute(
+            select(Template).where(Template.id.in_(select(chain.c.id))).options(*_CONFIG_LOAD_OPTIONS)
+        ).scalars().all()
+        return {t.id: t for t in templates}
+    
     def merge_template_items(self, templates: List[Template]) -> Dict[str, TemplateItem]:
         """
         Merge items from template chain, child overrides parent.
@@ -89,15 +183,16 @@ class TemplateResolver:
         Returns:
             Ordered list of templates (lower priority first, higher priority last)
         """
-        templates = []
-        seen_template_ids = set()
+        templates: Dict[UUID, Tuple[Template, int]] = {}  # template_id -> (template, priority)
         
         # 1. Templates from host groups (lower priority, applied first)
-        for hostgroup in device.host_groups:
-            for template in hostgroup.templates:
-                if template.id not in seen_template_ids:
-                    templates.append((template, 0))  # priority 0 for hostgroup
-                    seen_template_ids.add(template.id)
+        hostgroup_templates = db.query(Template).join(
+            template_hostgroup, template_hostgroup.c.template_id == Template.id
+        ).join(
+            device_hostgroup, device_hostgroup.c.hostgroup_id == template_hostgroup.c.hostgroup_id
+        ).filter(device_hostgroup.c.device_id == device.id)
+        for template in hostgroup_templates:
+            templates.setdefault(template.id, (template, 0))  # priority 0 for hostgroup
         
         # 2. Direct device assignments (higher priority, override hostgroup)
         # Query device_template table for assignments with priority
@@ -107,18 +202,47 @@ class TemplateResolver:
             ).order_by(device_template.c.priority.asc())
         ).fetchall()
         
-        for assignment in direct_assignments:
-            template = db.query(Template).filter(Template.id == assignment.template_id).first()
-            if template:
-                if template.id in seen_template_ids:
-                    # Remove from lower priority position
-                    templates = [(t, p) for t, p in templates if t.id != template.id]
-                templates.append((template, assignment.priority + 100))  # +100 to ensure above hostgroup
-                seen_template_ids.add(template.id)
+        if direct_assignments:
+            assigned = {
+                t.id: t for t in db.query(Template).filter(
+                    Template.id.in_([a.template_id for a in direct_assignments])
+                )
+            }
+            for assignment in direct_assignments:
+                template = assigned.get(assignment.template_id)
+                if template:
+                    # Move out of its lower priority position
+                    templates.pop(template.id, None)
+                    templates[template.id] = (template, assignment.priority + 100)  # +100 to ensure above hostgroup
         
         # Sort by priority and return just templates
-        templates.sort(key=lambda x: x[1])
-        return [t for t, _ in templates]
+        return [t for t, _ in sorted(templates.values(), key=lambda x: x[1])]
+    
+    def _summarize_chain(self, chain: List[Template]) -> ChainSummary:
+        """Plain-data view of a resolved chain, safe to reuse across sessions."""
+        items = {
+            key: (item.enabled, {
+                'key': item.key,
+                'name': item.name,
+                'value_type': item.value_type,
+                'units': item.units,
+                'update_interval': item.update_interval
+            })
+            for key, item in self.merge_template_items(chain).items()
+        }
+        triggers = [
+            {
+                'id': str(trigger.id),
+                'name': trigger.name,
+                'expression': trigger.expression,
+                'severity': trigger.severity,
+                'template': t.name
+            }
+            for t in chain
+            for trigger in t.triggers
+            if trigger.enabled
+        ]
+        return [t.name for t in chain], items, triggers
     
     def get_effective_config(self, device: Device, db: Session) -> Dict[str, Any]:
         """
@@ -144,47 +268,46 @@ class TemplateResolver:
             'hostname': device.hostname
         }
         
-        final_items = {}  # key -> TemplateItem
+        final_items = {}  # key -> (enabled, item dict)
         all_triggers = []
         
-        # Get all templates for this device
+        # Get all templates for this device; only chains not cached are loaded
         device_templates = self.get_device_templates(device, db)
+        # Captured before loading: chains read now are stale once a later commit bumps it
+        generation = _template_generation
+        now = time.monotonic()
+        resolved = {}
+        for template in device_templates:
+            cached = self._chain_cache.get(template.id)
+            if (cached and cached[0] == generation and cached[1] == template.updated_at
+                    and cached[2] > now):
+                resolved[template.id] = cached[3]
+        missing = [t.id for t in device_templates if t.id not in resolved]
+        templates_by_id = self.load_template_chains(missing, db) if missing else {}
         
         for template in device_templates:
-            # Resolve inheritance chain for each template
-            try:
-                chain = self.resolve_template_chain(template, db)
-                config['templates'].extend([t.name for t in chain if t.name not in config['templates']])
-                
-                # Merge items from chain
-                chain_items = self.merge_template_items(chain)
-                final_items.update(chain_items)
-                
-                # Collect triggers from chain
-                for t in chain:
-                    for trigger in t.triggers:
-                        if trigger.enabled:
-                            all_triggers.append({
-                                'id': str(trigger.id),
-                                'name': trigger.name,
-                                'expression': trigger.expression,
-                                'severity': trigger.severity,
-                                'template': t.name
-                            })
-            except ValueError as e:
-                logger.error(f"Error resolving template chain for {template.name}: {e}")
-                continue
+            entry = resolved.get(template.id)
+            if entry is None:
+                # Resolve inheritance chain for each template
+                try:
+                    chain = self.resolve_template_chain(template, db, templates_by_id)
+                except ValueError as e:
+                    logger.error(f"Error resolving template chain for {template.name}: {e}")
+                    continue
+                entry = self._summarize_chain(chain)
+                self._chain_cache[template.id] = (
+                    generation, template.updated_at, now + TEMPLATE_CHAIN_CACHE_TTL, entry
+                )
+            
+            names, chain_items, chain_triggers = entry
+            config['templates'].extend([name for name in names if name not in config['templates']])
+            final_items.update(chain_items)
+            all_triggers.extend(dict(trigger) for trigger in chain_triggers)
         
         # Convert items to serializable format
-        for key, item in final_items.items():
-            if item.enabled:
-                config['items'].append({
-                    'key': item.key,
-                    'name': item.name,
-                    'value_type': item.value_type,
-                    'units': item.units,
-                    'update_interval': item.update_interval
-                })
+        for key, (enabled, item) in final_items.items():
+            if enabled:
+                config['items'].append(dict(item))
         
         config['triggers'] = all_triggers
         
@@ -1,60 +1,170 @@
+import os
+
+# Minimum bcrypt cost under test; must be set before config is imported
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
 import pytest
 import secrets
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, insert
 from sqlalchemy.orm import sessionmaker
-from db.models import Base, get_db, User
+from sqlalchemy.pool import StaticPool
+from db.models import Base, get_db, Device, User
 from main import app
-from services.auth_service import get_password_hash
+from services.auth_service import (
+    create_access_token, create_refresh_token, get_password_hash, hash_device_token
+)
 from config import settings
 
-# Test database (SQLite in-memory)
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Fixtures that put a test on the database / HTTP stack
+_INTEGRATION_FIXTURES = {"client", "authenticated_client", "module_client", "db"}
 
 
-# Override database dependency
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
-        yield db
-    finally:
-        db.close()
+def pytest_collection_modifyitems(items):
+    """Tier tests by the fixtures they use: `pytest -m unit` skips the database and API."""
+    for item in items:
+        if _INTEGRATION_FIXTURES.intersection(getattr(item, "fixturenames", ())):
+            item.add_marker(pytest.mark.integration)
+        else:
+            item.add_marker(pytest.mark.unit)
 
 
-app.dependency_overrides[get_db] = override_get_db
+# Test database (SQLite in-memory, one connection shared by every session)
+SQLALCHEMY_DATABASE_URL = "sqlite://"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
+)
 
 
-@pytest.fixture(scope="function")
-def client():
-    """Create test client with fresh database"""
+# pysqlite's own transaction handling breaks SAVEPOINT; let SQLAlchemy emit BEGIN
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+    # Enforce foreign keys and ON DELETE CASCADE like the app engine does
+    dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+
+@event.listens_for(engine, "begin")
+def _emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+# Sessions join the per-test transaction; commit() only releases a SAVEPOINT
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, join_transaction_mode="create_savepoint")
+
+# Hash the seeded admin password once per run
+_ADMIN_HASH = get_password_hash("admin123")
+
+
+@pytest.fixture(scope="session")
+def _schema():
+    """Create the schema and default admin user once for the whole run.
+    
+    Yields the admin's id and tokens, issued here so they outlive every
+    test's rollback; see admin_id and admin_tokens.
+    """
     Base.metadata.create_all(bind=engine)
+    with TestingSessionLocal(bind=engine) as db:
+        admin = User(username="admin", password_hash=_ADMIN_HASH, role="admin")
+        db.add(admin)
+        db.commit()
+        admin_id = admin.id
+        tokens = {
+            "access_token": create_access_token(
+                data={"sub": str(admin.id), "username": admin.username, "role": admin.role}
+            ),
+            "refresh_token": create_refresh_token(admin.id, db),
+        }
+    yield admin_id, tokens
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="session")
+def admin_tokens(_schema):
+    """Admin access/refresh tokens shared by the whole run.
+    
+    Saves a login (and its bcrypt check) per test; tests that exercise
+    login, refresh or logout call the endpoints themselves.
+    """
+    return _schema[1]
 
-    # Security knobs for tests
+
+@pytest.fixture(scope="session")
+def admin_id(_schema):
+    """Id of the seeded admin user, for tests that act on that row."""
+    return _schema[0]
+
+
+@pytest.fixture(scope="session")
+def _test_client(_schema):
+    return TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def _security_settings():
+    """Security knobs for tests"""
     settings.DEVICE_REGISTRATION_MODE = "token"
     settings.DEVICE_REGISTRATION_REQUIRE_TOKEN = True
     settings.DEVICE_REGISTRATION_TOKEN = secrets.token_hex(32)
     settings.DEVICE_HEARTBEAT_REQUIRE_TOKEN = True
 
-    # Seed default admin user for auth tests
-    db = TestingSessionLocal()
+
+@pytest.fixture(scope="module")
+def _connection(_schema):
+    """Connection in a transaction that is rolled back after each module.
+    
+    Module-scoped fixtures can create shared rows through it; see _isolated
+    for the per-test reset.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+
+    # Override database dependency
+    def override_get_db():
+        db = TestingSessionLocal(bind=connection)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
     try:
-        existing = db.query(User).filter(User.username == "admin").first()
-        if not existing:
-            db.add(User(username="admin", password_hash=get_password_hash("admin123"), role="admin"))
-            db.commit()
+        yield connection
     finally:
-        db.close()
+        app.dependency_overrides.pop(get_db, None)
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(scope="function")
+def _isolated(_connection):
+    """Roll back everything a test wrote, keeping module-scoped rows."""
+    savepoint = _connection.begin_nested()
+    try:
+        yield _connection
+    finally:
+        if savepoint.is_active:
+            savepoint.rollback()
 
-    yield TestClient(app)
-    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(scope="module")
+def module_client(_test_client, _connection, _security_settings):
+    """Test client for module-scoped fixtures; its writes last for the module"""
+    return _test_client
 
 
 @pytest.fixture(scope="function")
-def db():
+def client(_test_client, _isolated, _security_settings):
+    """Shared test client over a database that is reset after each test"""
+    _test_client.headers = {}
+    _test_client.cookies.clear()
+    return _test_client
+
+
+@pytest.fixture(scope="function")
+def db(_isolated):
     """Direct DB session fixture for tests that need DB access."""
-    session = TestingSessionLocal()
+    session = TestingSessionLocal(bind=_isolated)
     try:
         yield session
     finally:
@@ -62,18 +172,103 @@ def db():
 
 
 @pytest.fixture(scope="function")
-def authenticated_client(client):
+def make_device(db):
+    """Insert a device directly; returns (device, token) for tests where registration isn't under test."""
+    def _make_device(hostname="test-server", ip="192.168.1.100", status="offline"):
+        token = f"dev_{secrets.token_urlsafe(16)}"
+        device = Device(hostname=hostname, ip=ip, status=status, token_hash=hash_device_token(token))
+        db.add(device)
+        db.commit()
+        return device, token
+    return _make_device
+
+
+@pytest.fixture(scope="function")
+def make_user(db):
+    """Insert a user directly (password "admin123") for tests where creation isn't under test."""
+    def _make_user(username="testuser", role="viewer"):
+        user = User(username=username, password_hash=_ADMIN_HASH, role=role)
+        db.add(user)
+        db.commit()
+        return user
+    return _make_user
+
+
+@pytest.fixture(scope="function")
+def seed_rows(db):
+    """Insert rows for list/filter tests in one statement instead of a POST per row."""
+    def _seed_rows(model, rows):
+        db.execute(insert(model), rows)
+        db.commit()
+    return _seed_rows
+
+
+@pytest.fixture(scope="function")
+def authenticated_client(client, admin_tokens):
     """Create authenticated test client"""
-    # Login with default admin user
-    response = client.post(
-        "/api/v1/auth/login",
-        json={"username": "admin", "password": "admin123"}
-    )
-    assert response.status_code == 200
-    tokens = response.json()
+    client.headers = {"Authorization": f"Bearer {admin_tokens['access_token']}"}
+    client.refresh_token = admin_tokens["refresh_token"]
     
-    # Set auth header
-    client.headers = {"Authorization": f"Bearer {tokens['access_token']}"}
-    client.refresh_token = tokens["refresh_token"]
+    return client
+
+
+@pytest.fixture(scope="function")
+def viewer_client(client, make_user):
+    """Test client authenticated as a viewer-role user.
     
+    Wraps the same TestClient as authenticated_client; don't request both.
+    """
+    viewer = make_user(username="viewer", role="viewer")
+    token = create_access_token(data={"sub": str(viewer.id), "username": viewer.username, "role": viewer.role})
+    client.headers = {"Authorization": f"Bearer {token}"}
     return client
+
+
+class FakeResponse:
+    """Canned HTTP response exposing only what the services read."""
+
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeAsyncClient:
+    """Stand-in for httpx.AsyncClient; records requests and answers with `payload`."""
+
+    payload = None
+
+    def __init__(self, *args, **kwargs):
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def get(self, url, **kwargs):
+        self.calls.append(("GET", url, kwargs))
+        return FakeResponse(self.payload)
+
+    async def post(self, url, **kwargs):
+        self.calls.append(("POST", url, kwargs))
+        return FakeResponse(self.payload)
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture(scope="function")
+def fake_vm(monkeypatch):
+    """Replace httpx.AsyncClient with FakeAsyncClient; call with the VictoriaMetrics result vector."""
+    monkeypatch.setattr("httpx.AsyncClient", FakeAsyncClient)
+
+    def _fake_vm(result):
+        monkeypatch.setattr(FakeAsyncClient, "payload", {"status": "success", "data": {"result": result}})
+    return _fake_vm
@@ -1,6 +1,44 @@
 """Tests for Actions API endpoints."""
 import pytest
-from uuid import uuid4
+from uuid import UUID
+from sqlalchemy import insert
+
+from db.models import Action, ActionOperation
+
+# Never matches a real row
+FAKE_ID = UUID("00000000-0000-0000-0000-000000000000")
+
+
+@pytest.fixture
+def make_action(db):
+    """Insert an action directly and return its id, for tests where creation isn't under test."""
+    def _make_action(name="Test Action", action_type="notification"):
+        action = Action(name=name, action_type=action_type)
+        db.add(action)
+        db.commit()
+        return str(action.id)
+    return _make_action
+
+
+@pytest.fixture
+def make_operation(db):
+    """Insert an operation on an action directly and return its id."""
+    def _make_operation(action_id, operation_type="send_email", step_number=1):
+        operation = ActionOperation(action_id=UUID(action_id), operation_type=operation_type, step_number=step_number)
+        db.add(operation)
+        db.commit()
+        return str(operation.id)
+    return _make_operation
+
+
+@pytest.fixture
+def seeded_actions(db):
+    """Two actions inserted directly, for tests that only list them."""
+    db.execute(insert(Action), [
+        {"name": "Notify", "action_type": "notification"},
+        {"name": "Script", "action_type": "script"},
+    ])
+    db.commit()
 
 
 class TestActionsAPI:
@@ -40,33 +78,23 @@ class TestActionsAPI:
         assert data["actions"] == []
         assert data["total"] == 0
 
-    def test_list_actions_with_data(self, authenticated_client):
+    def test_list_actions_with_data(self, authenticated_client, seeded_actions):
         """Test listing actions with data."""
-        authenticated_client.post("/api/v1/actions", json={"name": "Action A"})
-        authenticated_client.post("/api/v1/actions", json={"name": "Action B"})
-
         response = authenticated_client.get("/api/v1/actions")
         assert response.status_code == 200
         data = response.json()
         assert data["total"] == 2
 
-    def test_list_actions_filter_type(self, authenticated_client):
+    def test_list_actions_filter_type(self, authenticated_client, seeded_actions):
         """Test filtering actions by type."""
-        authenticated_client.post("/api/v1/actions", json={"name": "Notify", "action_type": "notification"})
-        authenticated_client.post("/api/v1/actions", json={"name": "Script", "action_type": "script"})
-
         response = authenticated_client.get("/api/v1/actions?action_type=notification")
         assert response.status_code == 200
         data = response.json()
         assert data["total"] == 1
 
-    def test_get_action_success(self, authenticated_client):
+    def test_get_action_success(self, authenticated_client, make_action):
         """Test getting a specific action by ID."""
-        create_resp = authenticated_client.post(
-            "/api/v1/actions",
-            json={"name": "Test Get", "action_type": "remediation"}
-        )
-        action_id = create_resp.json()["id"]
+        action_id = make_action(name="Test Get", action_type="remediation")
 
         response = authenticated_client.get(f"/api/v1/actions/{action_id}")
         assert response.status_code == 200
@@ -77,17 +105,12 @@ class TestActionsAPI:
 
     def test_get_action_not_found(self, authenticated_client):
         """Test getting a non-existent action."""
-        fake_id = uuid4()
-        response = authenticated_client.get(f"/api/v1/actions/{fake_id}")
+        response = authenticated_client.get(f"/api/v1/actions/{FAKE_ID}")
         assert response.status_code == 404
 
-    def test_update_action_success(self, authenticated_client):
+    def test_update_action_success(self, authenticated_client, make_action):
         """Test updating an action."""
-        create_resp = authenticated_client.post(
-            "/api/v1/actions",
-            json={"name": "Original", "action_type": "notification"}
-        )
-        action_id = create_resp.json()["id"]
+        action_id = make_action(name="Original", action_type="notification")
 
         response = authenticated_client.put(
             f"/api/v1/actions/{action_id}",
@@ -98,13 +121,9 @@ class TestActionsAPI:
         assert data["name"] == "Updated"
         assert data["action_type"] == "script"
 
-    def test_delete_action_success(self, authenticated_client):
+    def test_delete_action_success(self, authenticated_client, make_action):
         """Test deleting an action."""
-        create_resp = authenticated_client.post(
-            "/api/v1/actions",
-            json={"name": "To Delete"}
-        )
-        action_id = create_resp.json()["id"]
+        action_id = make_action(name="To Delete")
 
         response = authenticated_client.delete(f"/api/v1/actions/{action_id}")
         assert response.status_code == 204
@@ -117,14 +136,9 @@ class TestActionsAPI:
 class TestActionOperationsAPI:
     """Tests for action operations endpoints."""
 
-    def test_create_action_operation_success(self, authenticated_client):
+    def test_create_action_operation_success(self, authenticated_client, make_action):
         """Test adding an operation to an action."""
-        # Create action first
-        create_resp = authenticated_client.post(
-            "/api/v1/actions",
-            json={"name": "Action With Operations"}
-        )
-        action_id = create_resp.json()["id"]
+        action_id = make_action(name="Action With Operations")
 
         # Add operation
         response = authenticated_client.post(
@@ -139,14 +153,9 @@ class TestActionOperationsAPI:
         assert data["operation_type"] == "send_email"
         assert data["step_number"] == 1
 
-    def test_create_operation_invalid_type(self, authenticated_client):
+    def test_create_operation_invalid_type(self, authenticated_client, make_action):
         """Test adding an operation with invalid type fails."""
-        # Create action
-        create_resp = authenticated_client.post(
-            "/api/v1/actions",
-            json={"name": "Test Action"}
-        )
-        action_id = create_resp.json()["id"]
+        action_id = make_action(name="Test Action")
 
         response = authenticated_client.post(
             f"/api/v1/actions/{action_id}/operations",
@@ -154,14 +163,9 @@ class TestActionOperationsAPI:
         )
         assert response.status_code == 400
 
-    def test_operation_count_updates(self, authenticated_client):
+    def test_operation_count_updates(self, authenticated_client, make_action):
         """Test that operation_count is updated when operations are added."""
-        # Create action
-        create_resp = authenticated_client.post(
-            "/api/v1/actions",
-            json={"name": "Count Test"}
-        )
-        action_id = create_resp.json()["id"]
+        action_id = make_action(name="Count Test")
 
         # Add operations
         authenticated_client.post(
@@ -180,21 +184,31 @@ class TestActionOperationsAPI:
         assert data["operation_count"] == 2
         assert len(data["operations"]) == 2
 
-    def test_delete_action_operation_success(self, authenticated_client):
-        """Test deleting an operation from an action."""
-        # Create action
-        create_resp = authenticated_client.post(
-            "/api/v1/actions",
-            json={"name": "Delete Op Test"}
-        )
-        action_id = create_resp.json()["id"]
+    def test_action_detail_query_count(self, authenticated_client, make_action, make_operation, db):
+        """Operations are loaded in one query, however many there are."""
+        from sqlalchemy import event
 
-        # Add operation
-        op_resp = authenticated_client.post(
-            f"/api/v1/actions/{action_id}/operations",
-            json={"operation_type": "webhook"}
-        )
-        op_id = op_resp.json()["id"]
+        action_id = make_action(name="Query Count")
+        for step in range(1, 6):
+            make_operation(action_id, step_number=step)
+
+        statements = []
+        # Savepoints come from the test transaction, not the endpoint
+        listener = lambda *args: args[2].startswith(("SAVEPOINT", "RELEASE", "ROLLBACK")) or statements.append(args[2])
+        event.listen(db.get_bind(), "before_cursor_execute", listener)
+        try:
+            response = authenticated_client.get(f"/api/v1/actions/{action_id}")
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+        assert len(response.json()["operations"]) == 5
+        # Current user, the action, its operations
+        assert len(statements) <= 3, statements
+
+    def test_delete_action_operation_success(self, authenticated_client, make_action, make_operation):
+        """Test deleting an operation from an action."""
+        action_id = make_action(name="Delete Op Test")
+        op_id = make_operation(action_id, operation_type="webhook")
 
         # Delete operation
         response = authenticated_client.delete(f"/api/v1/actions/{action_id}/operations/{op_id}")
@@ -204,20 +218,10 @@ class TestActionOperationsAPI:
         action_resp = authenticated_client.get(f"/api/v1/actions/{action_id}")
         assert action_resp.json()["operation_count"] == 0
 
-    def test_delete_action_cascades_operations(self, authenticated_client):
+    def test_delete_action_cascades_operations(self, authenticated_client, make_action, make_operation):
         """Test that deleting an action also deletes its operations."""
-        # Create action
-        create_resp = authenticated_client.post(
-            "/api/v1/actions",
-            json={"name": "Cascade Test"}
-        )
-        action_id = create_resp.json()["id"]
-
-        # Add operation
-        authenticated_client.post(
-            f"/api/v1/actions/{action_id}/operations",
-            json={"operation_type": "send_email"}
-        )
+        action_id = make_action(name="Cascade Test")
+        make_operation(action_id)
 
         # Delete action
         response = authenticated_client.delete(f"/api/v1/actions/{action_id}")
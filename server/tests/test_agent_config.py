@@ -1,7 +1,5 @@
 """Tests for agent config endpoint."""
-import pytest
 from fastapi.testclient import TestClient
-from db.models import Device, HostGroup, Template, TemplateItem
 
 
 class TestAgentConfig:
@@ -13,20 +11,10 @@ class TestAgentConfig:
         assert response.status_code == 404
         assert "not found" in response.json()["detail"].lower()
 
-    def test_get_agent_config_returns_empty_items(self, authenticated_client: TestClient, db):
+    def test_get_agent_config_returns_empty_items(self, authenticated_client: TestClient, make_device):
         """Test config returns empty items for device without host groups."""
-        from db.models import Device
-        import hashlib
-        
         # Create a device without any host groups
-        device = Device(
-            hostname="lonely-agent",
-            ip="192.168.1.200",
-            token_hash=hashlib.sha256(b"test-token-lonely").hexdigest()
-        )
-        db.add(device)
-        db.commit()
-        db.refresh(device)
+        device, _ = make_device(hostname="lonely-agent", ip="192.168.1.200")
         
         response = authenticated_client.get(f"/api/v1/templates/agents/{device.id}/config")
         assert response.status_code == 200
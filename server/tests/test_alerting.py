@@ -1,72 +1,145 @@
 """Tests for Alerting Engine."""
 import pytest
-from unittest.mock import AsyncMock, patch, MagicMock
+from unittest.mock import patch
 from decimal import Decimal
 from fastapi.testclient import TestClient
 
 from db.models import Trigger, AlertEvent, Template
 
 
+@pytest.fixture(scope="module")
+def threshold_evaluator():
+    """One evaluator shared by the stateless threshold checks."""
+    import asyncio
+    from services.alerting import TriggerEvaluator
+
+    evaluator = TriggerEvaluator()
+    yield evaluator
+    asyncio.run(evaluator.aclose())
+
+
 class TestAlertingService:
     """Test TriggerEvaluator service."""
 
-    @pytest.mark.asyncio
-    async def test_parse_threshold_greater_than(self):
-        """Test > threshold parsing."""
-        from services.alerting import TriggerEvaluator
-        
+    @pytest.mark.parametrize("expression,value,expected", [
+        ("cpu_percent > 90", 95.0, "PROBLEM"),
+        ("cpu_percent > 90", 85.0, "OK"),
+        ("cpu_percent > 90", 90.0, "OK"),  # at threshold: not greater
+        ("memory >= 80", 80.0, "PROBLEM"),
+        ("memory >= 80", 79.9, "OK"),
+        ("disk_free < 10", 5.0, "PROBLEM"),
+        ("disk_free < 10", 15.0, "OK"),
+    ])
+    def test_parse_threshold(self, threshold_evaluator, expression, value, expected):
+        """Test threshold parsing for each comparison operator."""
+        assert threshold_evaluator.parse_threshold(expression, value) == expected
+
+    def test_parse_threshold_reuses_compiled_expression(self):
+        """Expressions are compiled once and reused across evaluations."""
+        from services.alerting import TriggerEvaluator, compile_threshold
+
         evaluator = TriggerEvaluator()
-        
-        # Value above threshold -> PROBLEM
-        assert evaluator.parse_threshold("cpu_percent > 90", 95.0) == "PROBLEM"
-        # Value below threshold -> OK
-        assert evaluator.parse_threshold("cpu_percent > 90", 85.0) == "OK"
-        # Value at threshold -> OK (not greater)
-        assert evaluator.parse_threshold("cpu_percent > 90", 90.0) == "OK"
+        compile_threshold.cache_clear()
+
+        assert evaluator.parse_threshold("status == 1", 1.0) == "PROBLEM"
+        assert evaluator.parse_threshold("status == 1", 0.0) == "OK"
+        info = compile_threshold.cache_info()
+        assert (info.misses, info.hits, info.currsize) == (1, 1, 1)
+        assert info.maxsize == 4096
+
+        # No threshold: any non-zero value is PROBLEM
+        assert evaluator.parse_threshold("agent_down", 1.0) == "PROBLEM"
+        assert evaluator.parse_threshold("agent_down", 0.0) == "OK"
 
     @pytest.mark.asyncio
-    async def test_parse_threshold_greater_equal(self):
-        """Test >= threshold parsing."""
+    async def test_query_vm_returns_value(self, fake_vm):
+        """Test VictoriaMetrics query parsing."""
         from services.alerting import TriggerEvaluator
         
-        evaluator = TriggerEvaluator()
-        
-        assert evaluator.parse_threshold("memory >= 80", 80.0) == "PROBLEM"
-        assert evaluator.parse_threshold("memory >= 80", 79.9) == "OK"
+        fake_vm([{"value": [1234567890, "42.5"]}])
+        evaluator = TriggerEvaluator("http://localhost:9090")
+
+        value = await evaluator.query_vm("test_metric > 10")
+        second = await evaluator.query_vm("test_metric > 10")
+        assert value == 42.5
+        assert second == 42.5
+        # Both queries go through the same shared client
+        assert [method for method, _, _ in evaluator._client.calls] == ["GET", "GET"]
+
+        await evaluator.aclose()
 
     @pytest.mark.asyncio
-    async def test_parse_threshold_less_than(self):
-        """Test < threshold parsing."""
+    async def test_evaluate_all_triggers_batches_vm_query(self, client, db, fake_vm):
+        """All trigger metrics are fetched with one VictoriaMetrics query."""
         from services.alerting import TriggerEvaluator
-        
+
+        db.add_all([
+            Trigger(name="CPU", expression="cpu_percent > 90", severity="high"),
+            Trigger(name="Disk", expression="disk_free < 10", severity="high"),
+            Trigger(name="No data", expression="missing_metric > 1", severity="info"),
+        ])
+        db.commit()
+
+        fake_vm([
+            {"metric": {"__name__": "cpu_percent"}, "value": [1234567890, "95"]},
+            {"metric": {"__name__": "disk_free"}, "value": [1234567890, "50"]},
+        ])
+        evaluator = TriggerEvaluator("http://localhost:9090")
+
+        events = await evaluator.evaluate_all_triggers(db)
+
+        (method, _, kwargs), = evaluator._client.calls
+        assert method == "POST"
+        query = kwargs["data"]["query"]
+        assert query == '{__name__=~"cpu_percent|disk_free|missing_metric"}'
+        assert [e.status for e in events] == ["PROBLEM"]
+        assert db.query(AlertEvent).count() == 1
+
+        await evaluator.aclose()
+
+    @pytest.mark.asyncio
+    async def test_enabled_triggers_cached_until_invalidated(self, client, db):
+        """The trigger list is reused between cycles until triggers change."""
+        from services.alerting import TriggerEvaluator, invalidate_trigger_cache
+
+        db.add(Trigger(name="CPU", expression="cpu_percent > 90", severity="high"))
+        db.commit()
+
         evaluator = TriggerEvaluator()
-        
-        assert evaluator.parse_threshold("disk_free < 10", 5.0) == "PROBLEM"
-        assert evaluator.parse_threshold("disk_free < 10", 15.0) == "OK"
+        first = evaluator.get_enabled_triggers(db)
+        db.commit()  # cached rows must survive commits on the loading session
+        assert [t.name for t in first] == ["CPU"]
+        assert first[0].expression == "cpu_percent > 90"
+
+        db.add(Trigger(name="Disk", expression="disk_free < 10", severity="high"))
+        db.commit()
+        assert evaluator.get_enabled_triggers(db) is first
+
+        invalidate_trigger_cache()
+        assert sorted(t.name for t in evaluator.get_enabled_triggers(db)) == ["CPU", "Disk"]
+
+        await evaluator.aclose()
+
 
     @pytest.mark.asyncio
-    async def test_query_vm_returns_value(self):
-        """Test VictoriaMetrics query parsing."""
+    async def test_evaluate_trigger_uses_precomputed_suppressed_set(self):
+        """A precomputed maintenance set replaces the per-device lookup."""
         from services.alerting import TriggerEvaluator
-        
-        evaluator = TriggerEvaluator("http://localhost:9090")
-        
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = {
-                "status": "success",
-                "data": {"result": [{"value": [1234567890, "42.5"]}]}
-            }
-            mock_response.raise_for_status = MagicMock()
-            
-            mock_client_instance = AsyncMock()
-            mock_client_instance.get = AsyncMock(return_value=mock_response)
-            mock_client.return_value.__aenter__ = AsyncMock(return_value=mock_client_instance)
-            mock_client.return_value.__aexit__ = AsyncMock()
-            
-            value = await evaluator.query_vm("test_metric > 10")
-            assert value == 42.5
+
+        evaluator = TriggerEvaluator()
+        trigger = Trigger(name="CPU", expression="cpu_percent > 90", severity="high")
+
+        with patch("services.alerting.maintenance_service.is_device_in_maintenance") as lookup:
+            assert await evaluator.evaluate_trigger(
+                None, trigger, device_id="dev-1", value=95.0, commit=False, suppressed={"dev-1"}
+            ) is None
+            event = await evaluator.evaluate_trigger(
+                None, trigger, device_id="dev-2", value=95.0, commit=False, suppressed={"dev-1"}
+            )
+        lookup.assert_not_called()
+        assert event.status == "PROBLEM"
+
+        await evaluator.aclose()
 
 
 class TestAlertsAPI:
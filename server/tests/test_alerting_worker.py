@@ -0,0 +1,39 @@
+"""Tests for the alerting background worker."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+
+class TestAlertingLoop:
+    """Test tick scheduling in alerting_loop."""
+
+    @pytest.mark.asyncio
+    async def test_ticks_keep_fixed_schedule(self, monkeypatch):
+        import workers.alerting_worker as module
+
+        clock = [0.0]
+        sleeps = []
+        # Second cycle overruns the interval; the third starts right after it
+        durations = [15.0, 75.0, 5.0]
+
+        class Evaluator:
+            async def evaluate_all_triggers(self, db):
+                clock[0] += durations.pop(0)
+                return []
+
+        async def sleep(delay):
+            sleeps.append(delay)
+            clock[0] += delay
+            if len(sleeps) == 2:
+                raise asyncio.CancelledError
+
+        monkeypatch.setattr(module, "ALERTING_INTERVAL", 60)
+        monkeypatch.setattr(module, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+        monkeypatch.setattr(module, "_sleep", sleep)
+        monkeypatch.setattr(module, "SessionLocal", lambda: SimpleNamespace(close=lambda: None))
+
+        with pytest.raises(asyncio.CancelledError):
+            await module.alerting_loop(Evaluator())
+
+        assert sleeps == [45.0, 55.0]
@@ -80,3 +80,37 @@ def test_protected_endpoint_with_invalid_token(client):
     client.headers = {"Authorization": "Bearer invalid_token"}
     response = client.get("/api/v1/devices")
     assert response.status_code == 401
+
+
+def test_refresh_token_stored_as_digest(client, db):
+    """Refresh tokens are persisted as a SHA-256 digest, never in the clear"""
+    import hashlib
+    from db.models import RefreshToken
+
+    # The shared admin_tokens fixture has already stored one
+    issued_before = {t.id for t in db.query(RefreshToken)}
+    login_response = client.post(
+        "/api/v1/auth/login",
+        json={"username": "admin", "password": "admin123"}
+    )
+    refresh_token = login_response.json()["refresh_token"]
+
+    stored, = [t for t in db.query(RefreshToken) if t.id not in issued_before]
+    assert stored.token_hash == hashlib.sha256(refresh_token.encode("utf-8")).hexdigest()
+    assert stored.token_hash != refresh_token
+
+
+def test_access_token_claims_use_epoch_seconds():
+    """exp/iat are integer epoch seconds taken from the current clock"""
+    import time
+    from datetime import timedelta
+    from config import settings
+    from services.auth_service import create_access_token, verify_token
+
+    before = int(time.time())
+    payload = verify_token(create_access_token({"sub": "admin"}))
+    assert before <= payload["iat"] <= int(time.time())
+    assert payload["exp"] - payload["iat"] == settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    payload = verify_token(create_access_token({"sub": "admin"}, expires_delta=timedelta(minutes=5)))
+    assert payload["exp"] - payload["iat"] == 300
@@ -1,5 +1,20 @@
+import pytest
+
 from config import settings
 
+
+@pytest.fixture(scope="module")
+def registered_device(module_client):
+    """One device registered for the whole module; read-only tests share it."""
+    response = module_client.post(
+        "/api/v1/devices/register",
+        headers={"X-Registration-Token": settings.DEVICE_REGISTRATION_TOKEN},
+        json={"hostname": "test-server", "ip": "192.168.1.100", "os": "Ubuntu 22.04"}
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
 def test_register_device(client):
     """Test device registration"""
     response = client.post(
@@ -19,19 +34,8 @@ def test_register_device(client):
     assert data["token"].startswith("dev_")
 
 
-def test_list_devices(authenticated_client):
+def test_list_devices(registered_device, authenticated_client):
     """Test listing devices (requires auth)"""
-    # Register a device first
-    device_response = authenticated_client.post(
-        "/api/v1/devices/register",
-        headers={"X-Registration-Token": settings.DEVICE_REGISTRATION_TOKEN},
-        json={
-            "hostname": "test-server",
-            "ip": "192.168.1.100"
-        }
-    )
-    assert device_response.status_code == 201
-    
     # List devices
     response = authenticated_client.get("/api/v1/devices")
     
@@ -42,15 +46,9 @@ def test_list_devices(authenticated_client):
     assert data["total"] >= 1
 
 
-def test_get_device_details(authenticated_client):
+def test_get_device_details(registered_device, authenticated_client):
     """Test getting device details"""
-    # Register device
-    register_response = authenticated_client.post(
-        "/api/v1/devices/register",
-        headers={"X-Registration-Token": settings.DEVICE_REGISTRATION_TOKEN},
-        json={"hostname": "test-server", "ip": "192.168.1.100"}
-    )
-    device_id = register_response.json()["device_id"]
+    device_id = registered_device["device_id"]
     
     # Get details
     response = authenticated_client.get(f"/api/v1/devices/{device_id}")
@@ -62,15 +60,10 @@ def test_get_device_details(authenticated_client):
     assert device["status"] == "offline"
 
 
-def test_delete_device(authenticated_client):
+def test_delete_device(authenticated_client, make_device):
     """Test device deletion"""
-    # Register device
-    register_response = authenticated_client.post(
-        "/api/v1/devices/register",
-        headers={"X-Registration-Token": settings.DEVICE_REGISTRATION_TOKEN},
-        json={"hostname": "test-server", "ip": "192.168.1.100"}
-    )
-    device_id = register_response.json()["device_id"]
+    device, _ = make_device()
+    device_id = str(device.id)
     
     # Delete
     response = authenticated_client.delete(f"/api/v1/devices/{device_id}")
@@ -81,19 +74,10 @@ def test_delete_device(authenticated_client):
     assert get_response.status_code == 404
 
 
-def test_filter_devices_by_status(authenticated_client):
+def test_filter_devices_by_status(registered_device, authenticated_client, make_device):
     """Test filtering devices by status"""
-    # Register devices
-    authenticated_client.post(
-        "/api/v1/devices/register",
-        headers={"X-Registration-Token": settings.DEVICE_REGISTRATION_TOKEN},
-        json={"hostname": "online-server", "ip": "192.168.1.101"}
-    )
-    authenticated_client.post(
-        "/api/v1/devices/register",
-        headers={"X-Registration-Token": settings.DEVICE_REGISTRATION_TOKEN},
-        json={"hostname": "offline-server", "ip": "192.168.1.102"}
-    )
+    make_device(hostname="offline-server", ip="192.168.1.102")
+    make_device(hostname="online-server", ip="192.168.1.101", status="online")
     
     # Filter by offline status
     response = authenticated_client.get("/api/v1/devices?status=offline")
@@ -105,17 +89,10 @@ def test_filter_devices_by_status(authenticated_client):
         assert device["status"] == "offline"
 
 
-def test_device_heartbeat_requires_token(client):
+def test_device_heartbeat_requires_token(client, make_device):
     """Heartbeat must require the correct device token."""
-    register_response = client.post(
-        "/api/v1/devices/register",
-        headers={"X-Registration-Token": settings.DEVICE_REGISTRATION_TOKEN},
-        json={"hostname": "hb-server", "ip": "192.168.1.200"},
-    )
-    assert register_response.status_code == 201
-    payload = register_response.json()
-    device_id = payload["device_id"]
-    device_token = payload["token"]
+    device, device_token = make_device(hostname="hb-server", ip="192.168.1.200")
+    device_id = device.id
 
     # Missing token should be rejected
     bad = client.post(f"/api/v1/devices/{device_id}/heartbeat")
@@ -126,3 +103,31 @@ def test_device_heartbeat_requires_token(client):
         headers={"X-Device-Token": device_token},
     )
     assert ok.status_code == 204
+
+
+def test_device_heartbeat_upgrades_legacy_bcrypt_token(client, db):
+    """Devices enrolled with bcrypt token hashes are migrated to SHA-256 on heartbeat."""
+    import hashlib
+    from db.models import Device
+    from services.auth_service import get_password_hash
+
+    device_token = "dev_legacy-token-value"
+    device = Device(hostname="legacy-server", ip="192.168.1.201", token_hash=get_password_hash(device_token), status="offline")
+    db.add(device)
+    db.commit()
+
+    ok = client.post(
+        f"/api/v1/devices/{device.id}/heartbeat",
+        headers={"X-Device-Token": device_token},
+    )
+    assert ok.status_code == 204
+
+    db.refresh(device)
+    assert device.token_hash == hashlib.sha256(device_token.encode("utf-8")).hexdigest()
+
+    # The upgraded digest still authenticates
+    again = client.post(
+        f"/api/v1/devices/{device.id}/heartbeat",
+        headers={"X-Device-Token": device_token},
+    )
+    assert again.status_code == 204
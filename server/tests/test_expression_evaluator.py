@@ -0,0 +1,242 @@
+"""Tests for the advanced ExpressionEvaluator."""
+import json
+import orjson
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from services.expression_evaluator import ExpressionEvaluator
+
+
+class TestParseSimpleExpression:
+    """Test parse_simple_expression for each supported syntax."""
+
+    def test_zabbix_style(self):
+        parsed = ExpressionEvaluator().parse_simple_expression("{web-01:cpu.load.avg(5m)}>80")
+        assert parsed == {"host": "web-01", "metric": "cpu.load.avg(5m)", "operator": ">", "threshold": 80.0}
+
+    def test_promql_style(self):
+        parsed = ExpressionEvaluator().parse_simple_expression("avg_over_time(cpu_load[5m]) >= 75.5")
+        assert parsed == {"host": "avg_over_time", "metric": "cpu_load[5m]", "operator": ">=", "threshold": 75.5}
+
+    def test_simple_metric(self):
+        parsed = ExpressionEvaluator().parse_simple_expression("  disk_free != 0 ")
+        assert parsed == {"metric": "disk_free", "operator": "!=", "threshold": 0.0}
+
+    def test_unparseable(self):
+        assert ExpressionEvaluator().parse_simple_expression("not an expression") is None
+
+    def test_memoized_result_is_not_shared(self):
+        evaluator = ExpressionEvaluator()
+        first = evaluator.parse_simple_expression("cpu_load > 80")
+        first["threshold"] = 0
+        assert evaluator.parse_simple_expression("cpu_load > 80")["threshold"] == 80.0
+
+
+class TestEvaluate:
+    """Test simple and compound evaluation."""
+
+    def test_evaluate_simple(self):
+        evaluator = ExpressionEvaluator()
+        assert evaluator.evaluate_simple("cpu_load > 80", 90.0) == (True, "PROBLEM")
+        assert evaluator.evaluate_simple("cpu_load > 80", 80.0) == (False, "OK")
+        assert evaluator.evaluate_simple("cpu_load <> 80", 80.0) == (False, "OK")
+        assert evaluator.evaluate_simple("garbage", 1.0) == (False, "UNKNOWN")
+
+    def test_evaluate_compound(self):
+        evaluator = ExpressionEvaluator()
+        expr = json.dumps({
+            "operator": "and",
+            "conditions": [
+                {"metric": "cpu_load", "operator": ">", "value": 80},
+                {"metric": "memory_used", "operator": ">", "value": 90},
+            ],
+        })
+        assert evaluator.evaluate_compound(expr, {"cpu_load": 85, "memory_used": 95}) == (True, "PROBLEM")
+        assert evaluator.evaluate_compound(expr, {"cpu_load": 85, "memory_used": 50}) == (False, "OK")
+        # Missing metrics count as not matching
+        assert evaluator.evaluate_compound(expr, {"cpu_load": 85}) == (False, "OK")
+
+        or_expr = expr.replace('"and"', '"or"')
+        assert evaluator.evaluate_compound(or_expr, {"cpu_load": 85, "memory_used": 50}) == (True, "PROBLEM")
+        assert evaluator.evaluate_compound("{not json", {}) == (False, "UNKNOWN")
+
+    def test_evaluate_compound_batch(self):
+        evaluator = ExpressionEvaluator()
+        high_cpu = json.dumps({"operator": "and", "conditions": [{"metric": "cpu_load", "operator": ">", "value": 80}]})
+        low_disk = json.dumps({"operator": "or", "conditions": [{"metric": "disk_free", "operator": "<", "value": 10}]})
+        values = {"cpu_load": 85, "disk_free": 50}
+
+        with patch.object(evaluator, "evaluate_compound", wraps=evaluator.evaluate_compound) as spy:
+            results = evaluator.evaluate_compound_batch([high_cpu, low_disk, high_cpu], values)
+
+        assert results == [(True, "PROBLEM"), (False, "OK"), (True, "PROBLEM")]
+        # Duplicate expressions are evaluated once
+        assert spy.call_count == 2
+
+
+class TestCompiledEvaluators:
+    """Test per-expression code generation."""
+
+    def _trigger(self, **kwargs):
+        from db.models import Trigger
+
+        defaults = dict(name="t", expression="cpu_load > 80", expression_type="simple", duration=0)
+        defaults.update(kwargs)
+        return Trigger(**defaults)
+
+    def test_compile_simple_trigger(self):
+        compiled = ExpressionEvaluator().compile_trigger(self._trigger(expression="cpu_load >= 80"))
+        assert compiled({"value": 80.0}) is True
+        assert compiled({"value": 79.0}) is False
+
+    def test_compile_compound_trigger(self):
+        expr = json.dumps({
+            "operator": "or",
+            "conditions": [
+                {"metric": "cpu_load", "operator": ">", "value": 80},
+                {"metric": "memory_used", "operator": "<>", "value": 0},
+            ],
+        })
+        compiled = ExpressionEvaluator().compile_trigger(
+            self._trigger(expression_type="compound", compound_expression=expr)
+        )
+        assert compiled({"cpu_load": 10, "memory_used": 5}) is True
+        assert compiled({"cpu_load": 10, "memory_used": 0}) is False
+        assert compiled({}) is False
+
+    def test_metric_names_are_not_executed(self):
+        expr = json.dumps({
+            "operator": "and",
+            "conditions": [{"metric": "x') or __import__('os').system('true') or ('", "operator": ">", "value": 1}],
+        })
+        compiled = ExpressionEvaluator().compile_trigger(
+            self._trigger(expression_type="compound", compound_expression=expr)
+        )
+        assert compiled({}) is False
+
+    def test_unparseable_expression_is_not_compiled(self):
+        assert ExpressionEvaluator().compile_trigger(self._trigger(expression="garbage")) is None
+
+    @pytest.mark.asyncio
+    async def test_evaluate_trigger_compiles_after_warmup(self, monkeypatch):
+        import services.expression_evaluator as module
+
+        monkeypatch.setattr(module, "TRIGGER_CODEGEN_WARMUP", 2)
+        evaluator = ExpressionEvaluator()
+        trigger = self._trigger(expression="cpu_load > 80")
+
+        with patch.object(evaluator, "compile_trigger", wraps=evaluator.compile_trigger) as spy:
+            for _ in range(2):
+                result = await evaluator.evaluate_trigger(trigger, db=None, current_values={"value": 95.0})
+                assert result["state"] == "PROBLEM"
+            assert spy.call_count == 0
+
+            result = await evaluator.evaluate_trigger(trigger, db=None, current_values={"value": 95.0})
+            assert spy.call_count == 1
+
+        assert result["state"] == "PROBLEM"
+        assert result["should_alert"] is True
+        assert trigger.last_state == "PROBLEM"
+
+    def test_warmup_tracking_is_bounded(self, monkeypatch):
+        import services.expression_evaluator as module
+
+        monkeypatch.setattr(module, "EVAL_HITS_MAXSIZE", 3)
+        evaluator = ExpressionEvaluator()
+        for n in range(5):
+            evaluator._hot_compiled(self._trigger(expression=f"cpu_load > {n}"))
+        assert list(evaluator._eval_hits) == ["cpu_load > 2", "cpu_load > 3", "cpu_load > 4"]
+
+    def test_compound_json_parsed_once(self):
+        evaluator = ExpressionEvaluator()
+        expr = json.dumps({"operator": "and", "conditions": [{"metric": "load_15", "operator": ">", "value": 4}]})
+
+        with patch("services.expression_evaluator.orjson.loads", wraps=orjson.loads) as spy:
+            for value in (1, 5, 9):
+                evaluator.evaluate_compound(expr, {"load_15": value})
+        assert spy.call_count == 1
+
+
+class TestCheckDuration:
+    """Test duration gating of PROBLEM states."""
+
+    def test_duration_gates_alert_without_flushing(self):
+        from db.models import Trigger
+
+        trigger = Trigger(name="t", expression="cpu_load > 80", duration=60, last_state="OK")
+        db = MagicMock()
+        evaluator = ExpressionEvaluator()
+
+        assert evaluator.check_duration(trigger, "PROBLEM", db) is False
+        assert trigger.last_state == "PROBLEM"
+
+        trigger.state_since = datetime.utcnow() - timedelta(seconds=61)
+        assert evaluator.check_duration(trigger, "PROBLEM", db) is True
+        db.flush.assert_not_called()
+
+
+class TestCheckDependencies:
+    """Test parent trigger suppression."""
+
+    def test_primed_parent_states(self, client, db):
+        from db.models import Trigger
+
+        parent = Trigger(name="Link down", expression="link_up < 1", last_state="PROBLEM")
+        db.add(parent)
+        db.commit()
+        child = Trigger(name="Ping loss", expression="ping_loss > 50", parent_trigger_id=parent.id)
+        orphan = Trigger(name="Disk", expression="disk_free < 10")
+
+        evaluator = ExpressionEvaluator()
+        evaluator.prime_parent_states(db, [child, orphan])
+        with patch.object(db, "query") as spy:
+            assert evaluator.check_dependencies(child, db) is False
+            assert evaluator.check_dependencies(orphan, db) is True
+        spy.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_parent_state_updates_within_batch(self, client, db):
+        from db.models import Trigger
+
+        parent = Trigger(name="Link down", expression="link_up < 1", last_state="PROBLEM")
+        db.add(parent)
+        db.commit()
+        child = Trigger(name="Ping loss", expression="ping_loss > 50", parent_trigger_id=parent.id)
+
+        evaluator = ExpressionEvaluator()
+        evaluator.prime_parent_states(db, [parent, child])
+        result = await evaluator.evaluate_trigger(parent, db, current_values={"value": 1.0})
+        assert result["state"] == "OK"
+        assert evaluator.check_dependencies(child, db) is True
+
+
+class TestEvaluateTriggers:
+    """Test batch evaluation."""
+
+    @pytest.mark.asyncio
+    async def test_batch_writes_state_in_one_update(self, client, db):
+        from db.models import Trigger
+
+        attached = Trigger(name="CPU", expression="cpu_load > 80")
+        detached = Trigger(name="Disk", expression="disk_free < 10")
+        idle = Trigger(name="Idle", expression="idle > 1", last_state="OK")
+        db.add_all([attached, detached, idle])
+        db.commit()
+        db.refresh(detached)
+        db.expunge(detached)
+
+        evaluator = ExpressionEvaluator()
+        results = await evaluator.evaluate_triggers(
+            [attached, detached, idle],
+            db,
+            {attached.id: {"value": 95.0}, detached.id: {"value": 50.0}},
+        )
+        assert [r["state"] for r in results] == ["PROBLEM", "OK", "UNKNOWN"]
+        # Attached rows were marked clean, so commit won't re-issue their UPDATE
+        assert not any(db.is_modified(t) for t in db)
+
+        db.commit()
+        db.expire_all()
+        states = {t.name: (t.last_state, t.last_evaluated_at is not None) for t in db.query(Trigger)}
+        assert states == {"CPU": ("PROBLEM", True), "Disk": ("OK", True), "Idle": ("OK", False)}
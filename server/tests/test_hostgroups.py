@@ -1,6 +1,11 @@
 """Tests for Host Groups API endpoints."""
 import pytest
-from uuid import uuid4
+from uuid import UUID
+
+from db.models import HostGroup
+
+# Never matches a real row
+FAKE_ID = UUID("00000000-0000-0000-0000-000000000000")
 
 
 class TestHostGroupsAPI:
@@ -20,13 +25,10 @@ class TestHostGroupsAPI:
         assert data["template_count"] == 0
         assert "id" in data
 
-    def test_create_hostgroup_duplicate_name(self, authenticated_client):
+    def test_create_hostgroup_duplicate_name(self, authenticated_client, seed_rows):
         """Test creating a host group with a duplicate name fails."""
         # Create first group
-        authenticated_client.post(
-            "/api/v1/hostgroups",
-            json={"name": "Duplicate Test", "description": "First one"}
-        )
+        seed_rows(HostGroup, [{"name": "Duplicate Test", "description": "First one"}])
         # Try to create duplicate
         response = authenticated_client.post(
             "/api/v1/hostgroups",
@@ -52,12 +54,10 @@ class TestHostGroupsAPI:
         assert data["host_groups"] == []
         assert data["total"] == 0
 
-    def test_list_hostgroups_with_data(self, authenticated_client):
+    def test_list_hostgroups_with_data(self, authenticated_client, seed_rows):
         """Test listing host groups with data."""
         # Create some groups
-        authenticated_client.post("/api/v1/hostgroups", json={"name": "Group A"})
-        authenticated_client.post("/api/v1/hostgroups", json={"name": "Group B"})
-        authenticated_client.post("/api/v1/hostgroups", json={"name": "Group C"})
+        seed_rows(HostGroup, [{"name": "Group A"}, {"name": "Group B"}, {"name": "Group C"}])
 
         response = authenticated_client.get("/api/v1/hostgroups")
         assert response.status_code == 200
@@ -65,11 +65,36 @@ class TestHostGroupsAPI:
         assert data["total"] == 3
         assert len(data["host_groups"]) == 3
 
-    def test_list_hostgroups_with_search(self, authenticated_client):
+    def test_list_hostgroups_member_counts(self, authenticated_client, db):
+        """Device/template counts come from the association tables."""
+        from db.models import Device, HostGroup, Template
+
+        linux = HostGroup(name="Linux")
+        empty = HostGroup(name="Empty")
+        linux.devices = [
+            Device(hostname="web-1", ip="10.0.0.1", token_hash="hash-1", status="offline"),
+            Device(hostname="web-2", ip="10.0.0.2", token_hash="hash-2", status="offline"),
+        ]
+        linux.templates = [Template(name="Linux Base")]
+        db.add_all([linux, empty])
+        db.commit()
+
+        response = authenticated_client.get("/api/v1/hostgroups")
+        assert response.status_code == 200
+        counts = {
+            hg["name"]: (hg["device_count"], hg["template_count"])
+            for hg in response.json()["host_groups"]
+        }
+        assert counts == {"Empty": (0, 0), "Linux": (2, 1)}
+
+        template_id = linux.templates[0].id
+        response = authenticated_client.post(f"/api/v1/templates/{template_id}/propagate")
+        assert response.status_code == 200
+        assert response.json()["affected_devices"] == 2
+
+    def test_list_hostgroups_with_search(self, authenticated_client, seed_rows):
         """Test searching host groups by name."""
-        authenticated_client.post("/api/v1/hostgroups", json={"name": "Linux Production"})
-        authenticated_client.post("/api/v1/hostgroups", json={"name": "Windows Servers"})
-        authenticated_client.post("/api/v1/hostgroups", json={"name": "Linux Dev"})
+        seed_rows(HostGroup, [{"name": "Linux Production"}, {"name": "Windows Servers"}, {"name": "Linux Dev"}])
 
         response = authenticated_client.get("/api/v1/hostgroups?search=Linux")
         assert response.status_code == 200
@@ -95,10 +120,10 @@ class TestHostGroupsAPI:
         assert data["id"] == hg_id
         assert data["name"] == "Test Get"
 
-    def test_get_hostgroup_not_found(self, authenticated_client):
-        """Test getting a non-existent host group."""
-        fake_id = uuid4()
-        response = authenticated_client.get(f"/api/v1/hostgroups/{fake_id}")
+    @pytest.mark.parametrize("method,body", [("GET", None), ("PUT", {"name": "Updated Name"}), ("DELETE", None)])
+    def test_hostgroup_not_found(self, authenticated_client, method, body):
+        """Test getting, updating or deleting a non-existent host group."""
+        response = authenticated_client.request(method, f"/api/v1/hostgroups/{FAKE_ID}", json=body)
         assert response.status_code == 404
 
     def test_update_hostgroup_success(self, authenticated_client):
@@ -120,15 +145,6 @@ class TestHostGroupsAPI:
         assert data["name"] == "New Name"
         assert data["description"] == "New description"
 
-    def test_update_hostgroup_not_found(self, authenticated_client):
-        """Test updating a non-existent host group."""
-        fake_id = uuid4()
-        response = authenticated_client.put(
-            f"/api/v1/hostgroups/{fake_id}",
-            json={"name": "Updated Name"}
-        )
-        assert response.status_code == 404
-
     def test_delete_hostgroup_success(self, authenticated_client):
         """Test deleting a host group."""
         # Create a group
@@ -145,9 +161,3 @@ class TestHostGroupsAPI:
         # Verify it's gone
         response = authenticated_client.get(f"/api/v1/hostgroups/{hg_id}")
         assert response.status_code == 404
-
-    def test_delete_hostgroup_not_found(self, authenticated_client):
-        """Test deleting a non-existent host group."""
-        fake_id = uuid4()
-        response = authenticated_client.delete(f"/api/v1/hostgroups/{fake_id}")
-        assert response.status_code == 404
@@ -0,0 +1,117 @@
+"""Tests for the maintenance window service."""
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from db.models import Device, HostGroup, MaintenanceWindow
+from services.maintenance import MaintenanceService
+
+
+def _window(**kwargs):
+    now = datetime.utcnow()
+    defaults = dict(
+        name="Patching",
+        start_time=now - timedelta(hours=1),
+        end_time=now + timedelta(hours=1),
+        scope_type="all",
+    )
+    defaults.update(kwargs)
+    return MaintenanceWindow(**defaults)
+
+
+class TestMaintenanceService:
+    """Test device coverage checks."""
+
+    def _devices(self, db):
+        group = HostGroup(name="Linux")
+        grouped = Device(hostname="web-1", ip="10.0.0.1", token_hash="hash-1", status="online")
+        other = Device(hostname="db-1", ip="10.0.0.2", token_hash="hash-2", status="online")
+        group.devices = [grouped]
+        db.add_all([group, other])
+        db.commit()
+        return group, grouped, other
+
+    def test_device_not_in_maintenance_without_windows(self, client, db):
+        _, grouped, _ = self._devices(db)
+        service = MaintenanceService()
+        assert service.is_device_in_maintenance(str(grouped.id), db) is False
+        assert service.should_collect_data(str(grouped.id), db) is True
+
+    def test_window_scopes(self, client, db):
+        group, grouped, other = self._devices(db)
+        service = MaintenanceService()
+
+        db.add(_window(scope_type="hostgroup", hostgroup_id=group.id, collect_data=False))
+        db.commit()
+        service.invalidate_cache()
+        assert service.is_device_in_maintenance(str(grouped.id), db) is True
+        assert service.is_device_in_maintenance(str(other.id), db) is False
+        assert service.should_collect_data(str(grouped.id), db) is False
+        assert service.should_collect_data(str(other.id), db) is True
+
+        db.add(_window(scope_type="device", device_id=other.id))
+        db.commit()
+        service.invalidate_cache()
+        assert service.is_device_in_maintenance(str(other.id), db) is True
+        assert service.should_collect_data(str(other.id), db) is True
+
+    def test_all_scope_ignores_inactive_and_unknown_devices(self, client, db):
+        _, grouped, _ = self._devices(db)
+        service = MaintenanceService()
+
+        db.add(_window(active=False))
+        db.add(_window(start_time=datetime.utcnow() + timedelta(hours=1),
+                       end_time=datetime.utcnow() + timedelta(hours=2)))
+        db.commit()
+        assert service.is_device_in_maintenance(str(grouped.id), db) is False
+
+        db.add(_window())
+        db.commit()
+        service.invalidate_cache()
+        assert service.is_device_in_maintenance(str(grouped.id), db) is True
+        assert service.is_device_in_maintenance(str(uuid.uuid4()), db) is False
+        assert service.should_collect_data(str(uuid.uuid4()), db) is True
+
+    def test_windows_cached_until_invalidated(self, client, db):
+        _, grouped, other = self._devices(db)
+        service = MaintenanceService()
+        assert service.is_device_in_maintenance(str(other.id), db) is False
+
+        window = service.create_window(
+            db,
+            name="Reboot",
+            start_time=datetime.utcnow() - timedelta(minutes=5),
+            end_time=datetime.utcnow() + timedelta(minutes=5),
+            scope_type="device",
+            device_id=str(other.id),
+        )
+        # create_window drops the cached snapshot
+        assert service.is_device_in_maintenance(str(other.id), db) is True
+
+        window.active = False
+        db.commit()
+        with patch.object(db, "query", wraps=db.query) as spy:
+            # Still served from the cache, without touching the database
+            assert service.is_device_in_maintenance(str(other.id), db) is True
+            assert service.is_device_in_maintenance(str(grouped.id), db) is False
+        assert spy.call_count == 0
+
+        service.invalidate_cache()
+        assert service.is_device_in_maintenance(str(other.id), db) is False
+
+    def test_get_suppressed_devices(self, client, db):
+        group, grouped, other = self._devices(db)
+        service = MaintenanceService()
+        assert service.get_suppressed_devices(db) == set()
+
+        db.add(_window(scope_type="hostgroup", hostgroup_id=group.id))
+        db.add(_window(scope_type="device", device_id=other.id))
+        db.commit()
+        service.invalidate_cache()
+        assert service.get_suppressed_devices(db) == {str(grouped.id), str(other.id)}
+
+        loner = Device(hostname="lab-1", ip="10.0.0.3", token_hash="hash-3", status="online")
+        db.add_all([loner, _window()])
+        db.commit()
+        service.invalidate_cache()
+        assert service.get_suppressed_devices(db) == {str(grouped.id), str(other.id), str(loner.id)}
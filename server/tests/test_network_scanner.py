@@ -0,0 +1,303 @@
+"""Tests for the network discovery scanner."""
+import asyncio
+import struct
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy import event
+
+from services.network_scanner import IcmpPinger, NetworkScanner, icmp_checksum
+
+
+class TestHostRanges:
+    """Test target expansion from CIDR ranges."""
+
+    def test_overlapping_ranges_scanned_once(self):
+        hosts = NetworkScanner().get_hosts_from_ranges("10.0.0.0/29, 10.0.0.4/30, 2001:db8::/126, bogus")
+        assert hosts == [
+            "10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.4", "10.0.0.5", "10.0.0.6",
+            "2001:db8::1", "2001:db8::2", "2001:db8::3",
+        ]
+
+    def test_point_to_point_and_host_limit(self):
+        scanner = NetworkScanner()
+        assert scanner.get_hosts_from_ranges("192.0.2.0/31,198.51.100.7/32") == [
+            "192.0.2.0", "192.0.2.1", "198.51.100.7",
+        ]
+        assert scanner.get_hosts_from_ranges("10.0.0.0/8", max_hosts=3) == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+
+    def test_ip_version(self):
+        from services.network_scanner import _ip_version
+
+        assert [_ip_version(ip) for ip in ("10.0.0.1", "2001:db8::1", "10.0.0", "web-1", "10.0.0.1\0")] == [
+            4, 6, None, None, None,
+        ]
+
+
+class TestIcmpPing:
+    """Test the socket-based ping sweep."""
+
+    def test_checksum_verifies_packet(self):
+        pinger = IcmpPinger.__new__(IcmpPinger)
+        pinger._ident = 0x1234
+        packet = pinger._echo_request(7)
+        assert struct.unpack_from("!BBHHH", packet)[3:] == (0x1234, 7)
+        # A packet carrying its own checksum sums to zero
+        assert icmp_checksum(packet) == 0
+
+    @pytest.mark.asyncio
+    async def test_ping_many_loopback(self):
+        scanner = NetworkScanner()
+        if scanner._get_pinger() is None:
+            pytest.skip("ICMP sockets not permitted in this environment")
+
+        results = await scanner.ping_many(["127.0.0.1", "not-an-ip"], timeout=1)
+        assert results["127.0.0.1"]["reachable"] is True
+        assert results["not-an-ip"] == {"reachable": False, "latency_ms": None}
+        scanner._pinger.close()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_ping_command(self):
+        scanner = NetworkScanner()
+        scanner._fping_path = None
+        proc = MagicMock(returncode=0)
+        proc.wait = AsyncMock(return_value=0)
+
+        with patch.object(IcmpPinger, "open", return_value=None), \
+                patch("asyncio.create_subprocess_exec", AsyncMock(return_value=proc)) as spawn:
+            results = await scanner.ping_many(["10.0.0.1", "10.0.0.2"])
+
+        assert spawn.await_count == 2
+        assert spawn.await_args.kwargs["stdout"] == asyncio.subprocess.DEVNULL
+        assert all(r["reachable"] for r in results.values())
+
+    @pytest.mark.asyncio
+    async def test_fping_sweeps_hosts_in_one_process(self):
+        scanner = NetworkScanner()
+        scanner._fping_path = "/usr/bin/fping"
+        proc = MagicMock(returncode=1)
+        proc.communicate = AsyncMock(return_value=(b"10.0.0.1 (0.42 ms)\n2001:db8::1 (12.5 ms)\n", b""))
+
+        with patch.object(IcmpPinger, "open", return_value=None), \
+                patch("asyncio.create_subprocess_exec", AsyncMock(return_value=proc)) as spawn:
+            results = await scanner.ping_many(["10.0.0.1", "10.0.0.2", "2001:db8::1", "not-an-ip"])
+
+        assert spawn.await_count == 1
+        assert proc.communicate.await_args.args[0] == b"10.0.0.1\n10.0.0.2\n2001:db8::1"
+        assert results == {
+            "10.0.0.1": {"reachable": True, "latency_ms": 0},
+            "10.0.0.2": {"reachable": False, "latency_ms": None},
+            "2001:db8::1": {"reachable": True, "latency_ms": 12},
+            "not-an-ip": {"reachable": False, "latency_ms": None},
+        }
+
+
+class TestResolveHostname:
+    """Test the reverse-DNS cache."""
+
+    @pytest.mark.asyncio
+    async def test_results_cached_per_ip(self, monkeypatch):
+        import socket
+        import services.network_scanner as module
+
+        lookups = []
+
+        def gethostbyaddr(ip):
+            lookups.append(ip)
+            if ip == "10.0.0.1":
+                return ("web-1.example.com", [], [ip])
+            raise socket.herror("not found")
+
+        monkeypatch.setattr(module.socket, "gethostbyaddr", gethostbyaddr)
+        scanner = NetworkScanner()
+
+        for _ in range(2):
+            assert await scanner.resolve_hostname("10.0.0.1") == "web-1.example.com"
+            assert await scanner.resolve_hostname("10.0.0.2") is None
+        assert lookups == ["10.0.0.1", "10.0.0.2"]
+
+        # Negative answers expire first
+        later = time.monotonic() + module.DNS_NEGATIVE_TTL + 1
+        monkeypatch.setattr(module, "time", SimpleNamespace(monotonic=lambda: later))
+        await scanner.resolve_hostname("10.0.0.1")
+        await scanner.resolve_hostname("10.0.0.2")
+        assert lookups == ["10.0.0.1", "10.0.0.2", "10.0.0.2"]
+
+
+class TestSnmp:
+    """Test the SNMPv2c client."""
+
+    def test_get_request_encoding(self):
+        from services.network_scanner import _ber_oid, snmp_get_request
+
+        packet = snmp_get_request("public", 1, ["1.3.6.1.2.1.1.1.0"])
+        assert packet.hex() == (
+            "3026020101" "04067075626c6963"
+            "a019020101020100020100" "300e300c06082b060102010101000500"
+        )
+        # Sub-identifiers above 127 use base-128 groups
+        assert _ber_oid("1.3.6.1.4.1.2021").hex() == "06072b060104018f65"
+
+    @pytest.mark.asyncio
+    async def test_scan_host_fetches_system_oids_in_one_request(self, monkeypatch):
+        import asyncio
+        import services.network_scanner as module
+        from services.network_scanner import _ber_encode, _ber_int, _ber_items
+
+        requests = []
+
+        class Agent(asyncio.DatagramProtocol):
+            def connection_made(self, transport):
+                self.transport = transport
+
+            def datagram_received(self, data, addr):
+                (_, message), = _ber_items(data)
+                _, (_, community), (_, pdu) = _ber_items(message)
+                (_, request_id), _, _, (_, varbinds) = _ber_items(pdu)
+                oids = [_ber_items(varbind)[0][1] for _, varbind in _ber_items(varbinds)]
+                requests.append((community, len(oids)))
+
+                values = [b"Linux web-1 6.1.0", b"web-1"]
+                varbinds = b"".join(
+                    _ber_encode(0x30, _ber_encode(0x06, oid) + _ber_encode(0x04, value))
+                    for oid, value in zip(oids, values)
+                )
+                pdu = _ber_encode(
+                    0xA2, _ber_encode(0x02, request_id) + _ber_int(0) + _ber_int(0) + _ber_encode(0x30, varbinds)
+                )
+                self.transport.sendto(_ber_encode(0x30, _ber_int(1) + _ber_encode(0x04, community) + pdu), addr)
+
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(Agent, local_addr=("127.0.0.1", 0))
+        monkeypatch.setattr(module, "SNMP_PORT", transport.get_extra_info("sockname")[1])
+        scanner = NetworkScanner()
+        try:
+            result = await scanner.scan_host("127.0.0.1", scan_icmp=False, scan_snmp=True, snmp_community="lab")
+        finally:
+            transport.close()
+            scanner._snmp.close()
+
+        assert requests == [(b"lab", 2)]
+        assert result["snmp_reachable"] is True
+        assert (result["snmp_sysdescr"], result["snmp_sysname"]) == ("Linux web-1 6.1.0", "web-1")
+
+
+class TestPortScan:
+    """Test TCP port probing."""
+
+    @pytest.mark.asyncio
+    async def test_scan_ports_reports_open_ports(self):
+        import asyncio
+
+        server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+        open_port = server.sockets[0].getsockname()[1]
+        closed = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+        closed_port = closed.sockets[0].getsockname()[1]
+        closed.close()
+        await closed.wait_closed()
+
+        try:
+            open_ports = await NetworkScanner().scan_ports("127.0.0.1", [open_port, closed_port])
+        finally:
+            server.close()
+            await server.wait_closed()
+        assert open_ports == {str(open_port): "unknown"}
+
+    @pytest.mark.asyncio
+    async def test_probe_socket_options(self):
+        import asyncio
+        import socket
+
+        seen = {}
+
+        async def sock_connect(sock, address):
+            seen["nodelay"] = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+            seen["reuseaddr"] = sock.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR)
+            seen["linger"] = struct.unpack("ii", sock.getsockopt(socket.SOL_SOCKET, socket.SO_LINGER, 8))
+            raise ConnectionRefusedError
+
+        loop = asyncio.get_running_loop()
+        with patch.object(loop, "sock_connect", side_effect=sock_connect):
+            assert await NetworkScanner().check_port("127.0.0.1", 9) is False
+        assert seen == {"nodelay": 1, "reuseaddr": 1, "linger": (1, 0)}
+
+
+class TestRunDiscovery:
+    """Test discovery job execution."""
+
+    @pytest.mark.asyncio
+    async def test_results_inserted_in_bulk(self, client, db):
+        from db.models import Device, DiscoveryJob, DiscoveryResult
+
+        known = Device(hostname="web-1", ip="10.9.0.1", token_hash="hash-1", status="online")
+        job = DiscoveryJob(name="Lab", ip_ranges="10.9.0.0/29", scan_icmp=True)
+        db.add_all([known, job])
+        db.commit()
+
+        async def scan_host(ip, **kwargs):
+            reachable = ip in ("10.9.0.1", "10.9.0.3")
+            return {"ip_address": ip, "icmp_reachable": reachable, "icmp_latency_ms": 1 if reachable else None}
+
+        scanner = NetworkScanner()
+        progress = []
+        insert_threads = []
+
+        def on_execute(conn, cursor, statement, *args):
+            if statement.startswith("INSERT INTO discovery_results"):
+                insert_threads.append(threading.get_ident())
+
+        event.listen(db.get_bind(), "before_cursor_execute", on_execute)
+        try:
+            with patch.object(scanner, "ping_many", AsyncMock(return_value={})), \
+                    patch.object(scanner, "scan_host", side_effect=scan_host):
+                results = await scanner.run_discovery(job, db, progress_callback=lambda pct, _: progress.append(pct))
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", on_execute)
+
+        # Rows were written off the event loop's thread
+        assert insert_threads and threading.get_ident() not in insert_threads
+
+        assert sorted((r.ip_address, r.status) for r in results) == [("10.9.0.1", "existing"), ("10.9.0.3", "new")]
+        assert db.query(DiscoveryResult).filter(DiscoveryResult.job_id == job.id).count() == 2
+        assert job.status == "completed" and job.progress_percent == 100
+        # Progress writes are throttled to PROGRESS_MIN_STEP increments
+        assert progress == sorted(progress) and all(b - a >= 5 for a, b in zip(progress, progress[1:]))
+
+    @pytest.mark.asyncio
+    async def test_cancelled_discovery_fails_job(self, client, db):
+        from db.models import DiscoveryJob
+
+        job = DiscoveryJob(name="Hung", ip_ranges="10.9.1.0/30", scan_icmp=False)
+        db.add(job)
+        db.commit()
+
+        started = asyncio.Event()
+        scans = []
+
+        async def scan_host(ip, **kwargs):
+            scans.append(asyncio.current_task())
+            started.set()
+            await asyncio.sleep(3600)
+
+        scanner = NetworkScanner()
+        with patch.object(scanner, "scan_host", side_effect=scan_host):
+            run = asyncio.create_task(scanner.run_discovery(job, db))
+            await started.wait()
+            run.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await run
+
+        # The in-flight scans were cancelled along with the job
+        assert scans and all(task.done() for task in scans)
+        db.refresh(job)
+        assert job.status == "failed" and job.error_message == "Discovery cancelled"
+
+    def test_scan_concurrency_from_env(self, monkeypatch):
+        from services.network_scanner import default_scan_concurrency
+
+        monkeypatch.setenv("DISCOVERY_SCAN_CONCURRENCY", "250")
+        assert NetworkScanner().scan_concurrency == 250
+        monkeypatch.delenv("DISCOVERY_SCAN_CONCURRENCY")
+        assert 100 <= default_scan_concurrency() <= 1024
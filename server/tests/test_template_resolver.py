@@ -0,0 +1,126 @@
+"""Tests for template inheritance and device template resolution."""
+from unittest.mock import patch
+
+from db.models import Device, HostGroup, Template
+from services.template_resolver import TemplateResolver
+
+
+class TestGetDeviceTemplates:
+    """Test template priority ordering for a device."""
+
+    def test_direct_assignments_override_hostgroup_templates(self, client, db):
+        base, web, extra = Template(name="Base"), Template(name="Web"), Template(name="Extra")
+        group = HostGroup(name="Linux", templates=[base, web])
+        device = Device(hostname="web-1", ip="10.0.0.1", token_hash="hash-1", status="online")
+        group.devices = [device]
+        db.add_all([group, extra])
+        db.commit()
+
+        resolver = TemplateResolver()
+        resolver.assign_template_to_device(db, device.id, web.id, priority=5)
+        resolver.assign_template_to_device(db, device.id, extra.id, priority=1)
+
+        templates = resolver.get_device_templates(device, db)
+        assert [t.name for t in templates] == ["Base", "Extra", "Web"]
+
+
+class TestGetEffectiveConfig:
+    """Test merged configuration for a device."""
+
+    def test_chain_loaded_in_bulk(self, client, db):
+        from sqlalchemy import event
+        from db.models import TemplateItem, Trigger
+
+        root = Template(name="Root", items=[TemplateItem(name="CPU", key="cpu", value_type="float")])
+        middle = Template(name="Middle", parent_template=root,
+                          items=[TemplateItem(name="Memory", key="mem", value_type="float")])
+        leaf = Template(name="Leaf", parent_template=middle,
+                        items=[TemplateItem(name="CPU (fast)", key="cpu", value_type="float", update_interval=10)],
+                        triggers=[Trigger(name="High CPU", expression="cpu > 90")])
+        group = HostGroup(name="Linux", templates=[leaf])
+        device = Device(hostname="web-1", ip="10.0.0.1", token_hash="hash-1", status="online")
+        group.devices = [device]
+        db.add(group)
+        db.commit()
+        db.expire_all()
+
+        statements = []
+        # Savepoints come from the test transaction, not the resolver
+        listener = lambda *args: args[2].startswith("SAVEPOINT") or statements.append(args[2])
+        event.listen(db.get_bind(), "before_cursor_execute", listener)
+        try:
+            config = TemplateResolver().get_effective_config(device, db)
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+        assert config["templates"] == ["Root", "Middle", "Leaf"]
+        assert {i["key"]: i["update_interval"] for i in config["items"]} == {"cpu": 10, "mem": 60}
+        assert [t["name"] for t in config["triggers"]] == ["High CPU"]
+        # Device refresh, host group templates, direct assignments,
+        # then the whole ancestor chain (+2 collections)
+        assert len(statements) <= 6
+
+    def test_resolved_chain_cached_until_template_changes(self, client, db):
+        from db.models import TemplateItem
+
+        parent = Template(name="Parent", items=[TemplateItem(name="CPU", key="cpu", value_type="float")])
+        child = Template(name="Child", parent_template=parent)
+        device = Device(hostname="web-1", ip="10.0.0.1", token_hash="hash-1", status="online")
+        db.add_all([child, device])
+        db.commit()
+
+        resolver = TemplateResolver()
+        resolver.assign_template_to_device(db, device.id, child.id)
+        first = resolver.get_effective_config(device, db)
+        first["items"][0]["name"] = "mutated"
+
+        with patch.object(resolver, "load_template_chains", wraps=resolver.load_template_chains) as spy:
+            again = resolver.get_effective_config(device, db)
+            assert spy.call_count == 0
+            assert again["items"][0]["name"] == "CPU"
+
+            # Editing an inherited item invalidates the child's cached chain
+            parent.items[0].update_interval = 5
+            db.commit()
+            config = resolver.get_effective_config(device, db)
+            assert spy.call_count == 1
+        assert config["items"][0]["update_interval"] == 5
+        assert config["templates"] == ["Parent", "Child"]
+
+    def test_chain_read_during_uncommitted_edit_not_cached_past_commit(self, tmp_path):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from db.models import Base, TemplateItem
+
+        # A file database, so each session's connection only sees committed rows
+        engine = create_engine(f"sqlite:///{tmp_path / 'race.db'}")
+        Base.metadata.create_all(engine)
+        Sessions = sessionmaker(bind=engine)
+        resolver = TemplateResolver()
+
+        def intervals():
+            with Sessions() as reader:
+                device = reader.get(Device, device_id)
+                return [i["update_interval"] for i in resolver.get_effective_config(device, reader)["items"]]
+
+        try:
+            with Sessions() as setup:
+                parent = Template(name="Parent", items=[TemplateItem(name="CPU", key="cpu", value_type="float")])
+                child = Template(name="Child", parent_template=parent)
+                device = Device(hostname="web-1", ip="10.0.0.1", token_hash="hash-1", status="online")
+                setup.add_all([child, device])
+                setup.commit()
+                device_id = device.id
+                resolver.assign_template_to_device(setup, device.id, child.id)
+
+            with Sessions() as writer:
+                item = writer.query(TemplateItem).one()
+                item.update_interval = 5
+                writer.flush()
+                # Not committed yet: other sessions still read the old chain
+                assert intervals() == [60]
+                writer.commit()
+
+            assert intervals() == [5]
+        finally:
+            engine.dispose()
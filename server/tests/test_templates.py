@@ -1,6 +1,24 @@
 """Tests for Templates API endpoints."""
 import pytest
-from uuid import uuid4
+from uuid import UUID
+
+from sqlalchemy import text
+
+from db.models import AlertEvent, Template, TemplateItem, Trigger
+
+# Never matches a real row
+FAKE_ID = UUID("00000000-0000-0000-0000-000000000000")
+
+
+@pytest.fixture
+def make_template(db):
+    """Insert a template directly and return its id, for item tests."""
+    def _make_template(name="Test Template"):
+        template = Template(name=name)
+        db.add(template)
+        db.commit()
+        return str(template.id)
+    return _make_template
 
 
 class TestTemplatesAPI:
@@ -21,12 +39,9 @@ class TestTemplatesAPI:
         assert data["trigger_count"] == 0
         assert "id" in data
 
-    def test_create_template_duplicate_name(self, authenticated_client):
+    def test_create_template_duplicate_name(self, authenticated_client, seed_rows):
         """Test creating a template with a duplicate name fails."""
-        authenticated_client.post(
-            "/api/v1/templates",
-            json={"name": "Duplicate Template"}
-        )
+        seed_rows(Template, [{"name": "Duplicate Template"}])
         response = authenticated_client.post(
             "/api/v1/templates",
             json={"name": "Duplicate Template"}
@@ -41,31 +56,30 @@ class TestTemplatesAPI:
         assert data["templates"] == []
         assert data["total"] == 0
 
-    def test_list_templates_with_data(self, authenticated_client):
+    def test_list_templates_with_data(self, authenticated_client, seed_rows):
         """Test listing templates with data."""
-        authenticated_client.post("/api/v1/templates", json={"name": "Template A"})
-        authenticated_client.post("/api/v1/templates", json={"name": "Template B"})
+        seed_rows(Template, [{"name": "Template A"}, {"name": "Template B"}])
 
         response = authenticated_client.get("/api/v1/templates")
         assert response.status_code == 200
         data = response.json()
         assert data["total"] == 2
 
-    def test_list_templates_with_search(self, authenticated_client):
+    def test_list_templates_with_search(self, authenticated_client, seed_rows):
         """Test searching templates by name."""
-        authenticated_client.post("/api/v1/templates", json={"name": "Linux Agent"})
-        authenticated_client.post("/api/v1/templates", json={"name": "Windows Agent"})
-        authenticated_client.post("/api/v1/templates", json={"name": "SNMP Generic"})
+        seed_rows(Template, [{"name": "Linux Agent"}, {"name": "Windows Agent"}, {"name": "SNMP Generic"}])
 
         response = authenticated_client.get("/api/v1/templates?search=Agent")
         assert response.status_code == 200
         data = response.json()
         assert data["total"] == 2
 
-    def test_list_templates_filter_type(self, authenticated_client):
+    def test_list_templates_filter_type(self, authenticated_client, seed_rows):
         """Test filtering templates by type."""
-        authenticated_client.post("/api/v1/templates", json={"name": "Agent Template", "template_type": "agent"})
-        authenticated_client.post("/api/v1/templates", json={"name": "SNMP Template", "template_type": "snmp"})
+        seed_rows(Template, [
+            {"name": "Agent Template", "template_type": "agent"},
+            {"name": "SNMP Template", "template_type": "snmp"},
+        ])
 
         response = authenticated_client.get("/api/v1/templates?template_type=agent")
         assert response.status_code == 200
@@ -90,8 +104,7 @@ class TestTemplatesAPI:
 
     def test_get_template_not_found(self, authenticated_client):
         """Test getting a non-existent template."""
-        fake_id = uuid4()
-        response = authenticated_client.get(f"/api/v1/templates/{fake_id}")
+        response = authenticated_client.get(f"/api/v1/templates/{FAKE_ID}")
         assert response.status_code == 404
 
     def test_update_template_success(self, authenticated_client):
@@ -126,18 +139,39 @@ class TestTemplatesAPI:
         response = authenticated_client.get(f"/api/v1/templates/{template_id}")
         assert response.status_code == 404
 
+    def test_delete_template_removes_children(self, authenticated_client, db):
+        """Deleting a template removes its items, triggers and their alert events."""
+        template = Template(name="With Children")
+        template.items = [TemplateItem(name="CPU", key="cpu")]
+        template.triggers = [Trigger(name="High CPU", expression="cpu > 90")]
+        template.triggers[0].alert_events = [AlertEvent(status="PROBLEM")]
+        db.add(template)
+        db.commit()
+
+        response = authenticated_client.delete(f"/api/v1/templates/{template.id}")
+        assert response.status_code == 204
+
+        # Removed by the foreign keys' ON DELETE CASCADE, not the ORM
+        assert db.query(TemplateItem).count() == 0
+        assert db.query(Trigger).count() == 0
+        assert db.query(AlertEvent).count() == 0
+
+
+    def test_legacy_text_id_readable(self, db):
+        """Rows written with 36-char text ids, before GUIDs became bytes, still load."""
+        legacy_id = "6fec1eb2-a416-4373-85c0-cdc655441a9f"
+        db.execute(text("INSERT INTO templates (id, name) VALUES (:id, 'Legacy')"), {"id": legacy_id})
+
+        template = db.query(Template).filter(Template.name == "Legacy").one()
+        assert template.id == UUID(legacy_id)
+
 
 class TestTemplateItemsAPI:
     """Tests for template items endpoints."""
 
-    def test_create_template_item_success(self, authenticated_client):
+    def test_create_template_item_success(self, authenticated_client, make_template):
         """Test adding an item to a template."""
-        # Create template first
-        create_resp = authenticated_client.post(
-            "/api/v1/templates",
-            json={"name": "Template With Items"}
-        )
-        template_id = create_resp.json()["id"]
+        template_id = make_template(name="Template With Items")
 
         # Add item
         response = authenticated_client.post(
@@ -156,20 +190,12 @@ class TestTemplateItemsAPI:
         assert data["key"] == "system.cpu.load[avg1]"
         assert data["units"] == "%"
 
-    def test_create_template_item_duplicate_key(self, authenticated_client):
+    def test_create_template_item_duplicate_key(self, authenticated_client, make_template, seed_rows):
         """Test adding an item with duplicate key fails."""
-        # Create template
-        create_resp = authenticated_client.post(
-            "/api/v1/templates",
-            json={"name": "Duplicate Key Test"}
-        )
-        template_id = create_resp.json()["id"]
+        template_id = make_template(name="Duplicate Key Test")
 
         # Add first item
-        authenticated_client.post(
-            f"/api/v1/templates/{template_id}/items",
-            json={"name": "CPU Load", "key": "system.cpu.load"}
-        )
+        seed_rows(TemplateItem, [{"template_id": UUID(template_id), "name": "CPU Load", "key": "system.cpu.load"}])
 
         # Try to add duplicate
         response = authenticated_client.post(
@@ -178,14 +204,9 @@ class TestTemplateItemsAPI:
         )
         assert response.status_code == 409
 
-    def test_template_item_count_updates(self, authenticated_client):
+    def test_template_item_count_updates(self, authenticated_client, make_template):
         """Test that item_count is updated when items are added."""
-        # Create template
-        create_resp = authenticated_client.post(
-            "/api/v1/templates",
-            json={"name": "Count Test"}
-        )
-        template_id = create_resp.json()["id"]
+        template_id = make_template(name="Count Test")
 
         # Add items
         authenticated_client.post(
@@ -204,14 +225,9 @@ class TestTemplateItemsAPI:
         assert data["item_count"] == 2
         assert len(data["items"]) == 2
 
-    def test_delete_template_item_success(self, authenticated_client):
+    def test_delete_template_item_success(self, authenticated_client, make_template):
         """Test deleting an item from a template."""
-        # Create template
-        create_resp = authenticated_client.post(
-            "/api/v1/templates",
-            json={"name": "Delete Item Test"}
-        )
-        template_id = create_resp.json()["id"]
+        template_id = make_template(name="Delete Item Test")
 
         # Add item
         item_resp = authenticated_client.post(
@@ -228,15 +244,9 @@ class TestTemplateItemsAPI:
         template_resp = authenticated_client.get(f"/api/v1/templates/{template_id}")
         assert template_resp.json()["item_count"] == 0
 
-    def test_delete_template_item_not_found(self, authenticated_client):
+    def test_delete_template_item_not_found(self, authenticated_client, make_template):
         """Test deleting a non-existent item."""
-        # Create template
-        create_resp = authenticated_client.post(
-            "/api/v1/templates",
-            json={"name": "Item Not Found Test"}
-        )
-        template_id = create_resp.json()["id"]
-        fake_item_id = uuid4()
+        template_id = make_template(name="Item Not Found Test")
 
-        response = authenticated_client.delete(f"/api/v1/templates/{template_id}/items/{fake_item_id}")
+        response = authenticated_client.delete(f"/api/v1/templates/{template_id}/items/{FAKE_ID}")
         assert response.status_code == 404
@@ -1,6 +1,11 @@
 """Tests for Triggers API endpoints."""
 import pytest
-from uuid import uuid4
+from uuid import UUID
+
+from db.models import AlertEvent, Trigger
+
+# Never matches a real row
+FAKE_ID = UUID("00000000-0000-0000-0000-000000000000")
 
 
 class TestTriggersAPI:
@@ -62,13 +67,12 @@ class TestTriggersAPI:
 
     def test_create_trigger_nonexistent_template(self, authenticated_client):
         """Test creating a trigger with non-existent template fails."""
-        fake_template_id = uuid4()
         response = authenticated_client.post(
             "/api/v1/triggers",
             json={
                 "name": "Test Trigger",
                 "expression": "{host:metric}>0",
-                "template_id": str(fake_template_id)
+                "template_id": str(FAKE_ID)
             }
         )
         assert response.status_code == 404
@@ -81,36 +85,33 @@ class TestTriggersAPI:
         assert data["triggers"] == []
         assert data["total"] == 0
 
-    def test_list_triggers_with_data(self, authenticated_client):
+    def test_list_triggers_with_data(self, authenticated_client, seed_rows):
         """Test listing triggers with data."""
-        authenticated_client.post("/api/v1/triggers", json={"name": "Trigger A", "expression": "a>b"})
-        authenticated_client.post("/api/v1/triggers", json={"name": "Trigger B", "expression": "c>d"})
+        seed_rows(Trigger, [{"name": "Trigger A", "expression": "a>b"}, {"name": "Trigger B", "expression": "c>d"}])
 
         response = authenticated_client.get("/api/v1/triggers")
         assert response.status_code == 200
         data = response.json()
         assert data["total"] == 2
 
-    def test_list_triggers_filter_severity(self, authenticated_client):
-        """Test filtering triggers by severity."""
-        authenticated_client.post("/api/v1/triggers", json={"name": "High", "expression": "a>b", "severity": "high"})
-        authenticated_client.post("/api/v1/triggers", json={"name": "Warning", "expression": "c>d", "severity": "warning"})
-
-        response = authenticated_client.get("/api/v1/triggers?severity=high")
-        assert response.status_code == 200
-        data = response.json()
-        assert data["total"] == 1
-        assert data["triggers"][0]["severity"] == "high"
-
-    def test_list_triggers_filter_enabled(self, authenticated_client):
-        """Test filtering triggers by enabled status."""
-        authenticated_client.post("/api/v1/triggers", json={"name": "Enabled", "expression": "a>b", "enabled": True})
-        authenticated_client.post("/api/v1/triggers", json={"name": "Disabled", "expression": "c>d", "enabled": False})
-
-        response = authenticated_client.get("/api/v1/triggers?enabled=true")
+    @pytest.mark.parametrize("query,expected", [
+        ("severity=high", ["High"]),
+        ("enabled=true", ["High", "Warning"]),
+        ("severity=warning&enabled=false", ["Disabled"]),
+    ])
+    def test_list_triggers_filter(self, authenticated_client, seed_rows, query, expected):
+        """Test filtering triggers by severity and enabled status."""
+        seed_rows(Trigger, [
+            {"name": "High", "expression": "a>b", "severity": "high", "enabled": True},
+            {"name": "Warning", "expression": "c>d", "severity": "warning", "enabled": True},
+            {"name": "Disabled", "expression": "e>f", "severity": "warning", "enabled": False},
+        ])
+
+        response = authenticated_client.get(f"/api/v1/triggers?{query}")
         assert response.status_code == 200
         data = response.json()
-        assert data["total"] == 1
+        assert data["total"] == len(expected)
+        assert sorted(t["name"] for t in data["triggers"]) == expected
 
     def test_get_trigger_success(self, authenticated_client):
         """Test getting a specific trigger by ID."""
@@ -128,8 +129,7 @@ class TestTriggersAPI:
 
     def test_get_trigger_not_found(self, authenticated_client):
         """Test getting a non-existent trigger."""
-        fake_id = uuid4()
-        response = authenticated_client.get(f"/api/v1/triggers/{fake_id}")
+        response = authenticated_client.get(f"/api/v1/triggers/{FAKE_ID}")
         assert response.status_code == 404
 
     def test_update_trigger_success(self, authenticated_client):
@@ -178,6 +178,17 @@ class TestTriggersAPI:
         response = authenticated_client.get(f"/api/v1/triggers/{trigger_id}")
         assert response.status_code == 404
 
+    def test_delete_trigger_removes_alert_events(self, authenticated_client, db):
+        """Deleting a trigger removes its alert events."""
+        trigger = Trigger(name="With Events", expression="x>y")
+        trigger.alert_events = [AlertEvent(status="PROBLEM"), AlertEvent(status="OK")]
+        db.add(trigger)
+        db.commit()
+
+        response = authenticated_client.delete(f"/api/v1/triggers/{trigger.id}")
+        assert response.status_code == 204
+        assert db.query(AlertEvent).count() == 0
+
     def test_toggle_trigger(self, authenticated_client):
         """Test toggling trigger enabled status."""
         create_resp = authenticated_client.post(
@@ -187,12 +198,8 @@ class TestTriggersAPI:
         trigger_id = create_resp.json()["id"]
         assert create_resp.json()["enabled"] is True
 
-        # Toggle off
-        response = authenticated_client.post(f"/api/v1/triggers/{trigger_id}/toggle")
-        assert response.status_code == 200
-        assert response.json()["enabled"] is False
-
-        # Toggle on
-        response = authenticated_client.post(f"/api/v1/triggers/{trigger_id}/toggle")
-        assert response.status_code == 200
-        assert response.json()["enabled"] is True
+        # Toggle off, then back on
+        for expected in (False, True):
+            response = authenticated_client.post(f"/api/v1/triggers/{trigger_id}/toggle")
+            assert response.status_code == 200
+            assert response.json()["enabled"] is expected
@@ -53,13 +53,10 @@ class TestUserCRUD:
         assert "id" in data
         assert "created_at" in data
 
-    def test_create_user_duplicate_username(self, authenticated_client: TestClient):
+    def test_create_user_duplicate_username(self, authenticated_client: TestClient, make_user):
         """Test creating user with duplicate username fails."""
         # First create a user
-        authenticated_client.post(
-            "/api/v1/users",
-            json={"username": "duplicateuser", "password": "testpass123", "role": "viewer"},
-        )
+        make_user(username="duplicateuser")
         # Try to create another with same username
         response = authenticated_client.post(
             "/api/v1/users",
@@ -68,30 +65,20 @@ class TestUserCRUD:
         assert response.status_code == 409
         assert "already exists" in response.json()["detail"].lower()
 
-    def test_create_user_invalid_username(self, authenticated_client: TestClient):
-        """Test creating user with invalid username fails."""
-        response = authenticated_client.post(
-            "/api/v1/users",
-            json={"username": "bad user!", "password": "testpass123", "role": "viewer"},
-        )
-        assert response.status_code == 422  # Validation error
-
-    def test_create_user_short_password(self, authenticated_client: TestClient):
-        """Test creating user with short password fails."""
-        response = authenticated_client.post(
-            "/api/v1/users",
-            json={"username": "shortpwuser", "password": "short", "role": "viewer"},
-        )
+    @pytest.mark.parametrize("payload", [
+        {"username": "bad user!", "password": "testpass123", "role": "viewer"},
+        {"username": "shortpwuser", "password": "short", "role": "viewer"},
+        {"username": "badroleuser", "password": "testpass123", "role": "root"},
+    ], ids=["invalid_username", "short_password", "invalid_role"])
+    def test_create_user_validation(self, authenticated_client: TestClient, payload):
+        """Test creating user with invalid fields fails."""
+        response = authenticated_client.post("/api/v1/users", json=payload)
         assert response.status_code == 422  # Validation error
 
-    def test_get_user(self, authenticated_client: TestClient):
+    def test_get_user(self, authenticated_client: TestClient, make_user):
         """Test getting a specific user."""
         # First create a user
-        create_response = authenticated_client.post(
-            "/api/v1/users",
-            json={"username": "getuser", "password": "testpass123", "role": "sre"},
-        )
-        user_id = create_response.json()["id"]
+        user_id = str(make_user(username="getuser", role="sre").id)
 
         # Get the user
         response = authenticated_client.get(f"/api/v1/users/{user_id}")
@@ -105,14 +92,10 @@ class TestUserCRUD:
         response = authenticated_client.get("/api/v1/users/00000000-0000-0000-0000-000000000000")
         assert response.status_code == 404
 
-    def test_update_user_role(self, authenticated_client: TestClient):
+    def test_update_user_role(self, authenticated_client: TestClient, make_user):
         """Test updating user role."""
         # Create a user
-        create_response = authenticated_client.post(
-            "/api/v1/users",
-            json={"username": "updateuser", "password": "testpass123", "role": "viewer"},
-        )
-        user_id = create_response.json()["id"]
+        user_id = str(make_user(username="updateuser").id)
 
         # Update role
         response = authenticated_client.put(
@@ -122,14 +105,10 @@ class TestUserCRUD:
         assert response.status_code == 200
         assert response.json()["role"] == "sre"
 
-    def test_reset_password(self, authenticated_client: TestClient):
+    def test_reset_password(self, authenticated_client: TestClient, make_user):
         """Test resetting user password."""
         # Create a user
-        create_response = authenticated_client.post(
-            "/api/v1/users",
-            json={"username": "resetpwuser", "password": "oldpass123", "role": "viewer"},
-        )
-        user_id = create_response.json()["id"]
+        user_id = str(make_user(username="resetpwuser").id)
 
         # Reset password
         response = authenticated_client.post(
@@ -138,14 +117,10 @@ class TestUserCRUD:
         )
         assert response.status_code == 204
 
-    def test_delete_user(self, authenticated_client: TestClient):
+    def test_delete_user(self, authenticated_client: TestClient, make_user):
         """Test deleting a user."""
         # Create a user
-        create_response = authenticated_client.post(
-            "/api/v1/users",
-            json={"username": "deleteuser", "password": "testpass123", "role": "viewer"},
-        )
-        user_id = create_response.json()["id"]
+        user_id = str(make_user(username="deleteuser").id)
 
         # Delete user
         response = authenticated_client.delete(f"/api/v1/users/{user_id}")
@@ -155,46 +130,35 @@ class TestUserCRUD:
         get_response = authenticated_client.get(f"/api/v1/users/{user_id}")
         assert get_response.status_code == 404
 
-    def test_cannot_delete_self(self, authenticated_client: TestClient):
+    def test_cannot_delete_self(self, authenticated_client: TestClient, admin_id):
         """Test that admin cannot delete themselves."""
-        # Get admin user ID from list
-        list_response = authenticated_client.get("/api/v1/users?search=admin")
-        admin_user = next(u for u in list_response.json()["users"] if u["username"] == "admin")
-
-        # Try to delete self
-        response = authenticated_client.delete(f"/api/v1/users/{admin_user['id']}")
+        response = authenticated_client.delete(f"/api/v1/users/{admin_id}")
         assert response.status_code == 400
         assert "yourself" in response.json()["detail"].lower()
 
-    def test_cannot_demote_last_admin(self, authenticated_client: TestClient):
+    def test_cannot_demote_last_admin(self, authenticated_client: TestClient, admin_id):
         """Test that last admin cannot be demoted."""
-        # Get admin user ID
-        list_response = authenticated_client.get("/api/v1/users?role=admin")
-        admins = list_response.json()["users"]
-        
-        # If there's only one admin, try to demote them
-        if len(admins) == 1:
-            admin_id = admins[0]["id"]
-            response = authenticated_client.put(
-                f"/api/v1/users/{admin_id}",
-                json={"role": "viewer"},
-            )
-            assert response.status_code == 400
-            assert "last admin" in response.json()["detail"].lower()
+        # The seeded admin is the only admin
+        response = authenticated_client.put(
+            f"/api/v1/users/{admin_id}",
+            json={"role": "viewer"},
+        )
+        assert response.status_code == 400
+        assert "last admin" in response.json()["detail"].lower()
 
 
 class TestUserNonAdmin:
     """Test that non-admin users cannot access user management."""
 
-    def test_non_admin_cannot_list_users(self, authenticated_client: TestClient):
+    def test_non_admin_cannot_list_users(self, viewer_client: TestClient):
         """Test that viewer cannot list users."""
-        # First create a viewer user
-        authenticated_client.post(
+        response = viewer_client.get("/api/v1/users")
+        assert response.status_code == 403
+
+    def test_non_admin_cannot_create_users(self, viewer_client: TestClient):
+        """Test that viewer cannot create users."""
+        response = viewer_client.post(
             "/api/v1/users",
-            json={"username": "vieweruser", "password": "testpass123", "role": "viewer"},
+            json={"username": "sneaky", "password": "testpass123", "role": "admin"},
         )
-        
-        # Login as viewer - need separate test client
-        # This test would require creating a new authenticated client as viewer
-        # For now, we verify the endpoint requires admin via require_admin dependency
-        pass  # Covered by list_users_requires_auth test
+        assert response.status_code == 403
@@ -2,7 +2,9 @@
 import os
 import asyncio
 import logging
+import time
 from contextlib import closing
+from typing import Optional
 
 from db.models import SessionLocal
 from services.alerting import TriggerEvaluator
@@ -11,14 +13,20 @@ logger = logging.getLogger(__name__)
 
 ALERTING_INTERVAL = int(os.getenv("ALERTING_INTERVAL", "60"))
 
+# Module-level so tests can replace the loop's sleep without patching asyncio
+_sleep = asyncio.sleep
 
-async def alerting_loop():
+
+async def alerting_loop(evaluator: Optional[TriggerEvaluator] = None):
     """Main alerting loop - evaluates all triggers continuously."""
     logger.info(f"Starting alerting worker (interval: {ALERTING_INTERVAL}s)")
     
-    evaluator = TriggerEvaluator()
+    evaluator = evaluator or TriggerEvaluator()
     
+    # Ticks run on a fixed schedule; evaluation time doesn't push them back
+    next_tick = time.monotonic()
     while True:
+        next_tick += ALERTING_INTERVAL
         try:
             with closing(SessionLocal()) as db:
                 events = await evaluator.evaluate_all_triggers(db)
@@ -27,4 +35,10 @@ async def alerting_loop():
         except Exception as e:
             logger.error(f"Error in alerting loop: {e}", exc_info=True)
         
-        await asyncio.sleep(ALERTING_INTERVAL)
+        delay = next_tick - time.monotonic()
+        if delay > 0:
+            await _sleep(delay)
+        else:
+            # Overran the interval: start the next tick now instead of catching up
+            logger.warning(f"Alerting cycle overran interval by {-delay:.1f}s")
+            next_tick = time.monotonic()
@@ -1,39 +1,67 @@
 """Manual testing script for new features."""
+import argparse
+import asyncio
 import json
 import os
-import requests
+import sys
+
+import httpx
 
 BASE_URL = "http://localhost:8001/api/v1"
 
-def get_auth_token():
+async def get_auth_token(client):
     """Login and get auth token."""
     username = os.getenv("ADMIN_USERNAME")
     password = os.getenv("ADMIN_PASSWORD")
     if not username or not password:
         raise RuntimeError("Set ADMIN_USERNAME and ADMIN_PASSWORD to run this script.")
-    response = requests.post(f"{BASE_URL}/auth/login", json={
+    response = await client.post("/auth/login", json={
         "username": username,
         "password": password
     })
     response.raise_for_status()
     return response.json()["access_token"]
 
-def test_features():
+def in_process_transport():
+    """ASGI transport calling the app directly; no server or sockets needed."""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "server"))
+    from main import app
+
+    return httpx.ASGITransport(app=app)
+
+async def test_features(in_process=False):
     """Test all new features."""
+    if in_process:
+        client = httpx.AsyncClient(transport=in_process_transport(), base_url="http://testserver/api/v1")
+    else:
+        client = httpx.AsyncClient(base_url=BASE_URL)
+    async with client:
+        await run_checks(client)
+
+async def run_checks(client):
+    """Run the feature checks over one pooled client."""
     print("🔐 Authenticating...")
-    token = get_auth_token()
-    headers = {"Authorization": f"Bearer {token}"}
+    token = await get_auth_token(client)
+    client.headers["Authorization"] = f"Bearer {token}"
     
     print("\n✅ Authentication successful!\n")
     
+    # Independent reads go out together
+    users, counts, alerts, devices = [
+        response.json() for response in await asyncio.gather(
+            client.get("/users"),
+            client.get("/alerts/summary/counts"),
+            client.get("/alerts"),
+            client.get("/devices"),
+        )
+    ]
+    
     # Test 1: User Management
     print("=" * 50)
     print("TEST 1: User Management API")
     print("=" * 50)
     
     # List users
-    response = requests.get(f"{BASE_URL}/users", headers=headers)
-    users = response.json()
     print(f"✓ List users: {users['total']} users found")
     
     # Create user
@@ -42,17 +70,17 @@ def test_features():
         "password": "testpass123",
         "role": "sre"
     }
-    response = requests.post(f"{BASE_URL}/users", headers=headers, json=new_user)
+    response = await client.post("/users", json=new_user)
     if response.status_code == 201:
         user = response.json()
         print(f"✓ Create user: {user['username']} (ID: {user['id']})")
         
         # Update role
-        response = requests.put(f"{BASE_URL}/users/{user['id']}", headers=headers, json={"role": "viewer"})
+        response = await client.put(f"/users/{user['id']}", json={"role": "viewer"})
         print(f"✓ Update role: {response.json()['role']}")
         
         # Delete user
-        requests.delete(f"{BASE_URL}/users/{user['id']}", headers=headers)
+        await client.delete(f"/users/{user['id']}")
         print(f"✓ Delete user: Success")
     else:
         print(f"⚠ User might already exist (status: {response.status_code})")
@@ -63,13 +91,9 @@ def test_features():
     print("=" * 50)
     
     # Alert counts
-    response = requests.get(f"{BASE_URL}/alerts/summary/counts", headers=headers)
-    counts = response.json()
     print(f"✓ Alert counts: {counts}")
     
     # List alerts
-    response = requests.get(f"{BASE_URL}/alerts", headers=headers)
-    alerts = response.json()
     print(f"✓ List alerts: {alerts['total']} alert events")
     
     # Test 3: Agent Config Endpoint
@@ -77,16 +101,12 @@ def test_features():
     print("TEST 3: Agent Config Endpoint")
     print("=" * 50)
     
-    # Get devices
-    response = requests.get(f"{BASE_URL}/devices", headers=headers)
-    devices = response.json()
-    
     if devices["total"] > 0:
         device_id = devices["devices"][0]["id"]
         print(f"✓ Testing with device: {devices['devices'][0]['hostname']}")
         
         # Get agent config
-        response = requests.get(f"{BASE_URL}/templates/agents/{device_id}/config", headers=headers)
+        response = await client.get(f"/templates/agents/{device_id}/config")
         if response.status_code == 200:
             config = response.json()
             print(f"✓ Agent config: {len(config['items'])} items configured")
@@ -107,9 +127,15 @@ def test_features():
     print("\n🎯 Next: Open http://localhost:5173 to test the UI!")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--in-process", action="store_true",
+        help="call the app in-process (uses the server's DATABASE_URL) instead of %s" % BASE_URL,
+    )
+    args = parser.parse_args()
     try:
-        test_features()
-    except requests.exceptions.ConnectionError:
+        asyncio.run(test_features(in_process=args.in_process))
+    except httpx.ConnectError:
         print("❌ ERROR: Cannot connect to API server")
         print("   Make sure the server is running: cd server && python main.py")
     except Exception as e: